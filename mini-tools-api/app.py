@@ -1,7 +1,19 @@
+import importlib
 import json
-from file_manager.handlers import handle_file
-from royalty_compressor.handlers import handle_compression
-from session_manager.handlers import handle_session
+from shared import metrics
+from shared.invocations import JANITOR_EVENT_KEY, JOB_EVENT_KEY
+
+# (method, path prefix, module, handler), most specific first. A module is only imported the first
+# time one of its routes is hit, so session and file requests never load pandas. Job polling is
+# served from the jobs module for the same reason.
+ROUTES = [
+    ("GET", "/royalty-compressor/jobs/", "royalty_compressor.jobs", "get_compression_job"),
+    (None, "/file-manager/", "file_manager.handlers", "handle_file"),
+    (None, "/royalty-compressor/", "royalty_compressor.handlers", "handle_compression"),
+    (None, "/session-manager/", "session_manager.handlers", "handle_session"),
+    (None, "/mri-converter/", "mri_converter.handlers", "handle_mri"),
+    (None, "/name-splitter/", "name_splitter.handlers", "handle_name_split"),
+]
 
 ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -33,7 +45,47 @@ def cors_options_response(origin):
             "body": json.dumps({"error": "Origin not allowed"}),
         }
 
+def find_handler(method, path):
+    for route_method, prefix, module_name, handler_name in ROUTES:
+        if path.startswith(prefix) and route_method in (None, method):
+            with metrics.stage("import"):
+                module = importlib.import_module(module_name)
+            return getattr(module, handler_name)
+    return None
+
+def metric_route(event):
+    if isinstance(event, dict) and JOB_EVENT_KEY in event:
+        return "job"
+    if isinstance(event, dict) and JANITOR_EVENT_KEY in event:
+        return "janitor"
+    try:
+        # The resource template (/jobs/{job_id}) rather than the path keeps the dimension bounded.
+        return f"{event['httpMethod']} {event.get('resource') or event['path']}"
+    except (KeyError, TypeError):
+        return "unknown"
+
 def lambda_handler(event, context):
+    with metrics.invocation(metric_route(event)) as invocation:
+        response = route_request(event, context)
+        if invocation:
+            invocation.set_property("RequestId", getattr(context, "aws_request_id", None))
+            if isinstance(response, dict):
+                invocation.set_property("StatusCode", response.get("statusCode"))
+        return response
+
+def route_request(event, context):
+    # Asynchronous self-invocations carry a job instead of an API Gateway request.
+    if isinstance(event, dict) and JOB_EVENT_KEY in event:
+        from royalty_compressor.jobs import run_job
+        run_job(event[JOB_EVENT_KEY]["job_id"], context)
+        return {"statusCode": 200}
+
+    # The daily storage clean-up arrives from its EventBridge schedule.
+    if isinstance(event, dict) and JANITOR_EVENT_KEY in event:
+        from file_manager.janitor import run_janitor
+        report = run_janitor(dry_run=bool((event[JANITOR_EVENT_KEY] or {}).get("dry_run")))
+        return {"statusCode": 200, "body": json.dumps(report)}
+
     try:
         path = event["path"]
         method = event["httpMethod"]
@@ -44,12 +96,9 @@ def lambda_handler(event, context):
             return cors_options_response(origin)
 
         # Route request
-        if path.startswith("/file-manager/"):
-            response = handle_file(event, context)
-        elif path.startswith("/royalty-compressor/"):
-            response = handle_compression(event, context)
-        elif path.startswith("/session-manager/"):
-            response = handle_session(event, context)
+        handler = find_handler(method, path)
+        if handler is not None:
+            response = handler(event, context)
         else:
             response = {
                 "statusCode": 404,
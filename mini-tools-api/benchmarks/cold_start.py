@@ -0,0 +1,172 @@
+"""Measure Lambda cold starts per route.
+
+Every sample is a fresh interpreter that imports ``app`` and serves one request, which is what a
+new Lambda container does. AWS is replaced by a local moto server so the numbers reflect import
+and client set-up cost rather than network latency.
+
+    python -m benchmarks.cold_start --repeat 5 --output cold_start.json
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+
+class Context:
+    aws_request_id = "cold-start"
+    invoked_function_arn = "arn:aws:lambda:us-east-1:000000000000:function:mini-tools"
+
+response = app.lambda_handler(json.loads(sys.argv[1]), Context())
+finished = time.perf_counter()
+print("RESULT " + json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (finished - imported) * 1000,
+    "status": response.get("statusCode"),
+    "pandas_loaded": "pandas" in sys.modules,
+    "boto3_loaded": "boto3" in sys.modules
+}))
+"""
+
+
+def api_event(method, path, resource, body=None, path_parameters=None):
+    return {
+        "httpMethod": method,
+        "path": path,
+        "resource": resource,
+        "headers": {"origin": "http://localhost:5173"},
+        "pathParameters": path_parameters,
+        "body": json.dumps(body) if body is not None else None
+    }
+
+
+def routes(session_id, job_id):
+    return {
+        "OPTIONS preflight": api_event("OPTIONS", "/session-manager/create-session", "/session-manager/create-session"),
+        "POST create-session": api_event("POST", "/session-manager/create-session", "/session-manager/create-session", {}),
+        "POST track-usage": api_event(
+            "POST", f"/session-manager/track-usage/{session_id}", "/session-manager/track-usage/{session_id}",
+            {"tool_name": "benchmark", "action": "cold_start"}, {"session_id": session_id}
+        ),
+        "GET download-url": api_event(
+            "GET", "/file-manager/download-url/uploads/report.csv", "/file-manager/download-url/{key+}",
+            path_parameters={"key": "uploads/report.csv"}
+        ),
+        "GET compression job": api_event(
+            "GET", f"/royalty-compressor/jobs/{job_id}", "/royalty-compressor/jobs/{job_id}",
+            path_parameters={"job_id": job_id}
+        ),
+        "POST compress": api_event(
+            "POST", "/royalty-compressor/compress", "/royalty-compressor/compress",
+            {"s3_key": "uploads/report.csv", "use_cache": False}
+        )
+    }
+
+
+def seed(endpoint):
+    import boto3
+
+    s3 = boto3.client("s3", endpoint_url=endpoint, region_name="us-east-1")
+    s3.create_bucket(Bucket="mini-tools")
+    s3.put_object(
+        Bucket="mini-tools",
+        Key="uploads/report.csv",
+        Body=b"Asset ID,Country,Owned Views,Partner Revenue\nA1,US,10,0.5\nA1,GB,5,0.25\nA2,US,1,0.1\n"
+    )
+
+    dynamodb = boto3.client("dynamodb", endpoint_url=endpoint, region_name="us-east-1")
+    dynamodb.create_table(
+        TableName="Sessions",
+        AttributeDefinitions=[{"AttributeName": "sessionId", "AttributeType": "S"}],
+        KeySchema=[{"AttributeName": "sessionId", "KeyType": "HASH"}],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    dynamodb.put_item(TableName="Sessions", Item={
+        "sessionId": {"S": "cold-start-session"},
+        "usage_logs": {"L": []}
+    })
+    dynamodb.put_item(TableName="Sessions", Item={
+        "sessionId": {"S": "job#cold-start-job"},
+        "job_id": {"S": "cold-start-job"},
+        "state": {"S": "running"}
+    })
+    return "cold-start-session", "cold-start-job"
+
+
+def sample(event, env):
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(event)],
+        cwd=API_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise Exception(f"Cold start sample failed:\n{completed.stdout}\n{completed.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per route; the median is kept")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    try:
+        host, port = server.get_host_and_port()
+        endpoint = f"http://{host}:{port}"
+        # Credentials only need to exist; moto accepts anything.
+        for variable in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+            os.environ.setdefault(variable, "testing")
+        env = dict(
+            os.environ,
+            AWS_DEFAULT_REGION="us-east-1",
+            S3_ENDPOINT=endpoint,
+            DYNAMODB_ENDPOINT=endpoint,
+            JOB_DISPATCH="inline"
+        )
+        session_id, job_id = seed(endpoint)
+
+        results = {}
+        print(f"{'route':<22} {'import':>9} {'request':>9} {'total':>9}  pandas  status")
+        for name, event in routes(session_id, job_id).items():
+            samples = [sample(event, env) for _ in range(args.repeat)]
+            result = {
+                "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+                "first_request_ms": round(statistics.median(s["first_request_ms"] for s in samples), 1),
+                "pandas_loaded": samples[0]["pandas_loaded"],
+                "boto3_loaded": samples[0]["boto3_loaded"],
+                "status": samples[0]["status"]
+            }
+            result["total_ms"] = round(result["import_ms"] + result["first_request_ms"], 1)
+            results[name] = result
+            print(
+                f"{name:<22} {result['import_ms']:>7.0f}ms {result['first_request_ms']:>7.0f}ms "
+                f"{result['total_ms']:>7.0f}ms  {'yes' if result['pandas_loaded'] else 'no':>6}  {result['status']}"
+            )
+    finally:
+        server.stop()
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"repeat": args.repeat, "routes": results}, output_file, indent=2)
+        print("✅ Results written to", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Benchmark the MuMa to MRI converter against the row-by-row version it replaced.
+
+Generates a synthetic MuMa export (or reads ``--input``), converts it with
+``mri_converter.conversion.convert`` and with the original ``iterrows`` loop from
+streamlit-apps/app_mri_converter.py, and checks that both produce byte-identical CSV.
+
+    python -m benchmarks.mri_converter --songs 50000 --slots 6
+"""
+import argparse
+import io
+import json
+import random
+import sys
+import tempfile
+import pandas as pd
+from benchmarks.run import measure
+from mri_converter.conversion import convert, read_muma
+
+SONG_FIELDS = ["Song Title", "Song ISWC", "Song Language"]
+SLOT_FIELDS = [
+    "Composer {i} Surname", "Composer {i} First Name", "Composer {i} Middle Name", "Composer {i} Controlled",
+    "Composer {i} Share", "Composer {i} Capacity", "Publisher {i} Name", "Publisher {i} Controlled",
+    "Publisher {i} Share", "Client {i} Name", "Territory {i} Name", "Recording {i} Display Artist",
+    "Recording {i} Label Name", "Recording {i} ISRC", "Recording {i} UPC"
+]
+
+
+def write_muma(output, songs, slots, seed=0):
+    """Write a MuMa-style export where each song fills a random number of leading slots."""
+    rng = random.Random(seed)
+    columns = SONG_FIELDS + [field.format(i=i) for i in range(1, slots + 1) for field in SLOT_FIELDS]
+    rows = []
+    for song in range(songs):
+        filled = rng.randint(0, slots)
+        row = [f"Song {song}", f"T-{song:09d}", rng.choice(["EN", "ES", ""])]
+        for i in range(1, slots + 1):
+            if i > filled:
+                row += [""] * len(SLOT_FIELDS)
+                continue
+            row += [
+                f"Surname {rng.randrange(5000)}", f"First {rng.randrange(500)}", rng.choice(["", "M"]),
+                rng.choice(["Y", "N"]), str(rng.choice([25, 50, 100])), rng.choice(["CA", "C", "A"]),
+                f"Publisher {rng.randrange(300)}", rng.choice(["Y", "N"]), str(rng.choice([50, 100])),
+                f"Client {rng.randrange(50)}", rng.choice(["World", "US", "GB"]), f"Artist {rng.randrange(2000)}",
+                f"Label {rng.randrange(100)}", f"US{rng.randrange(10 ** 10):010d}", str(rng.randrange(10 ** 12))
+            ]
+        rows.append(row)
+    pd.DataFrame(rows, columns=columns).to_csv(output, index=False)
+
+
+def iterrows_convert(df):
+    """The conversion loop from streamlit-apps/app_mri_converter.py, before vectorization."""
+    formatted_rows = []
+    for _, row in df.iterrows():
+        i = 1
+        while f"Recording {i} Display Artist" in row and row[f"Recording {i} Display Artist"] != "":
+            song_data = {"SONG TITLE*": row["Song Title"],
+                    "AKA TITLE": "",
+                    "MRI SONG ID": "",
+                    "PUBLISHER'S SONG ID": "",
+                    "ISWC": ""}
+
+            if f"Composer {i} Surname" in row:
+                song_data["COMPOSER LAST NAME*"] = row[f"Composer {i} Surname"]
+                song_data["COMPOSER FIRST NAME*"] = row[f"Composer {i} First Name"]
+                song_data["COMPOSER MIDDLE NAME"] = row[f"Composer {i} Middle Name"]
+                song_data["COMPOSER PRO"] = ""
+                song_data["COMPOSER IPI NUMBER"] = ""
+                song_data["CONTROLLED COMPOSER (Y/N)*"] = row[f"Composer {i} Controlled"]
+                song_data["COMPOSER SHARE %*"] = row[f"Composer {i} Share"]
+                song_data["COMPOSER ROLE CODE"] = row[f"Composer {i} Capacity"]
+            else:
+                song_data["COMPOSER LAST NAME*"] = ""
+                song_data["COMPOSER FIRST NAME*"] = ""
+                song_data["COMPOSER MIDDLE NAME"] = ""
+                song_data["COMPOSER PRO"] = ""
+                song_data["COMPOSER IPI NUMBER"] = ""
+                song_data["CONTROLLED COMPOSER (Y/N)*"] = ""
+                song_data["COMPOSER SHARE %*"] = ""
+                song_data["COMPOSER ROLE CODE"] = ""
+
+            if f"Publisher {i} Name" in row:
+                song_data["PUBLISHER NAME *"] = row[f"Publisher {i} Name"]
+                song_data["PUBLISHER PRO*"] = ""
+                song_data["PUBLISHER IPI NUMBER *"] = ""
+                song_data["CONTROLLED PUBLISHER (Y/N)*"] = row[f"Publisher {i} Controlled"]
+            else:
+                song_data["PUBLISHER NAME *"] = ""
+                song_data["PUBLISHER PRO*"] = ""
+                song_data["PUBLISHER IPI NUMBER *"] = ""
+                song_data["CONTROLLED PUBLISHER (Y/N)*"] = ""
+
+            if f"Client {i} Name" in row:
+                song_data["ADMINISTRATOR NAME"] = row[f"Client {i} Name"]
+                song_data["SHARE %*"] = row[f"Publisher {i} Share"]
+                song_data["TERRITORY CONTROLLED*"] = row[f"Territory {i} Name"]
+                song_data["TERRITORY EXCLUSIONS (OPTIONAL)"] = ""
+                song_data["PUBLISHER MAILING ADDRESS*"] = ""
+                song_data["PUBLISHER CONTACT*"] = ""
+            else:
+                song_data["ADMINISTRATOR NAME"] = ""
+                song_data["SHARE %*"] = ""
+                song_data["TERRITORY CONTROLLED*"] = ""
+                song_data["TERRITORY EXCLUSIONS (OPTIONAL)"] = ""
+                song_data["PUBLISHER MAILING ADDRESS*"] = ""
+                song_data["PUBLISHER CONTACT*"] = ""
+
+            if f"Recording {i} Display Artist" in row:
+                song_data["RECORDING ARTIST NAME"] = row[f"Recording {i} Display Artist"]
+                song_data["RECORDING LABEL"] = row[f"Recording {i} Label Name"]
+                song_data["RECORDING ISRC"] = row[f"Recording {i} ISRC"]
+                song_data["UPC/EAN"] = row[f"Recording {i} UPC"]
+            else:
+                song_data["RECORDING ARTIST NAME"] = ""
+                song_data["RECORDING LABEL"] = ""
+                song_data["RECORDING ISRC"] = ""
+                song_data["UPC/EAN"] = ""
+
+            formatted_rows.append(song_data)
+            i += 1
+
+    return pd.DataFrame(formatted_rows)
+
+
+def to_csv_bytes(df):
+    output = io.BytesIO()
+    df.to_csv(output, index=False)
+    return output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="Benchmark an existing MuMa export instead of generating one")
+    parser.add_argument("--songs", type=int, default=20000)
+    parser.add_argument("--slots", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the vectorized converter; the fastest is kept")
+    parser.add_argument("--skip-iterrows", action="store_true", help="Only time the vectorized converter")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    path = args.input
+    if not path:
+        muma = tempfile.NamedTemporaryFile(suffix=".csv")
+        print(f"💡 Generating {args.songs} songs with up to {args.slots} slots")
+        write_muma(muma, args.songs, args.slots, args.seed)
+        muma.flush()
+        path = muma.name
+
+    stages = {}
+    df = measure(stages, "read", lambda: read_muma(path))
+    vectorized = measure(stages, "convert_vectorized", lambda: convert(df), args.repeat)
+    print(f"💡 {len(df)} songs -> {len(vectorized)} MRI rows")
+
+    parity = None
+    if not args.skip_iterrows:
+        legacy = measure(stages, "convert_iterrows", lambda: iterrows_convert(df))
+        parity = to_csv_bytes(vectorized) == to_csv_bytes(legacy)
+        print(f"{'✅' if parity else '❌'} Vectorized output {'matches' if parity else 'differs from'} iterrows")
+        speedup = stages["convert_iterrows"]["seconds"] / max(stages["convert_vectorized"]["seconds"], 1e-9)
+        print(f"💡 {speedup:.0f}x faster")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"songs": len(df), "mri_rows": len(vectorized), "stages": stages, "parity": parity},
+                      output_file, indent=2)
+        print("✅ Results written to", args.output)
+
+    sys.exit(1 if parity is False else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Synthetic YouTube Asset Summary reports for benchmarking the royalty compressor.
+
+The output looks like what YouTube Studio exports: an "Asset Summary" preamble line, headers
+with non-breaking spaces and stray double spaces, a long tail of assets with a handful that
+appear on most rows, and blanks in the optional columns.
+
+    python -m benchmarks.report_generator --rows 1000000 --assets 50000 --output report.csv
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from royalty_compressor.schema import SUM_COLUMNS
+
+TEXT_COLUMNS = [
+    "Adjustment Type",
+    "Asset ID",
+    "Asset Title",
+    "Asset Labels",
+    "Asset Channel ID",
+    "Asset Type",
+    "Custom ID",
+    "ISRC",
+    "UPC",
+    "Artist",
+    "Album",
+    "Label",
+    "Country",
+    "Channel ID",
+    "Content Type",
+    "Policy",
+    "Claim Type"
+]
+
+COUNTRIES = ["US", "GB", "DE", "FR", "BR", "IN", "JP", "MX", "CA", "AU", "ES", "IT", "NL", "SE", "KR"]
+
+CHANNELS = np.array([f"UC{i:022d}" for i in range(200)], dtype=object)
+
+# Rows are written in blocks so multi-gigabyte reports never sit in memory at once.
+BLOCK_ROWS = 200000
+
+
+def raw_header(col, rng):
+    """How YouTube spells ``col``: some spaces are U+00A0, some headers carry padding."""
+    words = col.split(" ")
+    header = words[0]
+    for word in words[1:]:
+        header += ("\u00A0" if rng.random() < 0.3 else " ") + word
+    if rng.random() < 0.1:
+        header = header.replace(" : ", "  :  ")
+    if rng.random() < 0.1:
+        header += " "
+    return header
+
+
+def asset_table(assets, rng):
+    """Per-asset metadata: every row for an asset repeats it, with some values left blank."""
+    ids = np.array([f"A{i:012d}" for i in rng.permutation(assets)], dtype=object)
+    labels = np.array(["Label One", "Label Two", "Indie Records", "Big Music Group", ""], dtype=object)
+    artists = np.array([f"Artist {i}" for i in range(max(1, assets // 20))], dtype=object)
+
+    def sometimes(values, blank_rate):
+        values = values.astype(object)
+        values[rng.random(assets) < blank_rate] = ""
+        return values
+
+    return {
+        "Asset ID": ids,
+        "Asset Title": np.array([f"Song Title {i}, Pt. {i % 3}" for i in range(assets)], dtype=object),
+        "Asset Labels": sometimes(rng.choice(labels, assets), 0.4),
+        "Asset Channel ID": np.array([f"UC{i % 40:022d}" for i in range(assets)], dtype=object),
+        "Asset Type": rng.choice(np.array(["Sound Recording", "Composition", "Art Track", "Music Video"], dtype=object), assets),
+        "Custom ID": sometimes(np.array([f"CID{i:08d}" for i in range(assets)], dtype=object), 0.2),
+        "ISRC": sometimes(np.array([f"USX{i:09d}" for i in range(assets)], dtype=object), 0.1),
+        # Leading zeros must survive the round trip.
+        "UPC": sometimes(np.array([f"{i:012d}" for i in rng.integers(0, 10 ** 9, assets)], dtype=object), 0.3),
+        "Artist": rng.choice(artists, assets),
+        "Album": sometimes(np.array([f"Album {i % 500}" for i in range(assets)], dtype=object), 0.2),
+        "Label": rng.choice(labels[:-1], assets)
+    }
+
+
+def generate_block(rows, table, rng):
+    assets = len(table["Asset ID"])
+    # Zipf-like popularity: a few assets show up on most rows, most assets on a handful.
+    index = np.minimum(rng.zipf(1.3, rows) - 1, assets - 1)
+    index = np.where(rng.random(rows) < 0.5, index, rng.integers(0, assets, rows))
+
+    block = {col: values[index] for col, values in table.items()}
+    block["Adjustment Type"] = np.where(rng.random(rows) < 0.9, "", "Adjustment")
+    block["Country"] = rng.choice(np.array(COUNTRIES, dtype=object), rows)
+    block["Channel ID"] = rng.choice(CHANNELS, rows)
+    block["Content Type"] = rng.choice(np.array(["UGC", "Partner-uploaded", "Art Track"], dtype=object), rows)
+    block["Policy"] = rng.choice(np.array(["Monetize", "Track", "Monetize in all countries"], dtype=object), rows)
+    block["Claim Type"] = rng.choice(np.array(["Audio", "Visual", "Audiovisual"], dtype=object), rows)
+
+    for col in SUM_COLUMNS:
+        # Blank cells are common in the breakdown columns.
+        blank = rng.random(rows) < 0.15
+        if "Views" in col:
+            block[col] = pd.array(rng.geometric(0.002, rows), dtype="Int64")
+            block[col][blank] = pd.NA
+        else:
+            block[col] = np.where(blank, np.nan, rng.exponential(0.05, rows).round(6))
+
+    return pd.DataFrame(block, columns=TEXT_COLUMNS + SUM_COLUMNS)
+
+
+def write_report(output, rows, assets, seed=0, preamble=True):
+    """Write a synthetic report to the binary file object ``output``."""
+    rng = np.random.default_rng(seed)
+    table = asset_table(assets, rng)
+
+    if preamble:
+        output.write(b"Asset Summary,Report period 2026-09\n")
+
+    header = [raw_header(col, rng) for col in TEXT_COLUMNS + SUM_COLUMNS]
+    output.write((",".join(f'"{col}"' for col in header) + "\n").encode("utf-8"))
+
+    written = 0
+    while written < rows:
+        size = min(BLOCK_ROWS, rows - written)
+        block = generate_block(size, table, rng)
+        output.write(block.to_csv(index=False, header=False).encode("utf-8"))
+        written += size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--assets", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-preamble", action="store_true")
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    with open(args.output, "wb") as output:
+        write_report(output, args.rows, args.assets, args.seed, preamble=not args.no_preamble)
+    print(f"✅ Wrote {args.rows} rows for {args.assets} assets to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Benchmark the royalty compressor on a synthetic Asset Summary report.
+
+Times the parse, groupby and serialize stages separately (the groupby once per backend, with a
+byte-for-byte parity check against pandas), the logic of the Streamlit compressor app, and the
+full ``/royalty-compressor/compress`` handler against an in-memory S3 (moto), so it runs offline.
+Each stage records wall time and peak RSS. Results are written as JSON; pass ``--baseline`` with
+an earlier results file to fail on regressions.
+
+    python -m benchmarks.run --rows 1000000 --assets 50000
+    python -m benchmarks.run --input report.csv --baseline benchmarks/results/previous.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+import pandas as pd
+from benchmarks.report_generator import write_report
+from royalty_compressor import backends
+from royalty_compressor.aggregation import CHUNK_SIZE, compress_buffer, compress_chunks, csv_chunks
+from shared.s3_io import write_csv
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# A stage is reported as a regression when it is this much slower than the baseline.
+REGRESSION_TOLERANCE = 0.2
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # No procfs (macOS): fall back to the process high-water mark.
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class PeakRSS:
+    """Sample RSS on a background thread while the block runs and keep the highest value."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = 0
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.start = self.peak = current_rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+class CountingWriter(io.RawIOBase):
+    """Stands in for the S3 writer when only serialization cost is being measured."""
+
+    def __init__(self):
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+
+def measure(results, name, fn, repeat=1):
+    """Run ``fn`` ``repeat`` times and record the fastest run and the highest peak RSS."""
+    best = None
+    peak = growth = 0
+    value = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()), PeakRSS() as rss:
+            started = time.perf_counter()
+            value = fn()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        peak = max(peak, rss.peak)
+        growth = max(growth, rss.peak - rss.start)
+
+    results[name] = {
+        "seconds": round(best, 4),
+        "peak_rss_mb": round(peak / 2 ** 20, 1),
+        "rss_growth_mb": round(growth / 2 ** 20, 1)
+    }
+    print(f"⏱️  {name:<28} {best:8.3f}s  peak RSS {peak / 2 ** 20:8.1f} MB")
+    return value
+
+
+def to_csv_bytes(df):
+    output = io.BytesIO()
+    write_csv(df, output)
+    return output.getvalue()
+
+
+def parse_report(path, chunk_size):
+    columns, chunks = csv_chunks(io.FileIO(path), chunk_size)
+    return columns, list(chunks)
+
+
+def groupby(columns, chunks, backend):
+    backends.COMPRESS_BACKEND = backend
+    try:
+        # compress_chunks mutates the chunks it is given.
+        return compress_chunks(columns, (chunk.copy() for chunk in chunks))
+    finally:
+        backends.COMPRESS_BACKEND = "pandas"
+
+
+def streamlit_compress(path):
+    """What streamlit-apps/app_youtube_compressor.py does per upload: the whole file in memory."""
+    with open(path, "rb") as report:
+        df = compress_buffer(report.read())
+    output = CountingWriter()
+    write_csv(df, output)
+    return output.size
+
+
+def bench_handler(results, path, repeat):
+    """Drive the compress route end to end against moto's in-memory S3."""
+    from moto import mock_aws
+
+    with mock_aws():
+        import boto3
+        from royalty_compressor import handlers
+
+        handlers.s3 = boto3.client("s3", region_name="us-east-1")
+        handlers.s3.create_bucket(Bucket=handlers.BUCKET_NAME)
+        handlers.s3.upload_file(path, handlers.BUCKET_NAME, "uploads/benchmark.csv")
+
+        class Context:
+            aws_request_id = "benchmark"
+
+        def call(**options):
+            body = json.dumps({"s3_key": "uploads/benchmark.csv", **options})
+            response = handlers.compress_report({"body": body}, Context())
+            if response["statusCode"] != 200:
+                raise Exception(f"Handler failed: {response['body']}")
+            return json.loads(response["body"])
+
+        # The first run parses the CSV and caches a Parquet copy; later runs read that copy.
+        measure(results, "handler_csv", lambda: call(use_cache=False))
+        measure(results, "handler_parquet_copy", lambda: call(use_cache=False), repeat)
+        measure(results, "handler_gzip_output", lambda: call(use_cache=False, gzip=True), repeat)
+        with contextlib.redirect_stdout(io.StringIO()):
+            call()
+        measure(results, "handler_result_cache_hit", call, repeat)
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    regressions = []
+    for name, stage in results["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if not previous or not previous["seconds"]:
+            continue
+        ratio = stage["seconds"] / previous["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {previous['seconds']}s -> {stage['seconds']}s ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="Benchmark an existing report instead of generating one")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--assets", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--backends", default=",".join(backends.BACKENDS))
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is kept")
+    parser.add_argument("--skip-handler", action="store_true")
+    parser.add_argument("--skip-streamlit", action="store_true")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        path = args.input
+        if not path:
+            report = stack.enter_context(tempfile.NamedTemporaryFile(suffix=".csv"))
+            print(f"💡 Generating {args.rows} rows for {args.assets} assets")
+            write_report(report, args.rows, args.assets, args.seed)
+            report.flush()
+            path = report.name
+
+        stages = {}
+        columns, chunks = measure(stages, "parse", lambda: parse_report(path, args.chunk_size), args.repeat)
+
+        outputs = {}
+        for backend in args.backends.split(","):
+            try:
+                backends.get_backend(backend)
+            except ImportError as e:
+                print(f"⚠️ Skipping {backend} backend: {e}")
+                continue
+            df = measure(stages, f"groupby_{backend}", lambda: groupby(columns, chunks, backend), args.repeat)
+            outputs[backend] = to_csv_bytes(df)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = groupby(columns, chunks, "pandas")
+        del chunks
+        measure(stages, "serialize_csv", lambda: write_csv(df, CountingWriter()), args.repeat)
+
+        if not args.skip_streamlit:
+            measure(stages, "streamlit_app", lambda: streamlit_compress(path), args.repeat)
+
+        if not args.skip_handler:
+            bench_handler(stages, path, args.repeat)
+
+        parity = {backend: output == outputs["pandas"] for backend, output in outputs.items() if backend != "pandas"}
+        for backend, identical in parity.items():
+            print(f"{'✅' if identical else '❌'} {backend} output {'matches' if identical else 'differs from'} pandas")
+
+        results = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            },
+            "config": {
+                "input": args.input,
+                "rows": None if args.input else args.rows,
+                "assets": None if args.input else args.assets,
+                "seed": args.seed,
+                "input_bytes": os.path.getsize(path),
+                "output_rows": len(df),
+                "chunk_size": args.chunk_size
+            },
+            "stages": stages,
+            "parity": parity
+        }
+
+    output_path = args.output
+    if not output_path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json")
+    with open(output_path, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print("✅ Results written to", output_path)
+
+    failed = not all(parity.values())
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print("❌ Regression:", regression)
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,66 @@
 import json
-import boto3
+import math
 import os
 import base64
 from datetime import datetime
+from shared import aws
+from shared import storage
+from shared.s3_io import S3MultipartWriter, presigned_download_url
 
-S3_ENDPOINT = os.getenv("S3_ENDPOINT")
-if S3_ENDPOINT:
-    s3 = boto3.client("s3", endpoint_url=S3_ENDPOINT, region_name="us-east-1")
-else:
-    s3 = boto3.client("s3", region_name="us-east-1")
+# Base64 text decoded per write; a multiple of 4 so every slice decodes on its own.
+BASE64_SLICE = 1024 * 1024
+
+# Lambda takes at most 6 MB of request payload, which API Gateway's base64 encoding of binary bodies
+# inflates by a third. Larger files are turned away with a presigned URL to PUT them to instead.
+MAX_DIRECT_UPLOAD_BYTES = int(os.getenv("MAX_DIRECT_UPLOAD_BYTES", str(4 * 1024 * 1024)))
+
+s3 = aws.lazy(aws.client, "s3")
 
 BUCKET = os.getenv("UPLOAD_BUCKET", "mini-tools")
 
+UPLOAD_URL_EXPIRY = 600
+
+# URLs signed per batch request; signing is local CPU work, so this only bounds the response size.
+MAX_BATCH_KEYS = 1000
+
+# DeleteObjects takes at most 1000 keys per call.
+DELETE_BATCH_SIZE = 1000
+MAX_DELETE_KEYS = 10000
+
+# Multipart uploads: S3 wants parts of at least 5 MiB (bar the last) and at most 10,000 of them.
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+DEFAULT_PART_SIZE = int(os.getenv("MULTIPART_PART_SIZE", str(16 * 1024 * 1024)))
+# Part URLs are signed in batches as the upload goes, so each only has to outlive its own PUT.
+PART_URL_EXPIRY = 3600
+MAX_SIGNED_PARTS = 100
+
 def handle_file(event, context):
     method = event["httpMethod"]
     path = event["path"]
 
     if method == "POST" and path == "/file-manager/generate-upload-url":
         return generate_presigned_upload(event)
+    elif method == "POST" and path == "/file-manager/generate-upload-urls":
+        return generate_presigned_uploads(event)
+    elif method == "POST" and path == "/file-manager/download-urls":
+        return generate_presigned_urls(event)
+    elif method == "POST" and path == "/file-manager/delete-batch":
+        return delete_files(event)
+    elif method == "POST" and path == "/file-manager/multipart/create":
+        return create_multipart_upload(event)
+    elif method == "POST" and path == "/file-manager/multipart/sign-parts":
+        return sign_upload_parts(event)
+    elif method == "POST" and path == "/file-manager/multipart/list-parts":
+        return list_upload_parts(event)
+    elif method == "POST" and path == "/file-manager/multipart/complete":
+        return complete_multipart_upload(event)
+    elif method == "POST" and path == "/file-manager/multipart/abort":
+        return abort_multipart_upload(event)
     elif method == "POST" and path == "/file-manager/upload":
-        return upload_file(event, context)
+        if is_json_request(event):
+            return upload_file(event, context)
+        return upload_binary(event, context)
     elif method == "GET" and path.startswith("/file-manager/download-url/"):
         return generate_presigned_url(event)
     elif method == "DELETE" and path.startswith("/file-manager/delete/"):
@@ -30,41 +71,308 @@ def handle_file(event, context):
             "body": json.dumps({"error": "Invalid route"})
         }
 
-def generate_presigned_upload(event):
-    body = json.loads(event["body"])
-    file_name = body["file_name"]
-    folder = "uploads"
-    key = f"{folder}/{datetime.utcnow().isoformat()}_{file_name}"
+def upload_key(file_name, when):
+    return storage.upload_key(f"{when.isoformat()}_{file_name}", when)
 
-    url = s3.generate_presigned_url(
+def presigned_upload_url(key):
+    # Signing is local: the client only computes a signature, it never calls S3.
+    return s3.generate_presigned_url(
         "put_object",
         Params={"Bucket": BUCKET, "Key": key},
-        ExpiresIn=600,
+        ExpiresIn=UPLOAD_URL_EXPIRY,
     )
 
-    print("BUCKET:", BUCKET)
-    print("🧠 Upload key:", key)
-    print("✅ Upload URL:", url)
+def string_list(body, field):
+    """``body[field]`` if it is a non-empty list of non-empty strings, else None."""
+    values = body.get(field) if isinstance(body, dict) else None
+    if not isinstance(values, list) or not values:
+        return None
+    if not all(isinstance(value, str) and value for value in values):
+        return None
+    return values
+
+def generate_presigned_upload(event):
+    body = json.loads(event["body"])
+    key = upload_key(body["file_name"], datetime.utcnow())
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"upload_url": presigned_upload_url(key), "key": key})
+    }
+
+def generate_presigned_uploads(event):
+    """Upload URLs for many files in one call: ``{"file_names": [...]}``."""
+    body = json.loads(event.get("body") or "{}")
+    file_names = string_list(body, "file_names")
+    if file_names is None:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "file_names must be a non-empty list of names"})
+        }
+    if len(file_names) > MAX_BATCH_KEYS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"At most {MAX_BATCH_KEYS} files per request"})
+        }
+    if len(set(file_names)) != len(file_names):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Duplicate file names would share a key"})
+        }
+
+    now = datetime.utcnow()
+    uploads = []
+    for file_name in file_names:
+        key = upload_key(file_name, now)
+        uploads.append({"file_name": file_name, "key": key, "upload_url": presigned_upload_url(key)})
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"uploads": uploads})
+    }
+
+def part_size_for(size):
+    """Part size for a ``size``-byte file: the default, grown in whole MiB to stay within 10,000 parts."""
+    needed = math.ceil(size / MAX_PARTS / (1024 * 1024)) * 1024 * 1024
+    return max(DEFAULT_PART_SIZE, MIN_PART_SIZE, needed)
+
+def multipart_request(event):
+    """``(body, error_response)`` for a request that names an existing upload by key and upload_id."""
+    body = json.loads(event.get("body") or "{}")
+    if not isinstance(body.get("key"), str) or not isinstance(body.get("upload_id"), str):
+        return body, {
+            "statusCode": 400,
+            "body": json.dumps({"error": "key and upload_id are required"})
+        }
+    return body, None
+
+def no_such_upload(body):
+    return {
+        "statusCode": 404,
+        "body": json.dumps({"error": f"No multipart upload {body['upload_id']} for {body['key']}"})
+    }
+
+def create_multipart_upload(event):
+    """Start a multipart upload: ``{"file_name": ..., "size": bytes}``.
+
+    Returns the key and upload id along with the part size and count the client should cut the
+    file into. Parts are then PUT to URLs from ``sign-parts``, in any order and in parallel.
+    """
+    body = json.loads(event.get("body") or "{}")
+    file_name = body.get("file_name")
+    size = body.get("size")
+    if not isinstance(file_name, str) or not file_name:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "file_name is required"})
+        }
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "size must be a positive number of bytes"})
+        }
+
+    part_size = part_size_for(size)
+    key = upload_key(file_name, datetime.utcnow())
+    upload = s3.create_multipart_upload(Bucket=BUCKET, Key=key)
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "key": key,
+            "upload_id": upload["UploadId"],
+            "part_size": part_size,
+            "part_count": math.ceil(size / part_size)
+        })
+    }
+
+def sign_upload_parts(event):
+    """Presigned ``upload_part`` URLs: ``{"key", "upload_id", "part_numbers": [...]}``."""
+    body, error = multipart_request(event)
+    if error:
+        return error
+    part_numbers = body.get("part_numbers")
+    if (
+        not isinstance(part_numbers, list) or not part_numbers
+        or not all(
+            isinstance(number, int) and not isinstance(number, bool) and 1 <= number <= MAX_PARTS
+            for number in part_numbers
+        )
+    ):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"part_numbers must be a non-empty list of numbers from 1 to {MAX_PARTS}"})
+        }
+    if len(part_numbers) > MAX_SIGNED_PARTS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"At most {MAX_SIGNED_PARTS} parts per request"})
+        }
+
+    parts = []
+    for number in part_numbers:
+        url = s3.generate_presigned_url(
+            "upload_part",
+            Params={"Bucket": BUCKET, "Key": body["key"], "UploadId": body["upload_id"], "PartNumber": number},
+            ExpiresIn=PART_URL_EXPIRY,
+        )
+        parts.append({"part_number": number, "upload_url": url})
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"parts": parts})
+    }
+
+def uploaded_parts(key, upload_id):
+    """Every part S3 already holds for an upload, following list_parts pagination."""
+    parts = []
+    request = {"Bucket": BUCKET, "Key": key, "UploadId": upload_id}
+    while True:
+        response = s3.list_parts(**request)
+        parts += [
+            {"part_number": part["PartNumber"], "etag": part["ETag"], "size": part["Size"]}
+            for part in response.get("Parts", [])
+        ]
+        if not response.get("IsTruncated"):
+            return parts
+        request["PartNumberMarker"] = response["NextPartNumberMarker"]
+
+def list_upload_parts(event):
+    """Parts already uploaded, so an interrupted upload can resume with only the missing ones."""
+    body, error = multipart_request(event)
+    if error:
+        return error
+    try:
+        parts = uploaded_parts(body["key"], body["upload_id"])
+    except s3.exceptions.NoSuchUpload:
+        return no_such_upload(body)
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"parts": parts})
+    }
+
+def complete_multipart_upload(event):
+    """Assemble the object: ``{"key", "upload_id", "parts": [{"part_number", "etag"}, ...]}``."""
+    body, error = multipart_request(event)
+    if error:
+        return error
+    parts = body.get("parts")
+    if not isinstance(parts, list) or not parts or not all(
+        isinstance(part, dict) and isinstance(part.get("etag"), str)
+        and isinstance(part.get("part_number"), int) and not isinstance(part["part_number"], bool)
+        for part in parts
+    ):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "parts must list the part_number and etag of every part"})
+        }
+
+    try:
+        s3.complete_multipart_upload(
+            Bucket=BUCKET,
+            Key=body["key"],
+            UploadId=body["upload_id"],
+            MultipartUpload={"Parts": [
+                {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                for part in sorted(parts, key=lambda part: part["part_number"])
+            ]}
+        )
+    except s3.exceptions.NoSuchUpload:
+        return no_such_upload(body)
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"key": body["key"]})
+    }
+
+def abort_multipart_upload(event):
+    """Discard an upload and the parts stored for it."""
+    body, error = multipart_request(event)
+    if error:
+        return error
+    try:
+        s3.abort_multipart_upload(Bucket=BUCKET, Key=body["key"], UploadId=body["upload_id"])
+    except s3.exceptions.NoSuchUpload:
+        return no_such_upload(body)
 
     return {
         "statusCode": 200,
-        "body": json.dumps({"upload_url": url, "key": key})
+        "body": json.dumps({"aborted": body["key"]})
     }
 
+def is_json_request(event):
+    headers = {name.lower(): value for name, value in (event.get("headers") or {}).items()}
+    content_type = headers.get("content-type") or "application/json"
+    return not event.get("isBase64Encoded") and content_type.split(";")[0].strip() == "application/json"
+
+def decoded_size(text):
+    """Size of the bytes base64 ``text`` decodes to, without decoding it."""
+    return len(text) // 4 * 3 - len(text[-2:]) + len(text[-2:].rstrip("="))
+
+def too_large(file_name, size):
+    """413 carrying a presigned URL, so the caller can PUT the file to S3 directly instead."""
+    key = upload_key(file_name, datetime.utcnow())
+    return {
+        "statusCode": 413,
+        "body": json.dumps({
+            "error": f"Files over {MAX_DIRECT_UPLOAD_BYTES} bytes must be uploaded to the presigned URL",
+            "size": size,
+            "key": key,
+            "upload_url": presigned_upload_url(key)
+        })
+    }
+
+def write_base64(file_base64, key):
+    # Decode and upload slice by slice instead of materializing the whole decoded file.
+    with S3MultipartWriter(s3, BUCKET, key) as writer:
+        for start in range(0, len(file_base64), BASE64_SLICE):
+            writer.write(base64.b64decode(file_base64[start:start + BASE64_SLICE]))
+
 def upload_file(event, context):
+    """Legacy upload of a JSON body carrying ``file_base64``. New clients send the bytes as the body."""
     body = json.loads(event["body"])
-    file_content = base64.b64decode(body["file_base64"])
+    file_base64 = body["file_base64"]
     file_name = body.get("file_name", f"uploaded_{context.aws_request_id}.csv")
-    prefix = "uploads"
-    key = f"{prefix}/{file_name}"
+    if decoded_size(file_base64) > MAX_DIRECT_UPLOAD_BYTES:
+        return too_large(file_name, decoded_size(file_base64))
 
-    s3.put_object(Bucket=BUCKET, Key=key, Body=file_content)
+    key = storage.upload_key(file_name)
+    write_base64(file_base64, key)
 
     return {
         "statusCode": 200,
         "body": json.dumps({"key": key})
     }
 
+def upload_binary(event, context):
+    """Upload the raw request body, named by the ``file_name`` query parameter.
+
+    Binary media types reach the function base64-encoded (``isBase64Encoded``); the encoded text is
+    decoded a slice at a time straight into the S3 upload, so the decoded file is never held whole.
+    """
+    params = event.get("queryStringParameters") or {}
+    file_name = params.get("file_name") or f"uploaded_{context.aws_request_id}.csv"
+    body = event.get("body") or ""
+    if not event.get("isBase64Encoded"):
+        # A text media type API Gateway passed through as is.
+        body = body.encode()
+    size = decoded_size(body) if event.get("isBase64Encoded") else len(body)
+    if size > MAX_DIRECT_UPLOAD_BYTES:
+        return too_large(file_name, size)
+
+    key = storage.upload_key(file_name)
+    if event.get("isBase64Encoded"):
+        write_base64(body, key)
+    else:
+        with S3MultipartWriter(s3, BUCKET, key) as writer:
+            writer.write(body)
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"key": key, "size": size})
+    }
+
 def generate_presigned_url(event):
     try:
         key = event["pathParameters"]["key"]
@@ -74,14 +382,31 @@ def generate_presigned_url(event):
             "body": json.dumps({"error": "Missing key parameter"})
         }
 
-    url = s3.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": BUCKET, "Key": key},
-        ExpiresIn=3600
-    )
     return {
         "statusCode": 200,
-        "body": json.dumps({"download_url": url})
+        "body": json.dumps({"download_url": presigned_download_url(s3, BUCKET, key)})
+    }
+
+def generate_presigned_urls(event):
+    """Download URLs for many keys in one call: ``{"keys": [...]}``."""
+    body = json.loads(event.get("body") or "{}")
+    keys = string_list(body, "keys")
+    if keys is None:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "keys must be a non-empty list of keys"})
+        }
+    if len(keys) > MAX_BATCH_KEYS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"At most {MAX_BATCH_KEYS} keys per request"})
+        }
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "download_urls": [{"key": key, "download_url": presigned_download_url(s3, BUCKET, key)} for key in keys]
+        })
     }
 
 def delete_file(event):
@@ -91,3 +416,40 @@ def delete_file(event):
         "statusCode": 200,
         "body": json.dumps({"deleted": key})
     }
+
+def delete_keys(keys):
+    """Delete ``keys`` with ``delete_objects``, 1000 per call. Returns ``(deleted, errors)``."""
+    deleted = []
+    errors = []
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        response = s3.delete_objects(Bucket=BUCKET, Delete={
+            "Objects": [{"Key": key} for key in keys[start:start + DELETE_BATCH_SIZE]],
+            "Quiet": False
+        })
+        deleted += [item["Key"] for item in response.get("Deleted", [])]
+        errors += [
+            {"key": item["Key"], "code": item.get("Code"), "message": item.get("Message")}
+            for item in response.get("Errors", [])
+        ]
+    return deleted, errors
+
+def delete_files(event):
+    """Delete many keys in one call: ``{"keys": [...]}``, with a result for every key."""
+    body = json.loads(event.get("body") or "{}")
+    keys = string_list(body, "keys")
+    if keys is None:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "keys must be a non-empty list of keys"})
+        }
+    if len(keys) > MAX_DELETE_KEYS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"At most {MAX_DELETE_KEYS} keys per request"})
+        }
+
+    deleted, errors = delete_keys(list(dict.fromkeys(keys)))
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"deleted": deleted, "errors": errors})
+    }
@@ -0,0 +1,183 @@
+"""Scheduled clean-up of uploads and generated reports that no session can still use.
+
+Every session records its own ``created_at`` and ``expires_at``, and a file can only belong to a
+session that existed when the file was written. So the oldest file anyone can still use was
+written no earlier than the ``created_at`` of the oldest session that has not expired yet.
+Everything before that is expired: a ``<prefix><D>/`` partition goes as a whole once that moment
+falls after day D, with ``delete_objects`` a listing page (1000 keys) at a time. Keys from before the date-partitioned layout are judged by their own LastModified, and
+multipart uploads abandoned before the cut-off are aborted. Result cache manifests go once they
+are past their own ``RESULT_CACHE_TTL_SECONDS``; by then the reports they point at may be gone.
+
+Runs daily from an EventBridge schedule. To see what it would delete, against LocalStack say:
+
+    S3_ENDPOINT=http://localhost:4566 python -m file_manager.janitor --dry-run
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from file_manager.handlers import BUCKET, delete_keys, s3
+from royalty_compressor.result_cache import RESULT_CACHE_PREFIX, RESULT_CACHE_TTL_SECONDS
+from shared import aws, metrics, storage
+from shared.storage import REPORTS_PREFIX, UPLOADS_PREFIX
+
+# Extra time files are kept past the last session that could use them, for clock skew and slow jobs.
+GRACE_SECONDS = int(os.getenv("JANITOR_GRACE_SECONDS", str(24 * 60 * 60)))
+
+PARTITIONED_PREFIXES = [UPLOADS_PREFIX, REPORTS_PREFIX, f"parquet/{UPLOADS_PREFIX}"]
+
+sessions_table = aws.lazy(aws.table, os.getenv("SESSION_TABLE_NAME", "Sessions"))
+
+
+def live_sessions(now):
+    """``created_at`` of every session whose ``expires_at`` (plus the grace period) is still ahead of ``now``."""
+    request = {
+        "ProjectionExpression": "#metadata.created_at",
+        "FilterExpression": "#metadata.expires_at > :expired",
+        "ExpressionAttributeNames": {"#metadata": "metadata"},
+        "ExpressionAttributeValues": {":expired": int(now.timestamp()) - GRACE_SECONDS}
+    }
+    while True:
+        response = sessions_table.scan(**request)
+        for item in response.get("Items", []):
+            created_at = item.get("metadata", {}).get("created_at")
+            if created_at is not None:
+                yield int(created_at)
+        if "LastEvaluatedKey" not in response:
+            return
+        request["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def cutoff(now=None):
+    """Files written before this moment are past every session that could use them.
+
+    That is the creation of the oldest session still alive, less the grace period, or just
+    ``now`` less the grace period when no session is. Partitions are whole days, so a partition
+    is expired when the day after it starts before the cut-off, i.e. when its date is earlier than
+    the cut-off's.
+    """
+    now = now or datetime.now(timezone.utc)
+    oldest = min(live_sessions(now), default=None)
+    if oldest is not None:
+        now = min(now, datetime.fromtimestamp(oldest, timezone.utc))
+    return now - timedelta(seconds=GRACE_SECONDS)
+
+
+def list_pages(**request):
+    """``list_objects_v2`` responses for ``request``, following continuation tokens."""
+    while True:
+        response = s3.list_objects_v2(Bucket=BUCKET, **request)
+        yield response
+        if not response.get("IsTruncated"):
+            return
+        request["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def expired_batches(prefix, before):
+    """Yield ``(label, objects)`` batches of at most 1000 expired objects under ``prefix``."""
+    cutoff_day = storage.partition(before)
+    for page in list_pages(Prefix=prefix, Delimiter="/"):
+        # Keys written before partitioning sit directly under the prefix.
+        legacy = [item for item in page.get("Contents", []) if item["LastModified"] < before]
+        if legacy:
+            yield None, legacy
+
+        for common_prefix in page.get("CommonPrefixes", []):
+            day = storage.partition_day(common_prefix["Prefix"], prefix)
+            if day is None or day >= cutoff_day:
+                continue
+            for partition_page in list_pages(Prefix=common_prefix["Prefix"]):
+                if partition_page.get("Contents"):
+                    yield day, partition_page["Contents"]
+
+
+def aged_batches(prefix, before):
+    """Yield batches of at most 1000 objects under ``prefix`` last modified before ``before``."""
+    for page in list_pages(Prefix=prefix):
+        objects = [item for item in page.get("Contents", []) if item["LastModified"] < before]
+        if objects:
+            yield objects
+
+
+def abandoned_uploads(prefix, before):
+    request = {"Bucket": BUCKET, "Prefix": prefix}
+    while True:
+        response = s3.list_multipart_uploads(**request)
+        for upload in response.get("Uploads", []):
+            if upload["Initiated"] < before:
+                yield upload
+        if not response.get("IsTruncated"):
+            return
+        request["KeyMarker"] = response["NextKeyMarker"]
+        request["UploadIdMarker"] = response["NextUploadIdMarker"]
+
+
+def _delete_batch(report, objects, dry_run):
+    report["objects"] += len(objects)
+    report["bytes"] += sum(item["Size"] for item in objects)
+    if not dry_run:
+        deleted, errors = delete_keys([item["Key"] for item in objects])
+        report["deleted"] += len(deleted)
+        report["errors"] += errors
+
+
+def clean_prefix(prefix, before, dry_run):
+    report = {"partitions": [], "legacy_objects": 0, "objects": 0, "bytes": 0, "deleted": 0, "errors": []}
+    for day, objects in expired_batches(prefix, before):
+        if day is None:
+            report["legacy_objects"] += len(objects)
+        elif day not in report["partitions"]:
+            report["partitions"].append(day)
+        _delete_batch(report, objects, dry_run)
+
+    report["abandoned_uploads"] = 0
+    for upload in abandoned_uploads(prefix, before):
+        report["abandoned_uploads"] += 1
+        if not dry_run:
+            s3.abort_multipart_upload(Bucket=BUCKET, Key=upload["Key"], UploadId=upload["UploadId"])
+    return report
+
+
+def clean_manifests(now, dry_run):
+    """Delete result cache manifests past their TTL. Their LastModified is their created_at."""
+    report = {"objects": 0, "bytes": 0, "deleted": 0, "errors": []}
+    for objects in aged_batches(RESULT_CACHE_PREFIX, now - timedelta(seconds=RESULT_CACHE_TTL_SECONDS)):
+        _delete_batch(report, objects, dry_run)
+    return report
+
+
+def run_janitor(dry_run=False, now=None):
+    """Delete (or with ``dry_run``, only report) everything past its retention. Returns the report."""
+    now = now or datetime.now(timezone.utc)
+    before = cutoff(now)
+    report = {
+        "bucket": BUCKET,
+        "dry_run": dry_run,
+        "cutoff": before.isoformat(),
+        "prefixes": {}
+    }
+    for prefix in PARTITIONED_PREFIXES + [RESULT_CACHE_PREFIX]:
+        with metrics.stage("janitor"):
+            if prefix == RESULT_CACHE_PREFIX:
+                prefix_report = clean_manifests(now, dry_run)
+            else:
+                prefix_report = clean_prefix(prefix, before, dry_run)
+        report["prefixes"][prefix] = prefix_report
+        metrics.count("JanitorExpiredObjects", prefix_report["objects"])
+        metrics.count("JanitorDeletedObjects", prefix_report["deleted"])
+        metrics.count("JanitorDeleteErrors", len(prefix_report["errors"]))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting it")
+    parser.add_argument("--now", help="Pretend it is this ISO date/time (UTC), to preview a future run")
+    args = parser.parse_args()
+
+    now = datetime.fromisoformat(args.now).replace(tzinfo=timezone.utc) if args.now else None
+    print(json.dumps(run_janitor(dry_run=args.dry_run, now=now), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""MuMa ingest rows to MRI Song Delivery rows.
+
+A MuMa export is wide: one row per song with numbered ``Composer {i}``, ``Publisher {i}``,
+``Client {i}``, ``Territory {i}`` and ``Recording {i}`` column groups. MRI wants one row per slot.
+Each output column is built for every (song, slot) pair at once as a 2-D array and flattened
+song by song, so the cost is a handful of array operations per column rather than Python work
+per row.
+"""
+import numpy as np
+import pandas as pd
+
+SLOT_KEY = "Recording {i} Display Artist"
+
+# Output column -> where its value comes from: None (always blank), the name of a song-level
+# column, or a ``(guard, source)`` pair of slot templates. A slot's value is only taken from
+# ``source`` when the export has the ``guard`` column for that slot; otherwise it is blank.
+MRI_COLUMNS = {
+    "SONG TITLE*": "Song Title",
+    "AKA TITLE": None,
+    "MRI SONG ID": None,
+    "PUBLISHER'S SONG ID": None,
+    "ISWC": None,
+    "COMPOSER LAST NAME*": ("Composer {i} Surname", "Composer {i} Surname"),
+    "COMPOSER FIRST NAME*": ("Composer {i} Surname", "Composer {i} First Name"),
+    "COMPOSER MIDDLE NAME": ("Composer {i} Surname", "Composer {i} Middle Name"),
+    "COMPOSER PRO": None,
+    "COMPOSER IPI NUMBER": None,
+    "CONTROLLED COMPOSER (Y/N)*": ("Composer {i} Surname", "Composer {i} Controlled"),
+    "COMPOSER SHARE %*": ("Composer {i} Surname", "Composer {i} Share"),
+    "COMPOSER ROLE CODE": ("Composer {i} Surname", "Composer {i} Capacity"),
+    "PUBLISHER NAME *": ("Publisher {i} Name", "Publisher {i} Name"),
+    "PUBLISHER PRO*": None,
+    "PUBLISHER IPI NUMBER *": None,
+    "CONTROLLED PUBLISHER (Y/N)*": ("Publisher {i} Name", "Publisher {i} Controlled"),
+    "ADMINISTRATOR NAME": ("Client {i} Name", "Client {i} Name"),
+    "SHARE %*": ("Client {i} Name", "Publisher {i} Share"),
+    "TERRITORY CONTROLLED*": ("Client {i} Name", "Territory {i} Name"),
+    "TERRITORY EXCLUSIONS (OPTIONAL)": None,
+    "PUBLISHER MAILING ADDRESS*": None,
+    "PUBLISHER CONTACT*": None,
+    "RECORDING ARTIST NAME": ("Recording {i} Display Artist", "Recording {i} Display Artist"),
+    "RECORDING LABEL": ("Recording {i} Display Artist", "Recording {i} Label Name"),
+    "RECORDING ISRC": ("Recording {i} Display Artist", "Recording {i} ISRC"),
+    "UPC/EAN": ("Recording {i} Display Artist", "Recording {i} UPC"),
+}
+
+
+def read_muma(source):
+    """Read a MuMa export with every value as text and blanks as empty strings."""
+    return pd.read_csv(source, dtype=str).fillna("")
+
+
+def slot_count(columns):
+    """Number of consecutive ``Recording {i} Display Artist`` columns, starting at 1."""
+    columns = set(columns)
+    count = 0
+    while SLOT_KEY.format(i=count + 1) in columns:
+        count += 1
+    return count
+
+
+def convert(df):
+    """Convert a MuMa export (as read by ``read_muma``) to an MRI Song Delivery frame.
+
+    A song gets one row per recording slot, in slot order, up to its first slot without a
+    display artist. Column groups missing from the export come out blank.
+    """
+    slots = range(1, slot_count(df.columns) + 1)
+    blank = np.full(len(df), "", dtype=object)
+
+    def grid(guard, source):
+        # (songs, slots) array of the source column for each slot; blank where the guard is missing.
+        values = [
+            df[source.format(i=i)].to_numpy(dtype=object) if guard.format(i=i) in df.columns else blank
+            for i in slots
+        ]
+        return np.column_stack(values) if values else np.empty((len(df), 0), dtype=object)
+
+    # A slot is used while every slot up to and including it has a display artist.
+    used = np.logical_and.accumulate(grid(SLOT_KEY, SLOT_KEY) != "", axis=1).ravel()
+    song_rows = np.repeat(np.arange(len(df)), len(slots))[used]
+
+    columns = {}
+    for name, source in MRI_COLUMNS.items():
+        if source is None:
+            columns[name] = np.full(len(song_rows), "", dtype=object)
+        elif isinstance(source, str):
+            columns[name] = df[source].to_numpy(dtype=object)[song_rows]
+        else:
+            columns[name] = grid(*source).ravel()[used]
+    return pd.DataFrame(columns)
@@ -0,0 +1,72 @@
+import json
+import os
+import traceback
+from mri_converter.conversion import convert, read_muma
+from shared import aws, metrics, storage
+from shared.s3_io import S3MultipartWriter, open_s3_stream, presigned_download_url, write_csv
+
+s3 = aws.lazy(aws.client, "s3")
+
+BUCKET_NAME = os.getenv("UPLOAD_BUCKET", "mini-tools")
+
+def handle_mri(event, context):
+    method = event["httpMethod"]
+    path = event["path"]
+
+    try:
+        if method == "POST" and path == "/mri-converter/convert":
+            return convert_report(event, context)
+        else:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Invalid route"})
+            }
+    except Exception as e:
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
+
+def convert_report(event, context):
+    """Convert the MuMa export at ``s3_key`` into ``processed_reports/`` in MRI Song Delivery format."""
+    try:
+        body = json.loads(event["body"])
+        s3_key = body.get("s3_key")
+        if not s3_key:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Missing s3_key"})
+            }
+
+        with metrics.stage("parse"):
+            df = read_muma(open_s3_stream(s3, BUCKET_NAME, s3_key))
+        with metrics.stage("convert"):
+            mri = convert(df)
+
+        output_key = storage.report_key(f"mri_report_{context.aws_request_id}.csv")
+        with S3MultipartWriter(s3, BUCKET_NAME, output_key, content_type="text/csv") as output:
+            write_csv(mri, output)
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "input_key": s3_key,
+                "output_key": output_key,
+                "download_url": presigned_download_url(s3, BUCKET_NAME, output_key),
+                "songs": len(df),
+                "rows": len(mri)
+            })
+        }
+
+    except s3.exceptions.NoSuchKey:
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"error": "File not found"})
+        }
+    except Exception as e:
+        print("❌ Exception occurred:", str(e))
+        traceback.print_exc()
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
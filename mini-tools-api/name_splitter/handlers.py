@@ -0,0 +1,87 @@
+import json
+import os
+import traceback
+import pandas as pd
+from name_splitter.splitting import split_composer_names
+from shared import aws, metrics, storage
+from shared.s3_io import (
+    S3MultipartWriter,
+    download_to_tempfile,
+    open_s3_stream,
+    presigned_download_url,
+    write_xlsx
+)
+
+s3 = aws.lazy(aws.client, "s3")
+
+BUCKET_NAME = os.getenv("UPLOAD_BUCKET", "mini-tools")
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def handle_name_split(event, context):
+    method = event["httpMethod"]
+    path = event["path"]
+
+    try:
+        if method == "POST" and path == "/name-splitter/split":
+            return split_file(event, context)
+        else:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Invalid route"})
+            }
+    except Exception as e:
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
+
+def read_writers(s3_key):
+    # Workbooks are zip files read from the end, so they are spooled to disk; CSV is streamed.
+    if s3_key.lower().endswith(".xlsx"):
+        with download_to_tempfile(s3, BUCKET_NAME, s3_key) as local_copy:
+            return pd.read_excel(local_copy, engine="openpyxl")
+    return pd.read_csv(open_s3_stream(s3, BUCKET_NAME, s3_key))
+
+def split_file(event, context):
+    """Split the ``Composer x Name`` columns of the CSV or workbook at ``s3_key`` into a new workbook."""
+    try:
+        body = json.loads(event["body"])
+        s3_key = body.get("s3_key")
+        if not s3_key:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Missing s3_key"})
+            }
+
+        with metrics.stage("parse"):
+            df = read_writers(s3_key)
+        with metrics.stage("split"):
+            processed = split_composer_names(df)
+
+        output_key = storage.report_key(f"processed_composers_{context.aws_request_id}.xlsx")
+        with S3MultipartWriter(s3, BUCKET_NAME, output_key, content_type=XLSX_CONTENT_TYPE) as output:
+            write_xlsx(processed, output)
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "input_key": s3_key,
+                "output_key": output_key,
+                "download_url": presigned_download_url(s3, BUCKET_NAME, output_key),
+                "rows": len(processed)
+            })
+        }
+
+    except s3.exceptions.NoSuchKey:
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"error": "File not found"})
+        }
+    except Exception as e:
+        print("❌ Exception occurred:", str(e))
+        traceback.print_exc()
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
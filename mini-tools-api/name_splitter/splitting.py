@@ -0,0 +1,53 @@
+"""Split ``Composer x Name`` columns into first name, middle name and surname.
+
+Every name column is split with one ``str.split`` over the whole column, and the output frame
+is assembled in a single ``concat`` rather than an ``insert`` per new column.
+"""
+import pandas as pd
+
+
+def is_name_column(col):
+    return "Composer" in col and "Name" in col
+
+
+def split_names(names):
+    """Split a column of names into ``(first, middle, surname)`` columns.
+
+    Blank names give three empty strings. One word is the first name, kept exactly as written.
+    Two words are a first name and a surname. With more, the first two are the first and middle
+    names and the rest, joined by single spaces, is the surname.
+    """
+    present = names.notna()
+    text = names.where(present, "").astype(str)
+    blank = ~present | (text.str.strip() == "")
+
+    # At most three pieces: the third keeps the rest of the name with its original spacing.
+    parts = text.str.split(n=2, expand=True).reindex(columns=range(3))
+    words = parts.notna().sum(axis=1)
+
+    first = parts[0].where(words != 1, text)
+    middle = parts[1].where(words > 2, "")
+    surname = parts[1].where(words == 2, "")
+    rest = parts[2].dropna()
+    if len(rest):
+        surname.loc[rest.index] = rest.str.split().str.join(" ")
+
+    return [column.where(~blank, "").astype(str) for column in (first, middle, surname)]
+
+
+def split_composer_names(df):
+    """``df`` with each ``Composer x Name`` column replaced, in place, by its three parts."""
+    columns = []
+    for col in df.columns:
+        if not is_name_column(col):
+            columns.append(df[col])
+            continue
+        composer_number = col.split()[1]
+        names = [f"Composer {composer_number} First Name",
+                 f"Composer {composer_number} Middle Name",
+                 f"Composer {composer_number} Surname"]
+        columns += [part.rename(name) for part, name in zip(split_names(df[col]), names)]
+
+    if not columns:
+        return df.copy()
+    return pd.concat(columns, axis=1)
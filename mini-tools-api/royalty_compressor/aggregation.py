@@ -0,0 +1,217 @@
+import csv
+import io
+import os
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from royalty_compressor.backends import get_backend
+from shared import metrics
+from shared.s3_io import READ_BUFFER_SIZE
+from royalty_compressor.schema import ASSET_SUMMARY
+
+# Rows parsed per chunk. Peak memory is roughly one chunk plus two rows per distinct asset
+# (the accumulator and the partials waiting to be merged into it).
+CHUNK_SIZE = int(os.getenv("COMPRESS_CHUNK_SIZE", "250000"))
+
+# Revenue sums are rounded to this many decimals. Float addition is not associative, so without it
+# the last digit of a sum depends on how the rows were split into chunks (0.48720700000000006 vs
+# 0.487207). Reports carry far fewer decimals than this, so rounding never changes a real value.
+REVENUE_DECIMALS = 10
+
+
+class SchemaMismatch(Exception):
+    """A value in the report did not fit the typed schema; the report must be re-read leniently."""
+
+
+def _dedupe(columns):
+    seen = {}
+    deduped = []
+    for col in columns:
+        if col in seen:
+            seen[col] += 1
+            deduped.append(f"{col}.{seen[col]}")
+        else:
+            seen[col] = 0
+            deduped.append(col)
+    return deduped
+
+
+def open_report(raw, report_format=ASSET_SUMMARY):
+    """Wrap a raw report stream in a buffered text stream and consume the preamble and header lines.
+
+    Returns the text stream positioned at the first data row and the (normalized) column names.
+    """
+    stream = io.TextIOWrapper(
+        io.BufferedReader(raw, buffer_size=READ_BUFFER_SIZE),
+        encoding="utf-8",
+        newline=""
+    )
+
+    header_line = stream.readline()
+    if report_format.is_preamble(header_line):
+        header_line = stream.readline()
+
+    header = next(csv.reader([header_line]), [])
+    columns = _dedupe([report_format.header(col) for col in header])
+
+    return stream, columns
+
+
+def iter_chunks(stream, columns, chunk_size=CHUNK_SIZE, usecols=None, typed=True, report_format=ASSET_SUMMARY):
+    reader = pd.read_csv(
+        stream,
+        header=None,
+        names=columns,
+        usecols=usecols,
+        dtype=report_format.csv_dtypes(columns, typed),
+        chunksize=chunk_size
+    )
+    if not typed:
+        return reader
+    return _typed_chunks(reader)
+
+
+def _typed_chunks(reader):
+    while True:
+        try:
+            chunk = next(reader)
+        except StopIteration:
+            return
+        except ValueError as e:
+            raise SchemaMismatch(str(e)) from e
+        yield chunk
+
+
+def csv_chunks(raw, chunk_size=CHUNK_SIZE, usecols=None, typed=True, report_format=ASSET_SUMMARY):
+    """Open a CSV report as ``(columns, chunks)``.
+
+    Headers are normalized before parsing so the dtype map and ``usecols`` can be expressed in
+    normalized names. Only ``usecols`` (in file order) are materialized when given.
+    """
+    stream, columns = open_report(raw, report_format)
+    if usecols is not None:
+        usecols = [col for col in columns if col in usecols]
+    chunks = iter_chunks(stream, columns, chunk_size, usecols, typed, report_format)
+    return usecols or columns, chunks
+
+
+def prepare_chunk(chunk, sum_cols, report_format=ASSET_SUMMARY):
+    for col, fill_value in report_format.fill_values.items():
+        if col not in chunk.columns:
+            continue
+        values = chunk[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            if fill_value not in values.cat.categories:
+                values = values.cat.add_categories(fill_value)
+            chunk[col] = values.fillna(fill_value)
+        else:
+            chunk[col] = values.fillna(fill_value).astype(str)
+
+    for col in sum_cols:
+        values = chunk[col]
+        if not is_numeric_dtype(values.dtype):
+            values = pd.to_numeric(values, errors="coerce")
+        chunk[col] = values.fillna(0).astype("int64" if col in report_format.integer_sum_columns else "float64")
+
+    return chunk
+
+
+def aggregate_chunk(chunk, sum_cols, first_cols, report_format=ASSET_SUMMARY):
+    # The groupby runs on the backend picked by COMPRESS_BACKEND; every backend returns plain
+    # (non-categorical) values in first-seen order so partials from any of them merge the same way.
+    return get_backend().aggregate(chunk, sum_cols, first_cols, report_format)
+
+
+def merge_partials(partials, sum_cols, first_cols, report_format=ASSET_SUMMARY):
+    # Sums of partial sums stay sums, and "first" over partials taken in file order
+    # is still the first non-null value seen for the asset.
+    merged = pd.concat(partials, ignore_index=True)
+    return get_backend().aggregate(merged, sum_cols, first_cols, report_format)
+
+
+def finalize(df, sum_cols, first_cols, report_format=ASSET_SUMMARY):
+    df = df.sort_values(report_format.group_column, kind="stable", ignore_index=True)
+    revenue_cols = [col for col in sum_cols if col not in report_format.integer_sum_columns]
+    if revenue_cols:
+        df[revenue_cols] = df[revenue_cols].round(REVENUE_DECIMALS)
+    return df[report_format.output_columns(sum_cols, first_cols)]
+
+
+def compress_chunks(columns, chunks, on_chunk=None, report_format=ASSET_SUMMARY, query=None):
+    """Aggregate an iterable of report chunks into one row per group (asset).
+
+    Keeps a running per-asset accumulator so memory is bounded by the number of
+    distinct assets rather than by the size of the report. Per-chunk partials are merged
+    into it only once they add up to as many rows as it has, so each merge costs about as
+    much as the partials it absorbs instead of the whole accumulator. With a ``query`` each chunk
+    is cut down to its rows and columns first. ``on_chunk`` sees every prepared chunk
+    before it is aggregated.
+    """
+    columns = _dedupe([report_format.header(col) for col in columns])
+    read_columns = columns
+    if query is not None:
+        columns = query.resolve(read_columns)
+    sum_cols, first_cols = report_format.split_columns(columns)
+
+    accumulator = None
+    pending = []
+    pending_rows = 0
+    rows = 0
+    for chunk in metrics.timed_iter(chunks, "parse"):
+        chunk.columns = read_columns
+        if query is not None:
+            with metrics.stage("filter"):
+                chunk = query.filter_chunk(chunk, columns)
+        with metrics.stage("aggregate"):
+            chunk = prepare_chunk(chunk, sum_cols, report_format)
+        rows += len(chunk)
+        if on_chunk:
+            on_chunk(chunk)
+        with metrics.stage("aggregate"):
+            partial = aggregate_chunk(chunk, sum_cols, first_cols, report_format)
+            if accumulator is None:
+                accumulator = partial
+                continue
+            pending.append(partial)
+            pending_rows += len(partial)
+            if pending_rows >= len(accumulator):
+                accumulator = merge_partials([accumulator] + pending, sum_cols, first_cols, report_format)
+                pending = []
+                pending_rows = 0
+
+    if pending:
+        with metrics.stage("aggregate"):
+            accumulator = merge_partials([accumulator] + pending, sum_cols, first_cols, report_format)
+    if accumulator is None:
+        accumulator = prepare_chunk(pd.DataFrame(columns=columns), sum_cols, report_format)
+
+    print(f"✅ Aggregated {rows} rows into {len(accumulator)} assets")
+
+    with metrics.stage("aggregate"):
+        return finalize(accumulator, sum_cols, first_cols, report_format)
+
+
+def merge_frames(frames, report_format=ASSET_SUMMARY):
+    """Roll several compressed reports up into one row per asset across all of them."""
+    columns = []
+    for frame in frames:
+        columns += [col for col in frame.columns if col not in columns]
+    sum_cols, first_cols = report_format.split_columns(columns)
+
+    merged = prepare_chunk(pd.concat(frames, ignore_index=True), sum_cols, report_format)
+    merged = merge_partials([merged], sum_cols, first_cols, report_format)
+    return finalize(merged, sum_cols, first_cols, report_format)
+
+
+def compress_stream(raw, chunk_size=CHUNK_SIZE, on_chunk=None, typed=False, report_format=ASSET_SUMMARY, query=None):
+    # Lenient by default: a one-shot stream cannot be re-read if the typed parse fails.
+    usecols = query.read_columns() if query is not None else None
+    columns, chunks = csv_chunks(raw, chunk_size, usecols=usecols, typed=typed, report_format=report_format)
+    return compress_chunks(columns, chunks, on_chunk, report_format, query)
+
+
+def compress_buffer(data, report_format=ASSET_SUMMARY, chunk_size=CHUNK_SIZE):
+    """Compress a report held in memory (``bytes``), typed first and leniently if that fails."""
+    try:
+        return compress_stream(io.BytesIO(data), chunk_size, typed=True, report_format=report_format)
+    except SchemaMismatch:
+        return compress_stream(io.BytesIO(data), chunk_size, typed=False, report_format=report_format)
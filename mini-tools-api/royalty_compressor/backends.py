@@ -0,0 +1,121 @@
+import os
+import pandas as pd
+from royalty_compressor.schema import ASSET_SUMMARY
+
+# Which engine runs the per-asset groupby: "pandas", "polars" or "duckdb".
+COMPRESS_BACKEND = os.getenv("COMPRESS_BACKEND", "pandas").lower()
+
+
+def _plain_text(df, first_cols):
+    # Categories differ from chunk to chunk, so the running accumulator keeps plain values.
+    for col in first_cols:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+class PandasBackend:
+    """Reference implementation: ``groupby(...).agg`` with "sum" and "first"."""
+
+    name = "pandas"
+
+    def aggregate(self, df, sum_cols, first_cols, report_format=ASSET_SUMMARY):
+        agg_dict = {col: "first" for col in first_cols}
+        agg_dict.update({col: "sum" for col in sum_cols})
+        partial = df.groupby(report_format.group_column, as_index=False, sort=False, observed=True).agg(agg_dict)
+        return _plain_text(partial, first_cols)
+
+
+class PolarsBackend:
+    """Multi-threaded groupby in Polars.
+
+    ``first`` skips nulls like pandas does, and Polars sums each group sequentially with the
+    same compensated summation, so results match the pandas backend exactly.
+    """
+
+    name = "polars"
+
+    def __init__(self):
+        import polars
+        self.pl = polars
+
+    def aggregate(self, df, sum_cols, first_cols, report_format=ASSET_SUMMARY):
+        pl = self.pl
+        group_column = report_format.group_column
+        frame = pl.from_pandas(_plain_text(df[[group_column] + first_cols + sum_cols].copy(), first_cols))
+        partial = (
+            frame
+            .filter(pl.col(group_column).is_not_null())
+            .group_by(group_column, maintain_order=True)
+            .agg(
+                [pl.col(col).drop_nulls().first() for col in first_cols] +
+                [pl.col(col).sum() for col in sum_cols]
+            )
+        )
+        return partial.to_pandas()
+
+
+class DuckDBBackend:
+    """Parallel hash aggregation in DuckDB.
+
+    Row order is made explicit so "first" is deterministic under parallel execution, and revenue
+    is summed with ``fsum`` (compensated) so it matches pandas instead of drifting in the last digit.
+    """
+
+    name = "duckdb"
+
+    def __init__(self):
+        import duckdb
+        self.connection = duckdb.connect()
+        self.connection.execute(f"SET threads TO {os.cpu_count() or 1}")
+
+    def aggregate(self, df, sum_cols, first_cols, report_format=ASSET_SUMMARY):
+        group_column = report_format.group_column
+        frame = _plain_text(df[[group_column] + first_cols + sum_cols].copy(), first_cols)
+        frame["__row"] = range(len(frame))
+
+        def quote(col):
+            return '"' + col.replace('"', '""') + '"'
+
+        selects = [quote(group_column)]
+        selects += [
+            f"arg_min({quote(col)}, __row) FILTER (WHERE {quote(col)} IS NOT NULL) AS {quote(col)}"
+            for col in first_cols
+        ]
+        selects += [
+            f"CAST(sum({quote(col)}) AS BIGINT) AS {quote(col)}" if col in report_format.integer_sum_columns
+            else f"fsum({quote(col)}) AS {quote(col)}"
+            for col in sum_cols
+        ]
+
+        self.connection.register("chunk", frame)
+        try:
+            partial = self.connection.execute(
+                f"SELECT {', '.join(selects)} FROM chunk "
+                f"WHERE {quote(group_column)} IS NOT NULL "
+                f"GROUP BY {quote(group_column)} ORDER BY min(__row)"
+            ).df()
+        finally:
+            self.connection.unregister("chunk")
+        return partial
+
+
+BACKENDS = {
+    "pandas": PandasBackend,
+    "polars": PolarsBackend,
+    "duckdb": DuckDBBackend
+}
+
+_instances = {}
+
+# Engines hold thread pools and connections that do not survive a fork; a forked process builds its own.
+os.register_at_fork(after_in_child=_instances.clear)
+
+
+def get_backend(name=None):
+    name = (name or COMPRESS_BACKEND).lower()
+    if name not in BACKENDS:
+        raise Exception(f"Unknown COMPRESS_BACKEND '{name}', expected one of {', '.join(BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import traceback
+from multiprocessing.connection import wait
+from royalty_compressor import backends
+from royalty_compressor.aggregation import merge_frames
+from royalty_compressor.query import QueryError
+
+# Lambda gives one vCPU per 1769 MB of memory; cpu_count() reflects what the function really has.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0")) or os.cpu_count() or 1
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "50"))
+
+# Workers are forked from a fork server, not from the handler's process. By the time a batch
+# runs, the handler may have used Polars, whose thread pool does not survive a fork: a worker
+# forked from it waits on threads that no longer exist. The server only imports the compressor,
+# so every worker starts clean, and it is started once per container.
+_context = multiprocessing.get_context("forkserver")
+_context.set_forkserver_preload(["royalty_compressor.handlers"])
+
+
+def _compress_in_child(conn, s3_key, output_id, body, return_frame, backend):
+    # Imported here because handlers imports this module for the routes.
+    from royalty_compressor import handlers
+    backends.COMPRESS_BACKEND = backend
+
+    def progress(rows_processed, bytes_read):
+        conn.send({"progress": (rows_processed, bytes_read)})
+
+    try:
+        outcome = handlers.run_compression(s3_key, output_id, body, progress=progress, return_frame=return_frame)
+        if return_frame:
+            result, df = outcome
+        else:
+            result, df = outcome, None
+        conn.send({"result": result, "frame": df})
+    except QueryError as e:
+        conn.send({"result": {"input_key": s3_key, "error": str(e)}, "frame": None, "query_error": True})
+    except Exception as e:
+        traceback.print_exc()
+        conn.send({"result": {"input_key": s3_key, "error": str(e)}, "frame": None})
+    finally:
+        conn.close()
+
+
+def compress_in_parallel(s3_keys, request_id, body, merge=False, workers=BATCH_WORKERS, progress=None):
+    """Compress every key in its own process, at most ``workers`` at a time.
+
+    Lambda has no /dev/shm, so multiprocessing.Pool and ProcessPoolExecutor are unavailable
+    there. This drives plain Processes over Pipes instead. Returns the per-file results in input
+    order and, with ``merge``, the aggregated frames needed for the rollup. Raises QueryError if
+    the request's query does not fit one of the reports. ``progress`` is called as
+    ``progress(rows_processed, bytes_read)`` with the totals across all files as workers report.
+    """
+    results = [None] * len(s3_keys)
+    frames = [None] * len(s3_keys)
+    queue = list(enumerate(s3_keys))
+    running = {}
+    query_errors = []
+    file_progress = {}
+
+    while queue or running:
+        while queue and len(running) < workers:
+            index, s3_key = queue.pop(0)
+            parent_conn, child_conn = _context.Pipe(duplex=False)
+            process = _context.Process(
+                target=_compress_in_child,
+                args=(child_conn, s3_key, f"{request_id}_{index}", body, merge, backends.COMPRESS_BACKEND)
+            )
+            process.start()
+            child_conn.close()
+            running[parent_conn] = (index, s3_key, process)
+
+        for conn in wait(list(running)):
+            index, s3_key, process = running[conn]
+            try:
+                message = conn.recv()
+            except EOFError:
+                message = {"result": {"input_key": s3_key, "error": "Worker exited unexpectedly"}, "frame": None}
+
+            if "progress" in message:
+                file_progress[index] = message["progress"]
+                if progress:
+                    progress(
+                        sum(rows for rows, _ in file_progress.values()),
+                        sum(read for _, read in file_progress.values())
+                    )
+                continue
+
+            del running[conn]
+            conn.close()
+            process.join()
+            results[index] = message["result"]
+            frames[index] = message["frame"]
+            if message.get("query_error"):
+                query_errors.append(f"{s3_key}: {message['result']['error']}")
+
+    if query_errors:
+        raise QueryError("; ".join(query_errors))
+    return results, frames
+
+
+def rollup(frames, report_format):
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        raise Exception("No report could be compressed")
+    return merge_frames(frames, report_format)
@@ -0,0 +1,190 @@
+import os
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from royalty_compressor.schema import ASSET_SUMMARY
+from shared import metrics
+from shared.s3_io import S3MultipartWriter, StreamingBodyReader, download_to_tempfile
+
+PARQUET_PREFIX = "parquet/"
+
+# Cache a typed Parquet copy of every CSV the first time it is parsed.
+PARQUET_CACHE_ENABLED = os.getenv("PARQUET_CACHE_ENABLED", "true").lower() == "true"
+
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+
+SOURCE_ETAG_METADATA = "source-etag"
+REPORT_FORMAT_METADATA = "report-format"
+
+
+def detect_format(s3_key):
+    extension = s3_key.rsplit(".", 1)[-1].lower() if "." in s3_key else ""
+    if extension == "parquet":
+        return "parquet"
+    if extension in ("arrow", "feather"):
+        return "arrow"
+    if extension == "arrows":
+        return "arrow_stream"
+    return "csv"
+
+
+def cache_key_for(s3_key):
+    return f"{PARQUET_PREFIX}{s3_key}.parquet"
+
+
+def report_schema(columns, report_format=ASSET_SUMMARY):
+    fields = []
+    for col in columns:
+        if col in report_format.integer_sum_columns:
+            fields.append(pa.field(col, pa.int64()))
+        elif col in report_format.sum_columns:
+            fields.append(pa.field(col, pa.float64()))
+        elif col in report_format.categorical_columns:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def _project(names, usecols, report_format):
+    """The ``names`` whose normalized form is in ``usecols`` (all of them when it is None), in file order."""
+    if usecols is None:
+        return list(names)
+    return [name for name in names if report_format.header(name) in usecols]
+
+
+def _batches_to_chunks(batches, columns=None, keep_alive=None):
+    # keep_alive holds on to the temp file backing the batches until iteration ends.
+    for batch in batches:
+        if columns is not None and columns != batch.schema.names:
+            batch = batch.select(columns)
+        yield batch.to_pandas()
+
+
+def parquet_chunks(source, chunk_size, usecols=None, report_format=ASSET_SUMMARY, keep_alive=None):
+    parquet_file = pq.ParquetFile(source)
+    columns = _project(parquet_file.schema_arrow.names, usecols, report_format)
+    # Parquet is stored by column, so unprojected columns are never read off disk.
+    batches = parquet_file.iter_batches(batch_size=chunk_size, columns=columns)
+    return columns, _batches_to_chunks(batches, keep_alive=keep_alive)
+
+
+def arrow_chunks(source, usecols=None, report_format=ASSET_SUMMARY, keep_alive=None):
+    reader = ipc.open_file(source)
+    columns = _project(reader.schema.names, usecols, report_format)
+    batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    return columns, _batches_to_chunks(batches, columns, keep_alive)
+
+
+def arrow_stream_chunks(raw, usecols=None, report_format=ASSET_SUMMARY):
+    # The IPC stream format is read sequentially, so it can come straight off the S3 body.
+    reader = ipc.open_stream(pa.PythonFile(raw, mode="r"))
+    columns = _project(reader.schema.names, usecols, report_format)
+    return columns, _batches_to_chunks(reader, columns)
+
+
+def columnar_chunks(s3, bucket, key, source_format, chunk_size, usecols=None, report_format=ASSET_SUMMARY):
+    """Open a columnar S3 object as ``(columns, chunks, bytes_read)``.
+
+    With ``usecols`` (normalized names) only those columns are converted to pandas.
+    """
+    if source_format == "arrow_stream":
+        s3_object = s3.get_object(Bucket=bucket, Key=key)
+        reader = StreamingBodyReader(s3_object["Body"])
+        columns, chunks = arrow_stream_chunks(reader, usecols, report_format)
+        return columns, chunks, lambda: reader.bytes_read
+
+    # Parquet and Arrow files keep their footer at the end and need random access,
+    # so they are spooled to local disk rather than held in memory.
+    local_copy = download_to_tempfile(s3, bucket, key)
+    size = os.fstat(local_copy.fileno()).st_size
+    if source_format == "parquet":
+        columns, chunks = parquet_chunks(local_copy.name, chunk_size, usecols, report_format, keep_alive=local_copy)
+    else:
+        columns, chunks = arrow_chunks(local_copy.name, usecols, report_format, keep_alive=local_copy)
+    return columns, chunks, lambda: size
+
+
+def find_cached_copy(s3, bucket, s3_key, source_etag, report_format=ASSET_SUMMARY):
+    """Return the Parquet cache key for ``s3_key`` if it was built from the current upload in ``report_format``."""
+    try:
+        cached = s3.head_object(Bucket=bucket, Key=cache_key_for(s3_key))
+    except s3.exceptions.ClientError:
+        return None
+
+    metadata = cached.get("Metadata", {})
+    if metadata.get(SOURCE_ETAG_METADATA) != source_etag:
+        return None
+    # Copies written before formats were recorded are all Asset Summaries.
+    if metadata.get(REPORT_FORMAT_METADATA, ASSET_SUMMARY.name) != report_format.name:
+        return None
+    return cache_key_for(s3_key)
+
+
+class ParquetCacheWriter:
+    """Streams prepared CSV chunks into a typed Parquet copy of the upload on S3."""
+
+    def __init__(self, s3, bucket, s3_key, source_etag, report_format=ASSET_SUMMARY):
+        self.key = cache_key_for(s3_key)
+        self.report_format = report_format
+        self._sink = S3MultipartWriter(
+            s3,
+            bucket,
+            self.key,
+            content_type="application/vnd.apache.parquet",
+            metadata={SOURCE_ETAG_METADATA: source_etag, REPORT_FORMAT_METADATA: report_format.name}
+        )
+        self._writer = None
+        self._failed = False
+
+    def __call__(self, chunk):
+        # A failed cache upload only costs the next run a CSV parse, so it never fails the request:
+        # the first error gives up on the copy and later chunks are skipped.
+        if self._failed:
+            return
+        try:
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(
+                    self._sink,
+                    report_schema(list(chunk.columns), self.report_format),
+                    compression=PARQUET_COMPRESSION
+                )
+            self._writer.write_table(pa.Table.from_pandas(chunk, schema=self._writer.schema, preserve_index=False))
+        except Exception as e:
+            self._give_up(e)
+
+    def close(self):
+        if self._failed:
+            return None
+        try:
+            if self._writer is None:
+                self._sink.abort()
+                return None
+            self._writer.close()
+            self._sink.close()
+            return self.key
+        except Exception as e:
+            self._give_up(e)
+            return None
+
+    def _give_up(self, error):
+        print("❌ Could not cache Parquet copy:", str(error))
+        self._failed = True
+        try:
+            # Close the Parquet writer first, or it writes its footer into the aborted sink when collected.
+            if self._writer is not None:
+                self._writer.close()
+        except Exception:
+            pass
+        try:
+            self._sink.abort()
+        except Exception as e:
+            print("❌ Could not abort Parquet copy upload:", str(e))
+
+    def abort(self):
+        self._sink.abort()
+
+
+def write_parquet(df, writer):
+    with metrics.stage("serialize"):
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), writer, compression=PARQUET_COMPRESSION)
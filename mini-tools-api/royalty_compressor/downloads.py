@@ -0,0 +1,18 @@
+import os
+from royalty_compressor.result_cache import OUTPUT_URL_FIELDS
+from shared import aws, s3_io
+
+BUCKET_NAME = os.getenv("UPLOAD_BUCKET", "mini-tools")
+
+s3 = aws.lazy(aws.client, "s3")
+
+
+def presigned_download_url(key):
+    return s3_io.presigned_download_url(s3, BUCKET_NAME, key)
+
+
+def with_download_urls(result):
+    for key_field, url_field in OUTPUT_URL_FIELDS.items():
+        if key_field in result:
+            result[url_field] = presigned_download_url(result[key_field])
+    return result
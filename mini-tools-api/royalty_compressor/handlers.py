@@ -1,17 +1,31 @@
+import gzip
 import json
-import pandas as pd
-import boto3
 import os
-from io import StringIO
-import traceback    
+import traceback
+from royalty_compressor.aggregation import (
+    CHUNK_SIZE,
+    SchemaMismatch,
+    compress_chunks,
+    compress_stream,
+    csv_chunks
+)
+from royalty_compressor.columnar import (
+    PARQUET_CACHE_ENABLED,
+    ParquetCacheWriter,
+    columnar_chunks,
+    detect_format,
+    find_cached_copy,
+    write_parquet
+)
+from royalty_compressor import batch, jobs, result_cache
+from royalty_compressor.downloads import with_download_urls
+from royalty_compressor.result_cache import RESULT_CACHE_ENABLED
+from royalty_compressor.query import QueryError, ReportQuery
+from royalty_compressor.schema import get_report_format
+from shared import aws, metrics, storage
+from shared.s3_io import S3MultipartWriter, StreamingBodyReader, write_csv
 
-# s3 = boto3.client(
-#     "s3",
-#     endpoint_url=os.getenv("S3_ENDPOINT", "http://host.docker.internal:4566"),
-#     region_name="us-east-1"
-# )
-
-s3 = boto3.client("s3", region_name="us-east-1")
+s3 = aws.lazy(aws.client, "s3")
 
 BUCKET_NAME = os.getenv("UPLOAD_BUCKET", "mini-tools")
 
@@ -22,6 +36,12 @@ def handle_compression(event, context):
     try:
         if method == "POST" and path == "/royalty-compressor/compress":
             return compress_report(event, context)
+        elif method == "POST" and path == "/royalty-compressor/compress-batch":
+            return compress_batch(event, context)
+        elif method == "POST" and path == "/royalty-compressor/jobs":
+            return create_compression_job(event, context)
+        elif method == "GET" and path.startswith("/royalty-compressor/jobs/"):
+            return jobs.get_compression_job(event)
         else:
             return {
                 "statusCode": 400,
@@ -33,9 +53,172 @@ def handle_compression(event, context):
             "body": json.dumps({"error": str(e)})
         }
 
+def open_report_chunks(s3_key, source_etag, chunk_size, report_format, typed=True, query=None):
+    """Pick the cheapest way to read ``s3_key``: a cached Parquet copy, a columnar upload, or the CSV itself.
+
+    Returns the report columns, an iterator of chunks, a callable reporting how many bytes have
+    been read from S3 so far and, when the whole CSV is parsed for the first time, a writer that
+    caches a typed Parquet copy of it. Only the columns ``query`` needs are read.
+    """
+    source_format = detect_format(s3_key)
+    usecols = query.read_columns() if query is not None else None
+
+    if source_format != "csv":
+        print(f"✅ Reading {source_format} input")
+        columns, chunks, bytes_read = columnar_chunks(
+            s3, BUCKET_NAME, s3_key, source_format, chunk_size, usecols, report_format
+        )
+        return columns, chunks, bytes_read, None
+
+    if PARQUET_CACHE_ENABLED:
+        cached_key = find_cached_copy(s3, BUCKET_NAME, s3_key, source_etag, report_format)
+        if cached_key:
+            print("✅ Reading cached Parquet copy:", cached_key)
+            columns, chunks, bytes_read = columnar_chunks(
+                s3, BUCKET_NAME, cached_key, "parquet", chunk_size, usecols, report_format
+            )
+            return columns, chunks, bytes_read, None
+
+    s3_object = s3.get_object(Bucket=BUCKET_NAME, Key=s3_key, IfMatch=source_etag)
+    print("✅ S3 stream opened")
+
+    reader = StreamingBodyReader(s3_object["Body"])
+    columns, chunks = csv_chunks(reader, chunk_size, usecols=usecols, typed=typed, report_format=report_format)
+    cache_writer = None
+    # A query sees only part of the report, which must not be cached as the whole of it.
+    if PARQUET_CACHE_ENABLED and query is None:
+        cache_writer = ParquetCacheWriter(s3, BUCKET_NAME, s3_key, source_etag, report_format)
+    return columns, chunks, lambda: reader.bytes_read, cache_writer
+
+def output_options(body):
+    # Everything in the request that changes the bytes of the output; part of the result cache key.
+    report_format = get_report_format(body.get("report_format"))
+    options = {
+        "gzip": bool(body.get("gzip")),
+        "parquet_output": bool(body.get("parquet_output")),
+        "report_format": report_format.name
+    }
+    query = ReportQuery.from_body(body, report_format)
+    if query.active:
+        options["query"] = query.spec()
+    return options
+
+def invalid_request(body):
+    """A 400 response for options that can be rejected before any work starts, else None."""
+    try:
+        ReportQuery.from_body(body, get_report_format(body.get("report_format")))
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": str(e)})
+        }
+    return None
+
+def write_outputs(df, output_name, options):
+    """Upload ``df`` as ``processed_reports/<day>/<output_name>`` in the requested formats."""
+    compress = "gzip" if options["gzip"] else None
+    extension = "csv.gz" if compress else "csv"
+    output_key = storage.report_key(f"{output_name}.{extension}")
+    with S3MultipartWriter(
+        s3,
+        BUCKET_NAME,
+        output_key,
+        content_type="application/gzip" if compress else "text/csv",
+        compress=compress
+    ) as output:
+        write_csv(df, output)
+
+    result = {"output_key": output_key}
+
+    if options["parquet_output"]:
+        parquet_key = storage.report_key(f"{output_name}.parquet")
+        with S3MultipartWriter(s3, BUCKET_NAME, parquet_key, content_type="application/vnd.apache.parquet") as output:
+            write_parquet(df, output)
+        result["parquet_output_key"] = parquet_key
+
+    return result
+
+def load_result_frame(result, report_format):
+    # Compressed output is already one row per asset, so re-aggregating it returns it unchanged.
+    s3_object = s3.get_object(Bucket=BUCKET_NAME, Key=result["output_key"])
+    raw = StreamingBodyReader(s3_object["Body"])
+    if result["output_key"].endswith(".gz"):
+        raw = gzip.GzipFile(fileobj=raw)
+    return compress_stream(raw, report_format=report_format)
+
+def compress_source(s3_key, source_etag, chunk_size, report_format, progress=None, typed=True, query=None):
+    columns, chunks, bytes_read, cache_writer = open_report_chunks(
+        s3_key, source_etag, chunk_size, report_format, typed, query
+    )
+    rows_processed = 0
+
+    def on_chunk(chunk):
+        nonlocal rows_processed
+        rows_processed += len(chunk)
+        if cache_writer:
+            with metrics.stage("serialize"):
+                cache_writer(chunk)
+        if progress:
+            progress(rows_processed, bytes_read())
+
+    try:
+        df = compress_chunks(columns, chunks, on_chunk=on_chunk, report_format=report_format, query=query)
+    except Exception:
+        if cache_writer:
+            cache_writer.abort()
+        raise
+
+    print("✅ File compressed")
+
+    if cache_writer:
+        print("✅ Parquet copy cached:", cache_writer.close())
+
+    return df
+
+def run_compression(s3_key, output_id, body, progress=None, return_frame=False):
+    """Compress ``s3_key`` into ``processed_reports/`` and return the response payload.
+
+    An identical earlier upload compressed with the same options is answered from the result cache.
+    ``progress`` is called as ``progress(rows_processed, bytes_read)`` after every chunk. With
+    ``return_frame`` the aggregated DataFrame is returned alongside the payload.
+    """
+    options = output_options(body)
+    report_format = get_report_format(options["report_format"])
+    query = ReportQuery.from_body(body, report_format)
+    query = query if query.active else None
+    source_etag = s3.head_object(Bucket=BUCKET_NAME, Key=s3_key)["ETag"]
+
+    use_cache = RESULT_CACHE_ENABLED and body.get("use_cache", True)
+    digest = result_cache.cache_digest(source_etag, options)
+    if use_cache:
+        cached = result_cache.lookup(s3, BUCKET_NAME, digest)
+        if cached:
+            print("✅ Returning cached result:", cached["output_key"])
+            result = with_download_urls(dict(cached, input_key=s3_key, cached=True))
+            if return_frame:
+                return result, load_result_frame(cached, report_format)
+            return result
+
+    chunk_size = int(body.get("chunk_size") or CHUNK_SIZE)
+    try:
+        df = compress_source(s3_key, source_etag, chunk_size, report_format, progress, query=query)
+    except SchemaMismatch as e:
+        print("⚠️ Report does not fit the typed schema, re-reading leniently:", str(e))
+        df = compress_source(s3_key, source_etag, chunk_size, report_format, progress, typed=False, query=query)
+
+    result = write_outputs(df, f"royalty_report_{output_id}", options)
+    result["input_key"] = s3_key
+
+    if use_cache:
+        result_cache.store(s3, BUCKET_NAME, digest, result)
+
+    result = with_download_urls(result)
+    if return_frame:
+        return result, df
+    return result
+
 def compress_report(event, context):
     print("💡 Lambda started")
-    print("Event body:", event.get("body")) 
     try:
         body = json.loads(event["body"])
         if "s3_key" not in body:
@@ -43,92 +226,81 @@ def compress_report(event, context):
                 "statusCode": 400,
                 "body": json.dumps({"error": "Missing s3_key"})
             }
+        # Only the key: the rest of the body can carry user filters and is not worth the log volume.
+        print("💡 Compressing:", body["s3_key"])
+        invalid = invalid_request(body)
+        if invalid:
+            return invalid
 
-        s3_key = body["s3_key"]
-        s3_object = s3.get_object(Bucket=BUCKET_NAME, Key=s3_key)
-        csv_data = StringIO(s3_object["Body"].read().decode("utf-8"))
-
-        print("✅ S3 file fetched")
-
-        first_line = csv_data.readline()
-        csv_data.seek(0)
-        skiprows = 1 if first_line.strip().startswith("Asset Summary") else 0
-        df = pd.read_csv(csv_data, skiprows=skiprows, low_memory=False)
-
-        print("✅ CSV loaded into Pandas")
-
-        if "Adjustment Type" in df.columns:
-            df["Adjustment Type"] = df["Adjustment Type"].fillna("None").astype(str)
-
-        df.columns = df.columns.str.strip().str.replace("\u00A0", " ").str.replace(r"\s+", " ", regex=True)
-
-        sum_columns = [
-            "Owned Views",
-            "Monetized Views : Audio",
-            "Monetized Views : Audio Visual",
-            "Monetized Views",
-            "YouTube Revenue Split",
-            "YouTube Revenue Split : Auction",
-            "YouTube Revenue Split : Reserved",
-            "YouTube Revenue Split : Partner Sold YouTube Served",
-            "YouTube Revenue Split : Partner Sold Partner Served",
-            "Partner Revenue",
-            "Partner Revenue : Auction",
-            "Partner Revenue : Reserved",
-            "Partner Revenue : Partner Sold YouTube Served",
-            "Partner Revenue : Partner Sold Partner Served",
-            "Partner Revenue : Pro Rata : Audio",
-            "Partner Revenue : Pro Rata : Audio Visual",
-            "Partner Revenue : Pro Rata",
-            "Partner Revenue : Per Sub Min"
-        ]
-
-        existing_sum_cols = [col for col in sum_columns if col in df.columns]
-        if not existing_sum_cols:
-            raise Exception("No expected revenue columns found in CSV")
-
-        print("✅ Found these columns for sum:", existing_sum_cols)
-
-        df[existing_sum_cols] = df[existing_sum_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
-        non_sum_cols = [col for col in df.columns if col not in existing_sum_cols + ["Asset ID"]]
-
-        agg_dict = {col: "first" for col in non_sum_cols}
-        agg_dict.update({col: "sum" for col in existing_sum_cols})
-
-        df = df.groupby("Asset ID", as_index=False).agg(agg_dict)
-
-        ordered_cols = (
-            ["Asset ID"] +
-            [col for col in df.columns if col in non_sum_cols] +
-            [col for col in df.columns if col in existing_sum_cols]
-        )
+        result = run_compression(body["s3_key"], context.aws_request_id, body)
 
-        df = df[ordered_cols]
+        print("✅ Upload complete, returning URL")
 
-        print("✅ File compressed")
+        return {
+            "statusCode": 200,
+            "body": json.dumps(result)
+        }
 
-        output = StringIO()
-        df.to_csv(output, index=False)
-        output.seek(0)
+    except QueryError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": str(e)})
+        }
 
-        output_key = f"processed_reports/royalty_report_{context.aws_request_id}.csv"
-        s3.put_object(Bucket=BUCKET_NAME, Key=output_key, Body=output.getvalue(), ContentType="text/csv")
+    except Exception as e:
+        print("❌ Exception occurred:", str(e))
+        traceback.print_exc()
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
 
-        presigned_url = s3.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": BUCKET_NAME, "Key": output_key},
-            ExpiresIn=3600,
-        ).replace("host.docker.internal", "localhost")
+def run_batch(s3_keys, request_id, body, progress=None):
+    """Compress ``s3_keys`` in parallel and, with ``merge``, roll them up into one asset-level file.
 
-        print("✅ Upload complete, returning URL")
+    ``progress`` gets the rows and bytes read so far, summed over all files.
+    """
+    merge = bool(body.get("merge"))
+    results, frames = batch.compress_in_parallel(s3_keys, request_id, body, merge=merge, progress=progress)
+    print(f"✅ Batch compressed: {len(s3_keys)} files")
+
+    response = {"results": results}
+    if merge:
+        options = output_options(body)
+        rollup = batch.rollup(frames, get_report_format(options["report_format"]))
+        combined = write_outputs(rollup, f"royalty_rollup_{request_id}", options)
+        combined["input_keys"] = [result["input_key"] for result in results if "error" not in result]
+        response["combined"] = with_download_urls(combined)
+        print("✅ Rollup written:", combined["output_key"])
+    return response
+
+def compress_batch(event, context):
+    try:
+        body = json.loads(event["body"])
+        s3_keys = body.get("s3_keys")
+        if not s3_keys or not isinstance(s3_keys, list):
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Missing s3_keys"})
+            }
+        if len(s3_keys) > batch.MAX_BATCH_SIZE:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": f"At most {batch.MAX_BATCH_SIZE} files per batch"})
+            }
+        invalid = invalid_request(body)
+        if invalid:
+            return invalid
 
         return {
             "statusCode": 200,
-            "body": json.dumps({
-                "download_url": presigned_url,
-                "output_key": output_key,
-                "input_key": s3_key
-            })
+            "body": json.dumps(run_batch(s3_keys, context.aws_request_id, body))
+        }
+
+    except QueryError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": str(e)})
         }
 
     except Exception as e:
@@ -138,3 +310,22 @@ def compress_report(event, context):
             "statusCode": 500,
             "body": json.dumps({"error": str(e)})
         }
+
+def create_compression_job(event, context):
+    body = json.loads(event["body"])
+    if "s3_key" not in body and not body.get("s3_keys"):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Missing s3_key"})
+        }
+    invalid = invalid_request(body)
+    if invalid:
+        return invalid
+
+    job_id = jobs.create_job(body)
+    jobs.dispatch_job(job_id, context)
+
+    return {
+        "statusCode": 202,
+        "body": json.dumps({"job_id": job_id, "state": jobs.get_job(job_id)["state"]})
+    }
@@ -0,0 +1,180 @@
+import json
+import os
+import time
+import traceback
+import uuid
+from royalty_compressor.downloads import with_download_urls
+from shared import aws
+from shared.dynamodb import convert_decimals
+from shared.invocations import JOB_EVENT_KEY
+
+# Jobs live in the sessions table under their own key prefix, next to the sessions themselves.
+JOB_KEY_PREFIX = "job#"
+JOB_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# "lambda" hands the job to an asynchronous invocation of this same function. "inline" runs it
+# inside the request, which is what `sam local start-api` against LocalStack needs.
+JOB_DISPATCH = os.getenv("JOB_DISPATCH", "lambda" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "inline")
+
+# Minimum seconds between progress writes, so big reports don't turn into a write per chunk.
+PROGRESS_INTERVAL_SECONDS = float(os.getenv("JOB_PROGRESS_INTERVAL_SECONDS", "5"))
+
+table = aws.lazy(aws.table, os.getenv("SESSION_TABLE_NAME", "Sessions"))
+
+lambda_client = aws.lazy(aws.client, "lambda")
+
+
+def job_key(job_id):
+    return {"sessionId": f"{JOB_KEY_PREFIX}{job_id}"}
+
+
+def create_job(request):
+    job_id = str(uuid.uuid4())
+    now = int(time.time())
+    table.put_item(Item={
+        **job_key(job_id),
+        "job_id": job_id,
+        "state": "queued",
+        "request": json.dumps(request),
+        "rows_processed": 0,
+        "bytes_read": 0,
+        "created_at": now,
+        "updated_at": now,
+        "expires_at": now + JOB_TTL_SECONDS
+    })
+    return job_id
+
+
+def get_job(job_id):
+    response = table.get_item(Key=job_key(job_id))
+    if "Item" not in response:
+        return None
+    job = convert_decimals(response["Item"])
+    job.pop("sessionId", None)
+    job.pop("request", None)
+    return job
+
+
+def dispatch_job(job_id, context):
+    if JOB_DISPATCH == "lambda":
+        lambda_client.invoke(
+            FunctionName=context.invoked_function_arn,
+            InvocationType="Event",
+            Payload=json.dumps({JOB_EVENT_KEY: {"job_id": job_id}}).encode("utf-8")
+        )
+    else:
+        run_job(job_id, context)
+
+
+def _update(job_id, **fields):
+    names = {f"#{name}": name for name in fields}
+    values = {f":{name}": value for name, value in fields.items()}
+    table.update_item(
+        Key=job_key(job_id),
+        UpdateExpression="SET " + ", ".join(f"#{name} = :{name}" for name in fields),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values
+    )
+
+
+def progress_reporter(job_id):
+    last_write = 0
+
+    def report(rows_processed, bytes_read):
+        nonlocal last_write
+        now = time.time()
+        if now - last_write < PROGRESS_INTERVAL_SECONDS:
+            return
+        last_write = now
+        _update(job_id, rows_processed=rows_processed, bytes_read=bytes_read, updated_at=int(now))
+
+    return report
+
+
+def strip_download_urls(result):
+    if isinstance(result, list):
+        return [strip_download_urls(item) for item in result]
+    if isinstance(result, dict):
+        return {k: strip_download_urls(v) for k, v in result.items() if not k.endswith("download_url")}
+    return result
+
+
+def run_job(job_id, context):
+    # Imported here because handlers imports this module for the routes.
+    from royalty_compressor.handlers import run_batch, run_compression
+    from royalty_compressor.query import QueryError
+
+    response = table.get_item(Key=job_key(job_id))
+    if "Item" not in response:
+        print("❌ Unknown job:", job_id)
+        return
+
+    request = json.loads(response["Item"]["request"])
+    _update(job_id, state="running", started_at=int(time.time()), updated_at=int(time.time()))
+    print("💡 Job started:", job_id)
+
+    rows_processed = 0
+    bytes_read = 0
+    report = progress_reporter(job_id)
+
+    def track(rows, read):
+        nonlocal rows_processed, bytes_read
+        rows_processed, bytes_read = rows, read
+        report(rows, read)
+
+    try:
+        if request.get("s3_keys"):
+            result = run_batch(request["s3_keys"], job_id, request, progress=track)
+        else:
+            result = run_compression(request["s3_key"], job_id, request, progress=track)
+    except QueryError as e:
+        # The request was at fault, as a synchronous compress would have answered with a 400.
+        _update(job_id, state="failed", error=str(e), status_code=400, updated_at=int(time.time()))
+        return
+    except Exception as e:
+        traceback.print_exc()
+        _update(job_id, state="failed", error=str(e), status_code=500, updated_at=int(time.time()))
+        return
+
+    # Download URLs are presigned when the job is polled, so they never go stale in the table.
+    result = strip_download_urls(result)
+    _update(
+        job_id,
+        state="succeeded",
+        rows_processed=rows_processed,
+        bytes_read=bytes_read,
+        result=result,
+        finished_at=int(time.time()),
+        updated_at=int(time.time())
+    )
+    print("✅ Job finished:", job_id)
+
+
+def get_compression_job(event, context=None):
+    job_id = (event.get("pathParameters") or {}).get("job_id")
+    if not job_id:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Missing job_id"})
+        }
+
+    job = get_job(job_id)
+    if not job:
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"error": "Job not found"})
+        }
+
+    if "result" in job:
+        result = job["result"]
+        if "results" in result:
+            result["results"] = [with_download_urls(r) for r in result["results"]]
+            if "combined" in result:
+                result["combined"] = with_download_urls(result["combined"])
+        else:
+            job["result"] = with_download_urls(result)
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps(job)
+    }
@@ -0,0 +1,102 @@
+"""Column projection and row filters for a compression request.
+
+A request may ask for only some output ``columns`` and only the rows matching ``filters``: exact
+values per text column (``{"Country": ["US", "GB"], "Channel ID": "UC..."}``). Both are pushed
+into the read: CSV parsing only materializes the columns the query needs (``usecols``), columnar
+inputs only read those columns, and every chunk is filtered right after it is parsed, before it is
+prepared and aggregated.
+"""
+from royalty_compressor.schema import ASSET_SUMMARY
+
+
+class QueryError(ValueError):
+    """The query asks for columns the report does not have; the request, not the report, is at fault."""
+
+
+class ReportQuery:
+    """Which columns and rows of a report a compression request wants.
+
+    ``columns`` lists the output columns (the group column is always kept); None keeps them all.
+    ``filters`` maps a column to the values a row must have in it.
+    """
+
+    def __init__(self, report_format=ASSET_SUMMARY, columns=None, filters=None):
+        self.report_format = report_format
+        self.columns = None
+        if columns is not None:
+            self.columns = [report_format.header(col) for col in columns]
+            if report_format.group_column not in self.columns:
+                self.columns.insert(0, report_format.group_column)
+        self.filters = {report_format.header(col): list(values) for col, values in (filters or {}).items()}
+
+    @classmethod
+    def from_body(cls, body, report_format=ASSET_SUMMARY):
+        """The query in a request body's ``columns`` and ``filters``. Raises ValueError if they are malformed."""
+        columns = body.get("columns")
+        if columns is not None:
+            if not isinstance(columns, list) or not all(isinstance(col, str) and col for col in columns):
+                raise ValueError("columns must be a list of column names")
+            projected = {report_format.header(col) for col in columns}
+            if not projected & set(report_format.sum_columns):
+                raise ValueError("columns must include at least one revenue or views column")
+
+        filters = body.get("filters") or {}
+        if not isinstance(filters, dict):
+            raise ValueError("filters must map column names to values")
+        values_by_column = {}
+        for col, values in filters.items():
+            if report_format.header(col) in report_format.sum_columns:
+                raise ValueError(f"Cannot filter on the summed column '{col}'")
+            if not isinstance(values, list):
+                values = [values]
+            if not values or not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+                raise ValueError(f"Filter on '{col}' must be a value or a non-empty list of values")
+            values_by_column[col] = [str(value) for value in values]
+
+        return cls(report_format, columns, values_by_column)
+
+    @property
+    def active(self):
+        return self.columns is not None or bool(self.filters)
+
+    def spec(self):
+        """Everything about the query that shapes the output, as plain data (part of the result cache key)."""
+        return {
+            "columns": self.columns,
+            "filters": {col: sorted(values) for col, values in self.filters.items()}
+        }
+
+    def read_columns(self):
+        """Names of the columns to read from the report, or None for all of them."""
+        if self.columns is None:
+            return None
+        return set(self.columns) | set(self.filters)
+
+    def resolve(self, columns):
+        """Check the query against the report's ``columns``; returns the output columns."""
+        missing = [col for col in (self.columns or []) + list(self.filters) if col not in columns]
+        if missing:
+            raise QueryError(f"Columns not in report: {', '.join(missing)}")
+
+        if self.columns is None:
+            return list(columns)
+        return [col for col in columns if col in self.columns]
+
+    def filter_chunk(self, chunk, output_columns):
+        """Rows of ``chunk`` that match the query, with only ``output_columns``."""
+        mask = None
+        for col, values in self.filters.items():
+            column = chunk[col]
+            condition = column.isin(values)
+            # Blanks count as the value the format fills them with (an empty Adjustment Type is "None").
+            fill_value = self.report_format.fill_values.get(col)
+            if fill_value is not None and fill_value in values:
+                condition |= column.isna()
+            mask = condition if mask is None else mask & condition
+
+        if mask is not None:
+            chunk = chunk[mask.to_numpy()]
+        if len(output_columns) != len(chunk.columns):
+            chunk = chunk[output_columns]
+        return chunk
+
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import time
+from royalty_compressor.schema import get_report_format
+
+RESULT_CACHE_PREFIX = "cache/royalty/"
+
+# How long a compressed result can be handed back for an identical upload.
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+
+# Keys in a compression result that point at S3 objects, and the presigned URL returned for each.
+OUTPUT_URL_FIELDS = {
+    "output_key": "download_url",
+    "parquet_output_key": "parquet_download_url"
+}
+
+
+def cache_digest(source_etag, options):
+    """Hash the input content (its S3 ETag) together with everything that shapes the output."""
+    fingerprint = json.dumps({
+        "etag": source_etag.strip('"'),
+        "report_format": get_report_format(options.get("report_format")).spec(),
+        "options": options
+    }, sort_keys=True)
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+def manifest_key(digest):
+    return f"{RESULT_CACHE_PREFIX}{digest}.json"
+
+
+def lookup(s3, bucket, digest):
+    """Return the cached result for ``digest``, or None if it is missing, expired or its outputs are gone."""
+    try:
+        manifest = json.loads(s3.get_object(Bucket=bucket, Key=manifest_key(digest))["Body"].read())
+    except s3.exceptions.ClientError:
+        return None
+
+    if manifest.get("expires_at", 0) <= time.time():
+        return None
+
+    result = manifest["result"]
+    try:
+        for key_field in OUTPUT_URL_FIELDS:
+            if key_field in result:
+                s3.head_object(Bucket=bucket, Key=result[key_field])
+    except s3.exceptions.ClientError:
+        return None
+
+    return result
+
+
+def store(s3, bucket, digest, result):
+    created_at = int(time.time())
+    manifest = {
+        "created_at": created_at,
+        "expires_at": created_at + RESULT_CACHE_TTL_SECONDS,
+        "result": {k: v for k, v in result.items() if k not in OUTPUT_URL_FIELDS.values()}
+    }
+    try:
+        s3.put_object(
+            Bucket=bucket,
+            Key=manifest_key(digest),
+            Body=json.dumps(manifest),
+            ContentType="application/json"
+        )
+    except Exception as e:
+        print("❌ Could not store cached result:", str(e))
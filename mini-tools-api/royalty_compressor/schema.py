@@ -0,0 +1,150 @@
+SUM_COLUMNS = [
+    "Owned Views",
+    "Monetized Views : Audio",
+    "Monetized Views : Audio Visual",
+    "Monetized Views",
+    "YouTube Revenue Split",
+    "YouTube Revenue Split : Auction",
+    "YouTube Revenue Split : Reserved",
+    "YouTube Revenue Split : Partner Sold YouTube Served",
+    "YouTube Revenue Split : Partner Sold Partner Served",
+    "Partner Revenue",
+    "Partner Revenue : Auction",
+    "Partner Revenue : Reserved",
+    "Partner Revenue : Partner Sold YouTube Served",
+    "Partner Revenue : Partner Sold Partner Served",
+    "Partner Revenue : Pro Rata : Audio",
+    "Partner Revenue : Pro Rata : Audio Visual",
+    "Partner Revenue : Pro Rata",
+    "Partner Revenue : Per Sub Min"
+]
+
+# Low-cardinality text repeated on most rows of an Asset Summary. Parsed as categoricals,
+# each distinct value is stored once per chunk instead of once per row.
+CATEGORICAL_COLUMNS = [
+    "Adjustment Type",
+    "Asset Type",
+    "Asset Channel ID",
+    "Channel ID",
+    "Channel",
+    "Channel Display Name",
+    "Country",
+    "Territory",
+    "Content Type",
+    "Claim Type",
+    "Policy",
+    "Label",
+    "Asset Labels",
+    "Artist",
+    "Album"
+]
+
+GROUP_COLUMN = "Asset ID"
+
+
+def normalize_header(name):
+    return " ".join(name.strip().replace("\u00A0", " ").split())
+
+
+class ReportFormat:
+    """Declarative description of a royalty report layout and how it is compressed.
+
+    Every front end (the API routes, the batch and job runners, the Streamlit app) compresses
+    through the same core with one of these, so a layout is described once:
+
+    - ``group_column``: rows are rolled up to one per value of this column.
+    - ``sum_columns``: summed per group; ``integer_sum_columns`` of them are whole numbers (by
+      default the view counts).
+    - ``categorical_columns``: low-cardinality text parsed as categoricals.
+    - ``preamble_prefixes``: a first line starting with one of these is a title, not the header.
+    - ``normalize_headers``: collapse whitespace (including NBSP) in header names.
+    - ``fill_values``: what blanks in a column are replaced with before grouping.
+    """
+
+    def __init__(self, name, group_column, sum_columns, integer_sum_columns=None, categorical_columns=(),
+                 preamble_prefixes=(), normalize_headers=True, fill_values=None):
+        self.name = name
+        self.group_column = group_column
+        self.sum_columns = list(sum_columns)
+        # View counts are whole numbers; every other sum column is revenue.
+        if integer_sum_columns is None:
+            integer_sum_columns = [col for col in self.sum_columns if "Views" in col]
+        self.integer_sum_columns = list(integer_sum_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.preamble_prefixes = tuple(preamble_prefixes)
+        self.normalize_headers = normalize_headers
+        self.fill_values = dict(fill_values or {})
+
+    def spec(self):
+        """Everything that shapes the output, as plain data (part of the result cache key)."""
+        return {
+            "name": self.name,
+            "group_column": self.group_column,
+            "sum_columns": self.sum_columns,
+            "integer_sum_columns": self.integer_sum_columns,
+            "preamble_prefixes": list(self.preamble_prefixes),
+            "normalize_headers": self.normalize_headers,
+            "fill_values": self.fill_values
+        }
+
+    def is_preamble(self, line):
+        return bool(self.preamble_prefixes) and line.strip().startswith(self.preamble_prefixes)
+
+    def header(self, name):
+        name = str(name)
+        return normalize_header(name) if self.normalize_headers else name
+
+    def csv_dtypes(self, columns, typed=True):
+        """dtype map for ``read_csv`` over ``columns`` (already passed through ``header``).
+
+        Revenue and views are parsed as float64 by the C parser (views become int64 once blanks
+        are filled). float32 is not used: summing cents across millions of rows in single
+        precision drifts visibly. Everything else stays text so it is written back exactly as it
+        came in. With ``typed=False`` sum columns are read as text and coerced afterwards, which
+        tolerates stray non-numeric values at the cost of speed.
+        """
+        dtypes = {}
+        for col in columns:
+            if col in self.sum_columns:
+                dtypes[col] = "float64" if typed else str
+            elif col in self.categorical_columns and typed:
+                dtypes[col] = "category"
+            else:
+                dtypes[col] = str
+        return dtypes
+
+    def split_columns(self, columns):
+        """``(sum_cols, first_cols)`` for a report with ``columns``."""
+        if self.group_column not in columns:
+            raise Exception(f"Missing '{self.group_column}' column in report")
+        sum_cols = [col for col in self.sum_columns if col in columns]
+        if not sum_cols:
+            raise Exception("No expected revenue columns found in CSV")
+        first_cols = [col for col in columns if col not in sum_cols + [self.group_column]]
+        return sum_cols, first_cols
+
+    def output_columns(self, sum_cols, first_cols):
+        return [self.group_column] + first_cols + sum_cols
+
+
+ASSET_SUMMARY = ReportFormat(
+    "asset_summary",
+    group_column=GROUP_COLUMN,
+    sum_columns=SUM_COLUMNS,
+    categorical_columns=CATEGORICAL_COLUMNS,
+    preamble_prefixes=("Asset Summary",),
+    fill_values={"Adjustment Type": "None"}
+)
+
+REPORT_FORMATS = {
+    ASSET_SUMMARY.name: ASSET_SUMMARY
+}
+
+DEFAULT_REPORT_FORMAT = ASSET_SUMMARY.name
+
+
+def get_report_format(name=None):
+    name = name or DEFAULT_REPORT_FORMAT
+    if name not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report_format '{name}', expected one of {', '.join(REPORT_FORMATS)}")
+    return REPORT_FORMATS[name]
@@ -0,0 +1,102 @@
+"""Usage events, one item per event, in their own table.
+
+Items are keyed by ``sessionId`` (partition) and ``eventId`` (sort), where ``eventId`` is a ULID:
+its first ten characters encode the millisecond it was created, so events sort by time and a
+time range is a ``BETWEEN`` on the sort key. Writing an event never touches existing items, and
+reading a page costs the page, not the lifetime of the session.
+"""
+import os
+import random
+import secrets
+import time
+from shared import aws
+
+USAGE_TABLE_NAME = os.getenv("USAGE_TABLE_NAME", "UsageEvents")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# BatchWriteItem takes at most 25 puts per call.
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_ATTEMPTS = int(os.getenv("BATCH_WRITE_ATTEMPTS", "6"))
+BATCH_WRITE_BASE_DELAY = 0.05
+
+# How far back a buffered event's own timestamp is trusted; older ones are filed at this age.
+MAX_EVENT_AGE_SECONDS = 24 * 60 * 60
+
+# Crockford's base32, as used by ULIDs.
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+events_table = aws.lazy(aws.table, USAGE_TABLE_NAME)
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(ULID_ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+def new_ulid(timestamp_ms=None):
+    if timestamp_ms is None:
+        timestamp_ms = int(time.time() * 1000)
+    return _encode(timestamp_ms, 10) + _encode(secrets.randbits(80), 16)
+
+
+def ulid_range(start=None, end=None):
+    """Smallest and largest ULIDs for events between ``start`` and ``end`` (epoch seconds, inclusive)."""
+    low = _encode(int(start * 1000), 10) + "0" * 16 if start is not None else "0" * 26
+    high = _encode(int(end * 1000) + 999, 10) + "Z" * 16 if end is not None else "Z" * 26
+    return low, high
+
+
+def event_item(session_id, usage_entry, timestamp_ms=None):
+    if timestamp_ms is None:
+        timestamp_ms = int(time.time() * 1000)
+    return {
+        "sessionId": session_id,
+        "eventId": new_ulid(timestamp_ms),
+        **usage_entry
+    }
+
+
+def put_events(items):
+    """Write ``items`` with BatchWriteItem, retrying whatever DynamoDB leaves unprocessed.
+
+    Unprocessed items are re-sent with exponential backoff and full jitter, as AWS recommends for
+    throttled batches. Returns the items that still could not be written after the last attempt.
+    """
+    dynamodb = aws.resource("dynamodb")
+    failed = []
+    for start in range(0, len(items), BATCH_WRITE_SIZE):
+        requests = [{"PutRequest": {"Item": item}} for item in items[start:start + BATCH_WRITE_SIZE]]
+        for attempt in range(BATCH_WRITE_ATTEMPTS):
+            if attempt:
+                time.sleep(random.uniform(0, BATCH_WRITE_BASE_DELAY * 2 ** attempt))
+            response = dynamodb.batch_write_item(RequestItems={USAGE_TABLE_NAME: requests})
+            requests = response.get("UnprocessedItems", {}).get(USAGE_TABLE_NAME, [])
+            if not requests:
+                break
+        failed += [request["PutRequest"]["Item"] for request in requests]
+    return failed
+
+
+def query_events(session_id, start=None, end=None, limit=DEFAULT_PAGE_SIZE, cursor=None, newest_first=True):
+    """One page of a session's events between ``start`` and ``end``.
+
+    Returns ``(events, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    low, high = ulid_range(start, end)
+    query = {
+        "KeyConditionExpression": "sessionId = :session_id AND eventId BETWEEN :low AND :high",
+        "ExpressionAttributeValues": {":session_id": session_id, ":low": low, ":high": high},
+        "ScanIndexForward": not newest_first,
+        "Limit": max(1, min(int(limit), MAX_PAGE_SIZE))
+    }
+    if cursor:
+        query["ExclusiveStartKey"] = {"sessionId": session_id, "eventId": cursor}
+
+    response = events_table.query(**query)
+    next_key = response.get("LastEvaluatedKey")
+    return response.get("Items", []), next_key["eventId"] if next_key else None
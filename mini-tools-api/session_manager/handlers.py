@@ -1,20 +1,31 @@
 import json
 import time
 import traceback
-import boto3
 import os
 import uuid
 from decimal import Decimal
+from datetime import date, datetime, timezone
+from session_manager import events, stats
+from shared import aws, metrics
+from shared.cache import TTLCache
+from shared.dynamodb import convert_decimals
 
-# dynamodb = boto3.resource(
-#     "dynamodb",
-#     endpoint_url=os.getenv("DYNAMODB_ENDPOINT", "http://host.docker.internal:4566"),
-#     region_name="us-east-1"
-# )
+SESSION_TABLE_NAME = os.getenv("SESSION_TABLE_NAME", "Sessions")
 
-dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+# Sessions expire a week after they are created; stored files are kept for as long as one could use them.
+SESSION_TTL_SECONDS = 7 * 24 * 60 * 60
 
-table = dynamodb.Table(os.getenv("SESSION_TABLE_NAME", "Sessions"))
+table = aws.lazy(aws.table, SESSION_TABLE_NAME)
+
+# Session metadata never changes after create_session, so a warm container keeps what it has read
+# until the session's own expires_at (or the TTL below, whichever comes first).
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "900"))
+
+session_cache = TTLCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS)
+
+# Events accepted per bulk request.
+MAX_BATCH_EVENTS = 500
 
 
 def handle_session(event, context):
@@ -25,12 +36,24 @@ def handle_session(event, context):
     try:
         if method == "POST" and path == "/session-manager/create-session":
             return create_session(event)
+        elif method == "POST" and path == "/session-manager/track-usage-batch":
+            return track_usage_batch(event)
         elif method == "POST" and path.startswith("/session-manager/track-usage/"):
             session_id = path_params.get("session_id")
             return track_usage(session_id, event)
         elif method == "GET" and path.startswith("/session-manager/session-data/"):
             session_id = path_params.get("session_id")
             return get_session_data(session_id)
+        elif method == "GET" and path == "/session-manager/stats":
+            return get_stats(event.get("queryStringParameters") or {})
+        elif method == "GET" and path == "/session-manager/cache-stats":
+            return {
+                "statusCode": 200,
+                "body": json.dumps(session_cache.stats())
+            }
+        elif method == "GET" and path.startswith("/session-manager/session-events/"):
+            session_id = path_params.get("session_id")
+            return get_session_events(session_id, event.get("queryStringParameters") or {})
         else:
             return {
                 "statusCode": 400,
@@ -42,19 +65,10 @@ def handle_session(event, context):
             "body": json.dumps({"error": str(e)})
         }
 
-def convert_decimals(obj):
-    if isinstance(obj, list):
-        return [convert_decimals(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: convert_decimals(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj) if obj % 1 else int(obj)
-    return obj
-
 def create_session(event):
     try:
         session_id = str(uuid.uuid4())
-        expires_at = int(time.time()) + 7 * 24 * 60 * 60  # 7 days
+        expires_at = int(time.time()) + SESSION_TTL_SECONDS
 
         body = json.loads(event.get("body", "{}"))
         metadata = {
@@ -64,11 +78,12 @@ def create_session(event):
             "ip_address": body.get("ip_address", "")
         }
 
-        table.put_item(Item={
+        item = {
             "sessionId": session_id,
-            "metadata": metadata,
-            "usage_logs": []
-        })
+            "metadata": metadata
+        }
+        table.put_item(Item=item)
+        session_cache.set(session_id, item, expires_at=expires_at)
 
         return {
             "statusCode": 200,
@@ -84,9 +99,30 @@ def create_session(event):
             "body": json.dumps({"error": str(e)})
         }
 
+def cache_session(item):
+    expires_at = (item.get("metadata") or {}).get("expires_at")
+    session_cache.set(item["sessionId"], item, expires_at=int(expires_at) if expires_at is not None else None)
+
+def get_session(session_id):
+    """The session's ``sessionId`` and ``metadata`` (None if it does not exist), from the cache when possible."""
+    item = session_cache.get(session_id)
+    if item is not None:
+        metrics.count("SessionCacheHit")
+        return item
+
+    metrics.count("SessionCacheMiss")
+    # usage_logs is left out, so old sessions with a large list stay cheap to read.
+    response = table.get_item(Key={"sessionId": session_id}, ProjectionExpression="sessionId, metadata")
+    item = response.get("Item")
+    if item is not None:
+        item = convert_decimals(item)
+        cache_session(item)
+    return item
+
 def track_usage(session_id, event):
     try:
-        body = json.loads(event["body"])
+        # DynamoDB rejects floats, so numbers in details are kept as Decimals.
+        body = json.loads(event["body"], parse_float=Decimal)
         usage_entry = {
             "timestamp": int(time.time()),
             "tool_name": body.get("tool_name", "unknown"),
@@ -94,25 +130,119 @@ def track_usage(session_id, event):
             "details": body.get("details", {}),
         }
 
-        check = table.get_item(Key={"sessionId": session_id})
-        if "Item" not in check:
+        # Warm containers answer this from the cache, leaving the transaction below as the only call.
+        if get_session(session_id) is None:
             return {
                 "statusCode": 404,
                 "body": json.dumps({"error": "Session not found"})
             }
 
-        table.update_item(
-            Key={"sessionId": session_id},
-            UpdateExpression="SET usage_logs = list_append(if_not_exists(usage_logs, :empty), :entry)",
-            ExpressionAttributeValues={
-                ":entry": [usage_entry],
-                ":empty": []
+        # The event and its per-day counters go in one conditional transaction; the condition
+        # turns a (vanishingly unlikely) ULID collision into an error instead of an overwrite.
+        item = events.event_item(session_id, usage_entry)
+        stats.transact_put_with_counters(item)
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"success": True, "event_id": item["eventId"]})
+        }
+
+    except Exception as e:
+        traceback.print_exc()
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
+
+def existing_sessions(session_ids):
+    """The subset of ``session_ids`` that exist: cached ones first, the rest 100 keys per BatchGetItem."""
+    found = {session_id for session_id in session_ids if session_cache.get(session_id) is not None}
+    missing = [session_id for session_id in session_ids if session_id not in found]
+    metrics.count("SessionCacheHit", len(found))
+    metrics.count("SessionCacheMiss", len(missing))
+
+    dynamodb = aws.resource("dynamodb")
+    for start in range(0, len(missing), 100):
+        request = {SESSION_TABLE_NAME: {
+            "Keys": [{"sessionId": session_id} for session_id in missing[start:start + 100]],
+            "ProjectionExpression": "sessionId, metadata"
+        }}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response["Responses"].get(SESSION_TABLE_NAME, []):
+                cache_session(convert_decimals(item))
+                found.add(item["sessionId"])
+            request = response.get("UnprocessedKeys")
+    return found
+
+def track_usage_batch(event):
+    """Record many usage events, across any number of sessions, in as few writes as possible.
+
+    Body: ``{"events": [{"session_id", "tool_name", "action", "details", "timestamp"}, ...]}``.
+    ``timestamp`` (epoch seconds) is when the event happened on the client; buffered events keep
+    it so time-ranged queries still place them correctly.
+    """
+    try:
+        body = json.loads(event["body"], parse_float=Decimal)
+        batch = body.get("events") if isinstance(body, dict) else None
+        if not isinstance(batch, list) or not batch:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Missing events"})
             }
-        )
+        if len(batch) > MAX_BATCH_EVENTS:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": f"At most {MAX_BATCH_EVENTS} events per request"})
+            }
+
+        now = time.time()
+        known = existing_sessions({
+            entry["session_id"] for entry in batch
+            if isinstance(entry, dict) and isinstance(entry.get("session_id"), str) and entry["session_id"]
+        })
+
+        items = []
+        rejected = []
+        for index, entry in enumerate(batch):
+            if not isinstance(entry, dict):
+                rejected.append({"index": index, "error": "Event must be an object"})
+                continue
+            session_id = entry.get("session_id")
+            if not isinstance(session_id, str) or not session_id:
+                rejected.append({"index": index, "error": "Missing session_id"})
+                continue
+            if not all(isinstance(entry.get(field, ""), str) for field in ("tool_name", "action")):
+                rejected.append({"index": index, "error": "tool_name and action must be strings"})
+                continue
+            if session_id not in known:
+                rejected.append({"index": index, "error": "Session not found"})
+                continue
+
+            try:
+                timestamp = float(entry.get("timestamp") or now)
+            except (TypeError, ValueError):
+                timestamp = now
+            timestamp = min(max(timestamp, now - events.MAX_EVENT_AGE_SECONDS), now)
+
+            items.append(events.event_item(session_id, {
+                "timestamp": int(timestamp),
+                "tool_name": entry.get("tool_name", "unknown"),
+                "action": entry.get("action", "unknown"),
+                "details": entry.get("details", {}),
+            }, timestamp_ms=int(timestamp * 1000)))
+
+        failed = events.put_events(items)
+        failed_ids = {item["eventId"] for item in failed}
+        stats.add_counters([item for item in items if item["eventId"] not in failed_ids])
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"success": True})
+            "body": json.dumps({
+                "accepted": len(items) - len(failed),
+                "rejected": rejected,
+                "failed": len(failed)
+            })
         }
 
     except Exception as e:
@@ -130,8 +260,9 @@ def get_session_data(session_id):
         }
 
     try:
-        response = table.get_item(Key={"sessionId": session_id})
-        if "Item" not in response:
+        # Usage is served page by page from /session-manager/session-events, never in bulk here.
+        item = get_session(session_id)
+        if item is None:
             return {
                 "statusCode": 404,
                 "body": json.dumps({"error": "Session not found"})
@@ -139,7 +270,89 @@ def get_session_data(session_id):
 
         return {
             "statusCode": 200,
-            "body": json.dumps(convert_decimals(response["Item"]))
+            "body": json.dumps(item)
+        }
+
+    except Exception as e:
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
+
+def get_session_events(session_id, params):
+    if not session_id:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Missing session_id"})
+        }
+
+    try:
+        start = int(params["from"]) if params.get("from") else None
+        end = int(params["to"]) if params.get("to") else None
+        limit = int(params.get("limit") or events.DEFAULT_PAGE_SIZE)
+    except ValueError:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "from, to and limit must be integers"})
+        }
+
+    try:
+        items, next_cursor = events.query_events(
+            session_id,
+            start=start,
+            end=end,
+            limit=limit,
+            cursor=params.get("cursor"),
+            newest_first=params.get("order", "desc") != "asc"
+        )
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "events": convert_decimals(items),
+                "next_cursor": next_cursor
+            })
+        }
+
+    except Exception as e:
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
+
+def stats_range(params):
+    """Validated ``(from, to)`` ISO dates from query or body parameters; both default to today (UTC)."""
+    today = datetime.now(timezone.utc).date().isoformat()
+    start_day = params.get("from") or today
+    end_day = params.get("to") or start_day
+    start, end = date.fromisoformat(start_day), date.fromisoformat(end_day)
+    if end < start:
+        raise ValueError("to must not be before from")
+    if (end - start).days >= stats.MAX_RANGE_DAYS:
+        raise ValueError(f"At most {stats.MAX_RANGE_DAYS} days per request")
+    return start.isoformat(), end.isoformat()
+
+def get_stats(params):
+    try:
+        start_day, end_day = stats_range(params)
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": str(e)})
+        }
+
+    try:
+        days = convert_decimals(stats.query_stats(start_day, end_day, params.get("tool")))
+        totals = {}
+        for day in days:
+            for tool_name, counters in day["tools"].items():
+                tool_totals = totals.setdefault(tool_name, {counter: 0 for counter in stats.COUNTERS})
+                for counter, value in counters.items():
+                    tool_totals[counter] += value
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"from": start_day, "to": end_day, "days": days, "totals": totals})
         }
 
     except Exception as e:
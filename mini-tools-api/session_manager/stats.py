@@ -0,0 +1,227 @@
+"""Per-tool, per-day usage counters kept next to the events they summarize.
+
+Counters live in the usage events table under their own partitions per day (``stats#YYYY-MM-DD``,
+sort key = tool name), the same way jobs share the sessions table under ``job#``. They are bumped
+with atomic ``ADD`` updates as events are recorded, so reading a day is a query per shard no matter
+how many events it had. Each update goes to a random one of ``STATS_SHARDS`` partitions
+(``stats#YYYY-MM-DD``, ``stats#YYYY-MM-DD#1``, ...) so a busy day is not one hot item; reads sum
+the shards.
+
+``rebuild`` recomputes the counters of closed days from the raw events. It is run by hand::
+
+    python -m session_manager.stats --from 2024-05-01 --to 2024-05-31
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from session_manager.events import MAX_EVENT_AGE_SECONDS, USAGE_TABLE_NAME, events_table
+from shared import aws
+
+STATS_KEY_PREFIX = "stats#"
+
+# Partitions each day's counters are spread over. Only ever raise it: reads stop at the current count.
+STATS_SHARDS = max(1, int(os.getenv("STATS_SHARDS", "4")))
+
+# Slack past the oldest accepted event timestamp before a day counts as closed, for requests
+# (and their write retries) still in flight.
+REBUILD_MARGIN_SECONDS = 60 * 60
+
+COUNTERS = ["calls", "bytes_processed", "duration_ms"]
+
+# Detail fields the front end reports for each counter.
+DETAIL_FIELDS = {
+    "bytes_processed": "bytes_processed",
+    "duration_ms": "duration_ms"
+}
+
+MAX_RANGE_DAYS = 92
+
+
+def day_of(timestamp):
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).date().isoformat()
+
+
+def days_between(start_day, end_day):
+    start, end = date.fromisoformat(start_day), date.fromisoformat(end_day)
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+
+def shard_partition(day, shard=0):
+    # Shard 0 keeps the unsharded key, so counters written before sharding are still read.
+    return f"{STATS_KEY_PREFIX}{day}" + (f"#{shard}" if shard else "")
+
+
+def stats_key(day, tool_name, shard=0):
+    return {"sessionId": shard_partition(day, shard), "eventId": tool_name}
+
+
+def event_deltas(item):
+    deltas = {"calls": 1}
+    details = item.get("details") or {}
+    for counter, field in DETAIL_FIELDS.items():
+        value = details.get(field) if isinstance(details, dict) else None
+        if isinstance(value, (int, Decimal)) and not isinstance(value, bool) and value > 0:
+            deltas[counter] = value
+    return deltas
+
+
+def tally(items):
+    """Sum the counter deltas of event ``items`` per (day, tool)."""
+    totals = {}
+    for item in items:
+        key = (day_of(item["timestamp"]), item.get("tool_name", "unknown"))
+        counters = totals.setdefault(key, {})
+        for counter, value in event_deltas(item).items():
+            counters[counter] = counters.get(counter, 0) + value
+    return totals
+
+
+def counter_update(day, tool_name, deltas):
+    """``update_item`` arguments that atomically add ``deltas`` to one day's counters for a tool.
+
+    The update lands on a random shard of the day.
+    """
+    return {
+        "Key": stats_key(day, tool_name, random.randrange(STATS_SHARDS)),
+        "UpdateExpression": "ADD " + ", ".join(f"#{counter} :{counter}" for counter in deltas),
+        "ExpressionAttributeNames": {f"#{counter}": counter for counter in deltas},
+        "ExpressionAttributeValues": {f":{counter}": value for counter, value in deltas.items()}
+    }
+
+
+def event_counter_update(item):
+    return counter_update(day_of(item["timestamp"]), item.get("tool_name", "unknown"), event_deltas(item))
+
+
+def add_counters(items):
+    """Bump the counters for a batch of written events: one update per (day, tool), not per event."""
+    for (day, tool_name), deltas in tally(items).items():
+        events_table.update_item(**counter_update(day, tool_name, deltas))
+
+
+def query_stats(start_day, end_day, tool_name=None):
+    """Counters per day and tool between ``start_day`` and ``end_day`` (ISO dates, inclusive)."""
+    days = []
+    for day in days_between(start_day, end_day):
+        tools = {}
+        for item in shard_items(day, tool_name):
+            counters = tools.setdefault(item["eventId"], {counter: 0 for counter in COUNTERS})
+            for counter in COUNTERS:
+                counters[counter] += item.get(counter, 0)
+        days.append({"date": day, "tools": tools})
+    return days
+
+
+def shard_items(day, tool_name=None):
+    """Every counter item of ``day`` (optionally one tool's), across all shards."""
+    for shard in range(STATS_SHARDS):
+        query = {
+            "KeyConditionExpression": "sessionId = :day" + (" AND eventId = :tool" if tool_name else ""),
+            "ExpressionAttributeValues": {":day": shard_partition(day, shard)}
+        }
+        if tool_name:
+            query["ExpressionAttributeValues"][":tool"] = tool_name
+
+        while True:
+            response = events_table.query(**query)
+            yield from response.get("Items", [])
+            if "LastEvaluatedKey" not in response:
+                break
+            query["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def last_closed_day(now=None):
+    """The latest day no new event can be filed under any more.
+
+    Events are filed at their client timestamp, but never more than ``MAX_EVENT_AGE_SECONDS`` back.
+    """
+    now = time.time() if now is None else now
+    return (date.fromisoformat(day_of(now - MAX_EVENT_AGE_SECONDS - REBUILD_MARGIN_SECONDS)) - timedelta(days=1)).isoformat()
+
+
+def rebuild(start_day, end_day, now=None):
+    """Recompute the counters for a range of closed days from the raw events.
+
+    Scans the events table, so it is a maintenance operation, not something to run per request.
+    Days that can still receive events are refused: their counters are being bumped while the
+    scan runs, and overwriting them would drop those updates. The totals go to shard 0 and the
+    other shards of each day are cleared.
+    """
+    if end_day > last_closed_day(now):
+        raise ValueError(f"Days after {last_closed_day(now)} can still receive events")
+
+    start = int(datetime.fromisoformat(start_day).replace(tzinfo=timezone.utc).timestamp())
+    end = int(datetime.fromisoformat(end_day).replace(tzinfo=timezone.utc).timestamp()) + 24 * 60 * 60 - 1
+
+    scan = {
+        "FilterExpression": "#timestamp BETWEEN :start AND :end AND NOT begins_with(sessionId, :stats)",
+        "ProjectionExpression": "#timestamp, tool_name, details",
+        "ExpressionAttributeNames": {"#timestamp": "timestamp"},
+        "ExpressionAttributeValues": {":start": start, ":end": end, ":stats": STATS_KEY_PREFIX}
+    }
+    items = []
+    while True:
+        response = events_table.scan(**scan)
+        items += response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            break
+        scan["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    totals = tally(items)
+    with events_table.batch_writer() as writer:
+        for day in days_between(start_day, end_day):
+            for item in shard_items(day):
+                key = {"sessionId": item["sessionId"], "eventId": item["eventId"]}
+                if key != stats_key(day, item["eventId"]) or (day, item["eventId"]) not in totals:
+                    writer.delete_item(Key=key)
+        for (day, tool_name), counters in totals.items():
+            writer.put_item(Item={**stats_key(day, tool_name), **counters})
+
+    return {"events_scanned": len(items), "counters_written": len(totals)}
+
+
+def transact_put_with_counters(item):
+    """Write event ``item`` and bump its counters in one conditional transaction."""
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+
+    def serialize(values):
+        return {name: serializer.serialize(value) for name, value in values.items()}
+
+    update = event_counter_update(item)
+    aws.client("dynamodb").transact_write_items(TransactItems=[
+        {"Put": {
+            "TableName": USAGE_TABLE_NAME,
+            "Item": serialize(item),
+            "ConditionExpression": "attribute_not_exists(eventId)"
+        }},
+        {"Update": {
+            "TableName": USAGE_TABLE_NAME,
+            "Key": serialize(update["Key"]),
+            "UpdateExpression": update["UpdateExpression"],
+            "ExpressionAttributeNames": update["ExpressionAttributeNames"],
+            "ExpressionAttributeValues": serialize(update["ExpressionAttributeValues"])
+        }}
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="start_day", required=True, help="First day to rebuild (ISO date)")
+    parser.add_argument("--to", dest="end_day", required=True, help="Last day to rebuild (ISO date)")
+    args = parser.parse_args()
+
+    try:
+        days_between(args.start_day, args.end_day)
+        print(json.dumps(rebuild(args.start_day, args.end_day), indent=2))
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
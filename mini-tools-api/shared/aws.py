@@ -0,0 +1,98 @@
+"""boto3 clients shared by every handler in the container.
+
+Importing boto3 and building a client are a large part of a cold start, so neither happens at
+import time: modules hold a ``lazy`` stand-in and the real client is created, once per process,
+the first time a request uses it. Endpoints can be pointed at LocalStack with S3_ENDPOINT,
+DYNAMODB_ENDPOINT and LAMBDA_ENDPOINT.
+"""
+import os
+import threading
+
+REGION = "us-east-1"
+
+ENDPOINT_VARIABLES = {
+    "s3": "S3_ENDPOINT",
+    "dynamodb": "DYNAMODB_ENDPOINT",
+    "lambda": "LAMBDA_ENDPOINT"
+}
+
+_lock = threading.RLock()
+_session = None
+_clients = {}
+_resources = {}
+_tables = {}
+
+
+def _forget_clients():
+    # A forked worker must not reuse the parent's pooled connections.
+    global _lock
+    _lock = threading.RLock()
+    _clients.clear()
+    _resources.clear()
+    _tables.clear()
+
+
+os.register_at_fork(after_in_child=_forget_clients)
+
+
+def session():
+    global _session
+    with _lock:
+        if _session is None:
+            import boto3
+            _session = boto3.session.Session(region_name=REGION)
+        return _session
+
+
+def _endpoint(service):
+    variable = ENDPOINT_VARIABLES.get(service)
+    endpoint = os.getenv(variable) if variable else None
+    return {"endpoint_url": endpoint} if endpoint else {}
+
+
+def new_client(service):
+    """A client of its own rather than the shared one."""
+    with _lock:
+        return session().client(service, **_endpoint(service))
+
+
+def client(service):
+    if service not in _clients:
+        with _lock:
+            if service not in _clients:
+                _clients[service] = new_client(service)
+    return _clients[service]
+
+
+def resource(service):
+    if service not in _resources:
+        with _lock:
+            if service not in _resources:
+                _resources[service] = session().resource(service, **_endpoint(service))
+    return _resources[service]
+
+
+def table(name):
+    if name not in _tables:
+        with _lock:
+            if name not in _tables:
+                _tables[name] = resource("dynamodb").Table(name)
+    return _tables[name]
+
+
+class _Lazy:
+    def __init__(self, factory, args):
+        self._factory = factory
+        self._args = args
+
+    def __getattr__(self, name):
+        return getattr(self._factory(*self._args), name)
+
+
+def lazy(factory, *args):
+    """Module-level stand-in for ``factory(*args)``, resolved on every attribute access.
+
+    ``s3 = lazy(client, "s3")`` reads like a client everywhere it is used but creates nothing
+    until a request needs it, and always resolves to the current process's shared client.
+    """
+    return _Lazy(factory, args)
@@ -0,0 +1,13 @@
+"""Helpers for items read back from DynamoDB, shared by the tools that keep state in its tables."""
+from decimal import Decimal
+
+
+def convert_decimals(obj):
+    """``obj`` with the Decimals boto3 returns for every number turned into ints or floats, for JSON."""
+    if isinstance(obj, list):
+        return [convert_decimals(i) for i in obj]
+    elif isinstance(obj, dict):
+        return {k: convert_decimals(v) for k, v in obj.items()}
+    elif isinstance(obj, Decimal):
+        return float(obj) if obj % 1 else int(obj)
+    return obj
@@ -0,0 +1,11 @@
+"""Keys marking the events this function receives from something other than API Gateway.
+
+They live here, apart from the code that handles them, so the router can recognise an event
+without importing (and paying the cold start of) the module that runs it.
+"""
+
+# An asynchronous self-invocation that runs one compression job.
+JOB_EVENT_KEY = "royalty_compressor_job"
+
+# The EventBridge schedule that runs the storage janitor.
+JANITOR_EVENT_KEY = "storage_janitor"
@@ -0,0 +1,215 @@
+"""Per-invocation timing and memory metrics, emitted as CloudWatch Embedded Metric Format.
+
+``invocation`` wraps one request and prints a single EMF JSON line when it ends; CloudWatch turns
+that line into metrics without any API calls. Code on the request path marks its stages with
+``stage``; stages nest, and each reports its own (exclusive) wall time, so the stages of a request
+add up to its duration. Re-entering a stage (once per chunk, say) accumulates into it.
+
+Set METRICS_ENABLED=false to turn all of this into no-ops.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import resource
+import sys
+import time
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "MiniTools")
+
+_current = contextvars.ContextVar("metrics_invocation", default=None)
+
+# Flipped by the first invocation in this container.
+_cold_start = True
+
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets the VmHWM high-water mark (Linux 4.0+).
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _Frame:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.child_seconds = 0.0
+        self.peak = 0
+
+
+class Invocation:
+    def __init__(self, route, cold_start):
+        self.route = route
+        self.cold_start = cold_start
+        self.properties = {}
+        self.counts = {}
+        self.stages = {}
+        self._stack = []
+
+    def set_property(self, name, value):
+        self.properties[name] = value
+
+    def _enter(self, name):
+        if self._stack:
+            parent = self._stack[-1]
+            parent.peak = max(parent.peak, _peak_rss())
+        _reset_peak_rss()
+        frame = _Frame(name)
+        self._stack.append(frame)
+        return frame
+
+    def _exit(self, frame):
+        elapsed = time.perf_counter() - frame.started
+        frame.peak = max(frame.peak, _peak_rss())
+        self._stack.pop()
+        if self._stack:
+            parent = self._stack[-1]
+            parent.child_seconds += elapsed
+            parent.peak = max(parent.peak, frame.peak)
+
+        stage = self.stages.setdefault(frame.name, {"seconds": 0.0, "peak": 0, "count": 0})
+        stage["seconds"] += elapsed - frame.child_seconds
+        stage["peak"] = max(stage["peak"], frame.peak)
+        stage["count"] += 1
+        return elapsed, frame.peak
+
+    def emit(self, duration, peak):
+        metrics = [
+            {"Name": "Duration", "Unit": "Milliseconds"},
+            {"Name": "PeakMemory", "Unit": "Megabytes"},
+            {"Name": "ColdStart", "Unit": "Count"}
+        ]
+        record = {
+            "Route": self.route,
+            "Duration": round(duration * 1000, 2),
+            "PeakMemory": round(peak / 2 ** 20, 1),
+            "ColdStart": int(self.cold_start)
+        }
+        for name, stage in self.stages.items():
+            metrics.append({"Name": f"{name}.Duration", "Unit": "Milliseconds"})
+            metrics.append({"Name": f"{name}.PeakMemory", "Unit": "Megabytes"})
+            record[f"{name}.Duration"] = round(stage["seconds"] * 1000, 2)
+            record[f"{name}.PeakMemory"] = round(stage["peak"] / 2 ** 20, 1)
+            record[f"{name}.Count"] = stage["count"]
+
+        for name, value in self.counts.items():
+            metrics.append({"Name": name, "Unit": "Count"})
+            record[name] = value
+
+        record.update(self.properties)
+        record["_aws"] = {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [["Route"]],
+                "Metrics": metrics
+            }]
+        }
+        print(json.dumps(record))
+
+
+@contextlib.contextmanager
+def invocation(route):
+    """Measure one request to ``route`` and emit its metrics when it finishes."""
+    global _cold_start
+    if not METRICS_ENABLED:
+        yield None
+        return
+
+    current = Invocation(route, _cold_start)
+    _cold_start = False
+    token = _current.set(current)
+    frame = current._enter("handler")
+    try:
+        yield current
+    finally:
+        duration, peak = current._exit(frame)
+        _current.reset(token)
+        try:
+            current.emit(duration, peak)
+        except Exception as e:
+            print("❌ Could not emit metrics:", str(e))
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Attribute the time and memory of the enclosed block to ``name`` in the current invocation.
+
+    Outside an invocation (or on a worker thread, which does not inherit it) this does nothing.
+    """
+    current = _current.get()
+    if current is None:
+        yield
+        return
+
+    frame = current._enter(name)
+    try:
+        yield
+    finally:
+        current._exit(frame)
+
+
+class StageTotal:
+    """Time for stage ``name`` gathered from many short calls, for loops too hot for ``stage``.
+
+    ``stage`` samples memory on the way in and out, a few syscalls each; ``add`` only does
+    arithmetic. Each ``add`` is still taken out of the enclosing stage, and ``flush`` records the
+    total as one entry of ``name``. Memory is not sampled.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self._invocation = None
+
+    def add(self, seconds):
+        current = _current.get()
+        if current is None:
+            return
+        if current._stack:
+            current._stack[-1].child_seconds += seconds
+        self.seconds += seconds
+        self._invocation = current
+
+    def flush(self):
+        if self._invocation is not None and self.seconds:
+            stage = self._invocation.stages.setdefault(self.name, {"seconds": 0.0, "peak": 0, "count": 0})
+            stage["seconds"] += self.seconds
+            stage["count"] += 1
+        self.seconds = 0.0
+
+
+def count(name, value=1):
+    """Add ``value`` to counter metric ``name`` for the current invocation."""
+    current = _current.get()
+    if current is not None:
+        current.counts[name] = current.counts.get(name, 0) + value
+
+
+def timed_iter(iterable, name):
+    """Yield from ``iterable``, counting the time spent producing each item as stage ``name``."""
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
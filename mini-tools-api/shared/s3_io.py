@@ -0,0 +1,261 @@
+import io
+import os
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from shared import metrics
+
+# S3 requires every part but the last to be at least 5 MB.
+MIN_PART_SIZE = 5 * 1024 * 1024
+PART_SIZE = max(int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024))), MIN_PART_SIZE)
+UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", "4"))
+
+CSV_ROWS_PER_WRITE = 50000
+XLSX_ROWS_PER_SLICE = 10000
+
+READ_BUFFER_SIZE = 1024 * 1024
+
+DOWNLOAD_URL_EXPIRY = 3600
+
+
+class StreamingBodyReader(io.RawIOBase):
+    """Raw binary stream over an S3 StreamingBody that counts the bytes pulled from S3.
+
+    Time spent waiting on S3 is summed over the reads and recorded as one ``s3_fetch`` entry when
+    the stream ends or is closed; a ``metrics.stage`` around every read would cost more than the read.
+    """
+
+    def __init__(self, body):
+        self._body = body
+        self.bytes_read = 0
+        self._fetch = metrics.StageTotal("s3_fetch")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        started = time.perf_counter()
+        data = self._body.read(len(buffer))
+        self._fetch.add(time.perf_counter() - started)
+        size = len(data)
+        buffer[:size] = data
+        self.bytes_read += size
+        if not size:
+            self._fetch.flush()
+        return size
+
+    def close(self):
+        self._fetch.flush()
+        super().close()
+
+
+def open_s3_stream(s3, bucket, key, **get_args):
+    """Buffered binary file over an S3 object, read off the wire as the caller consumes it."""
+    s3_object = s3.get_object(Bucket=bucket, Key=key, **get_args)
+    return io.BufferedReader(StreamingBodyReader(s3_object["Body"]), buffer_size=READ_BUFFER_SIZE)
+
+
+def download_to_tempfile(s3, bucket, key):
+    """Copy an S3 object to a local temporary file, for formats that need random access.
+
+    The file is deleted when it is closed or garbage collected.
+    """
+    local_copy = tempfile.NamedTemporaryFile()
+    with metrics.stage("s3_fetch"):
+        s3.download_fileobj(bucket, key, local_copy)
+    local_copy.flush()
+    local_copy.seek(0)
+    return local_copy
+
+
+def presigned_download_url(s3, bucket, key):
+    return s3.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": bucket, "Key": key},
+        ExpiresIn=DOWNLOAD_URL_EXPIRY,
+    ).replace("host.docker.internal", "localhost")
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """Binary file-like object that streams everything written to it into one S3 object.
+
+    Data is buffered into parts that are uploaded on a thread pool while the caller
+    keeps producing, so serialization and upload overlap. At most ``UPLOAD_WORKERS``
+    parts are in flight at once, which bounds memory to a few part buffers no matter
+    how large the object gets. Objects smaller than one part go up with a single
+    ``put_object``. With ``compress="gzip"`` the bytes are gzip-compressed on the way.
+    """
+
+    def __init__(self, s3, bucket, key, content_type=None, metadata=None, compress=None,
+                 part_size=PART_SIZE, max_workers=UPLOAD_WORKERS):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.bytes_written = 0
+        self._extra_args = {}
+        if content_type:
+            self._extra_args["ContentType"] = content_type
+        if metadata:
+            self._extra_args["Metadata"] = metadata
+        self._compressor = zlib.compressobj(wbits=31) if compress == "gzip" else None
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._pending = []
+        self._max_workers = max_workers
+        self._executor = None
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.bytes_written
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed S3MultipartWriter")
+        size = len(data)
+        self.bytes_written += size
+        if self._compressor:
+            data = self._compressor.compress(data)
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._submit_part(part)
+        return size
+
+    def _submit_part(self, data):
+        # Only the time spent blocked on S3 counts as upload; parts in flight overlap other stages.
+        with metrics.stage("upload"):
+            if self._upload_id is None:
+                response = self.s3.create_multipart_upload(Bucket=self.bucket, Key=self.key, **self._extra_args)
+                self._upload_id = response["UploadId"]
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+
+            # Wait for the oldest part once the pool is saturated so buffers don't pile up.
+            while len(self._pending) >= self._max_workers:
+                self._parts.append(self._pending.pop(0).result())
+
+        part_number = len(self._parts) + len(self._pending) + 1
+        # The task gets no reference to the writer, so a writer dropped mid-upload is collected
+        # (and aborted) on the caller's thread rather than on a pool thread that cannot shut the pool down.
+        self._pending.append(self._executor.submit(
+            _upload_part, self.s3, self.bucket, self.key, self._upload_id, part_number, data
+        ))
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._compressor:
+                self._buffer += self._compressor.flush()
+                self._compressor = None
+
+            with metrics.stage("upload"):
+                if self._upload_id is None:
+                    # The buffer goes as is; copying it to bytes would hold the object twice.
+                    self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=self._buffer, **self._extra_args)
+                else:
+                    if self._buffer:
+                        self._submit_part(bytes(self._buffer))
+                    self._parts.extend(future.result() for future in self._pending)
+                    self._pending = []
+                    self.s3.complete_multipart_upload(
+                        Bucket=self.bucket,
+                        Key=self.key,
+                        UploadId=self._upload_id,
+                        MultipartUpload={"Parts": sorted(self._parts, key=lambda part: part["PartNumber"])}
+                    )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            if self._executor:
+                self._executor.shutdown(wait=True)
+            super().close()
+
+    def abort(self):
+        """Drop everything written so far. Safe to call more than once."""
+        for future in self._pending:
+            future.cancel()
+        self._pending = []
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+        self._buffer = bytearray()
+        if not self.closed:
+            super().close()
+
+    def __del__(self):
+        # An unclosed writer was never finished, so its data must not become an object.
+        if not self.closed:
+            try:
+                self.abort()
+            except Exception:
+                pass
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+
+def _upload_part(s3, bucket, key, upload_id, part_number, data):
+    response = s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=data)
+    return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+
+def write_csv(df, writer, rows_per_write=CSV_ROWS_PER_WRITE):
+    """Serialize ``df`` into ``writer`` a slice at a time instead of building one big string."""
+    if df.empty:
+        with metrics.stage("serialize"):
+            writer.write(df.to_csv(index=False).encode("utf-8"))
+        return
+
+    for start in range(0, len(df), rows_per_write):
+        chunk = df.iloc[start:start + rows_per_write]
+        # Writes that block on a full upload pool are counted as upload, not serialize.
+        with metrics.stage("serialize"):
+            writer.write(chunk.to_csv(index=False, header=start == 0).encode("utf-8"))
+
+
+def write_xlsx(df, writer, sheet_name="Sheet1"):
+    """Serialize ``df`` as an Excel workbook into ``writer`` with a write-only openpyxl workbook.
+
+    Rows are streamed to the sheet instead of being held as cell objects, so memory stays flat
+    however many rows there are. The header is styled the way ``DataFrame.to_excel`` styles it.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    with metrics.stage("serialize"):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(sheet_name)
+
+        side = Side(style="thin")
+        header = []
+        for col in df.columns:
+            cell = WriteOnlyCell(sheet, value=str(col))
+            cell.font = Font(bold=True)
+            cell.border = Border(left=side, right=side, top=side, bottom=side)
+            cell.alignment = Alignment(horizontal="center", vertical="top")
+            header.append(cell)
+        sheet.append(header)
+
+        for start in range(0, len(df), XLSX_ROWS_PER_SLICE):
+            chunk = df.iloc[start:start + XLSX_ROWS_PER_SLICE]
+            # Missing values become empty cells, as they do with to_excel.
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                sheet.append(row)
+
+        workbook.save(writer)
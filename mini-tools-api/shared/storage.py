@@ -0,0 +1,36 @@
+"""Where uploads and generated reports live in the bucket.
+
+Both are filed under a UTC date partition, ``<prefix><YYYY-MM-DD>/<name>``, so everything written
+on one day can be listed, and expired, as a single prefix. The Parquet cache mirrors upload keys
+(``parquet/uploads/<day>/...``) and so inherits the same layout.
+"""
+import re
+from datetime import datetime, timezone
+
+UPLOADS_PREFIX = "uploads/"
+REPORTS_PREFIX = "processed_reports/"
+
+PARTITION_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def partition(when=None):
+    """Date partition (``YYYY-MM-DD``, UTC) for ``when``, a datetime, or now."""
+    return (when or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+
+def dated_key(prefix, name, when=None):
+    return f"{prefix}{partition(when)}/{name}"
+
+
+def upload_key(name, when=None):
+    return dated_key(UPLOADS_PREFIX, name, when)
+
+
+def report_key(name, when=None):
+    return dated_key(REPORTS_PREFIX, name, when)
+
+
+def partition_day(common_prefix, prefix):
+    """The ``YYYY-MM-DD`` of a listed partition prefix under ``prefix``, or None for anything else."""
+    day = common_prefix[len(prefix):].rstrip("/")
+    return day if PARTITION_PATTERN.match(day) else None
@@ -0,0 +1,95 @@
+"""AWS for the tests: moto in-process for most of them, a moto server for code that runs in other processes.
+
+Both start from an empty account with the upload bucket and the DynamoDB tables the handlers use.
+"""
+import os
+import socket
+import pytest
+
+# Never reach a real account, and keep EMF lines out of the test output.
+os.environ.update({
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "METRICS_ENABLED": "false"
+})
+
+from moto import mock_aws  # noqa: E402
+from shared import aws  # noqa: E402
+
+BUCKET = os.getenv("UPLOAD_BUCKET", "mini-tools")
+SESSION_TABLE = os.getenv("SESSION_TABLE_NAME", "Sessions")
+USAGE_TABLE = os.getenv("USAGE_TABLE_NAME", "UsageEvents")
+ENDPOINT_VARIABLES = ["S3_ENDPOINT", "DYNAMODB_ENDPOINT"]
+
+
+class Context:
+    aws_request_id = "test-request"
+
+
+def create_resources():
+    aws.client("s3").create_bucket(Bucket=BUCKET)
+    dynamodb = aws.client("dynamodb")
+    for table in (SESSION_TABLE, USAGE_TABLE):
+        key_schema = [{"AttributeName": "sessionId", "KeyType": "HASH"}]
+        attributes = [{"AttributeName": "sessionId", "AttributeType": "S"}]
+        if table == USAGE_TABLE:
+            key_schema.append({"AttributeName": "eventId", "KeyType": "RANGE"})
+            attributes.append({"AttributeName": "eventId", "AttributeType": "S"})
+        dynamodb.create_table(
+            TableName=table,
+            KeySchema=key_schema,
+            AttributeDefinitions=attributes,
+            BillingMode="PAY_PER_REQUEST"
+        )
+
+
+@pytest.fixture
+def context():
+    return Context()
+
+
+@pytest.fixture
+def mocked_aws():
+    """moto in this process; clients built during the test talk to it."""
+    for variable in ENDPOINT_VARIABLES:
+        os.environ.pop(variable, None)
+    with mock_aws():
+        aws._forget_clients()
+        create_resources()
+        yield
+    aws._forget_clients()
+
+
+@pytest.fixture(scope="session")
+def moto_server():
+    from moto.server import ThreadedMotoServer
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def server_aws(moto_server):
+    """A moto server reached over HTTP, so worker processes see the same account as the test.
+
+    Workers start from a fork server that keeps the environment it was started with, so every
+    test using this fixture shares the one server.
+    """
+    import requests
+
+    for variable in ENDPOINT_VARIABLES:
+        os.environ[variable] = moto_server
+    requests.post(f"{moto_server}/moto-api/reset")
+    aws._forget_clients()
+    create_resources()
+    yield
+    aws._forget_clients()
+    for variable in ENDPOINT_VARIABLES:
+        os.environ.pop(variable, None)
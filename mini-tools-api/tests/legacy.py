@@ -0,0 +1,121 @@
+"""The implementations the vectorized code replaced, kept verbatim as the reference it must match."""
+import pandas as pd
+
+
+def iterrows_convert(df):
+    """The conversion loop from streamlit-apps/app_mri_converter.py, before vectorization."""
+    formatted_rows = []
+    for _, row in df.iterrows():
+        i = 1
+        while f"Recording {i} Display Artist" in row and row[f"Recording {i} Display Artist"] != "":
+            song_data = {"SONG TITLE*": row["Song Title"],
+                    "AKA TITLE": "",
+                    "MRI SONG ID": "",
+                    "PUBLISHER'S SONG ID": "",
+                    "ISWC": ""}
+
+            if f"Composer {i} Surname" in row:
+                song_data["COMPOSER LAST NAME*"] = row[f"Composer {i} Surname"]
+                song_data["COMPOSER FIRST NAME*"] = row[f"Composer {i} First Name"]
+                song_data["COMPOSER MIDDLE NAME"] = row[f"Composer {i} Middle Name"]
+                song_data["COMPOSER PRO"] = ""
+                song_data["COMPOSER IPI NUMBER"] = ""
+                song_data["CONTROLLED COMPOSER (Y/N)*"] = row[f"Composer {i} Controlled"]
+                song_data["COMPOSER SHARE %*"] = row[f"Composer {i} Share"]
+                song_data["COMPOSER ROLE CODE"] = row[f"Composer {i} Capacity"]
+            else:
+                song_data["COMPOSER LAST NAME*"] = ""
+                song_data["COMPOSER FIRST NAME*"] = ""
+                song_data["COMPOSER MIDDLE NAME"] = ""
+                song_data["COMPOSER PRO"] = ""
+                song_data["COMPOSER IPI NUMBER"] = ""
+                song_data["CONTROLLED COMPOSER (Y/N)*"] = ""
+                song_data["COMPOSER SHARE %*"] = ""
+                song_data["COMPOSER ROLE CODE"] = ""
+
+            if f"Publisher {i} Name" in row:
+                song_data["PUBLISHER NAME *"] = row[f"Publisher {i} Name"]
+                song_data["PUBLISHER PRO*"] = ""
+                song_data["PUBLISHER IPI NUMBER *"] = ""
+                song_data["CONTROLLED PUBLISHER (Y/N)*"] = row[f"Publisher {i} Controlled"]
+            else:
+                song_data["PUBLISHER NAME *"] = ""
+                song_data["PUBLISHER PRO*"] = ""
+                song_data["PUBLISHER IPI NUMBER *"] = ""
+                song_data["CONTROLLED PUBLISHER (Y/N)*"] = ""
+
+            if f"Client {i} Name" in row:
+                song_data["ADMINISTRATOR NAME"] = row[f"Client {i} Name"]
+                song_data["SHARE %*"] = row[f"Publisher {i} Share"]
+                song_data["TERRITORY CONTROLLED*"] = row[f"Territory {i} Name"]
+                song_data["TERRITORY EXCLUSIONS (OPTIONAL)"] = ""
+                song_data["PUBLISHER MAILING ADDRESS*"] = ""
+                song_data["PUBLISHER CONTACT*"] = ""
+            else:
+                song_data["ADMINISTRATOR NAME"] = ""
+                song_data["SHARE %*"] = ""
+                song_data["TERRITORY CONTROLLED*"] = ""
+                song_data["TERRITORY EXCLUSIONS (OPTIONAL)"] = ""
+                song_data["PUBLISHER MAILING ADDRESS*"] = ""
+                song_data["PUBLISHER CONTACT*"] = ""
+
+            if f"Recording {i} Display Artist" in row:
+                song_data["RECORDING ARTIST NAME"] = row[f"Recording {i} Display Artist"]
+                song_data["RECORDING LABEL"] = row[f"Recording {i} Label Name"]
+                song_data["RECORDING ISRC"] = row[f"Recording {i} ISRC"]
+                song_data["UPC/EAN"] = row[f"Recording {i} UPC"]
+            else:
+                song_data["RECORDING ARTIST NAME"] = ""
+                song_data["RECORDING LABEL"] = ""
+                song_data["RECORDING ISRC"] = ""
+                song_data["UPC/EAN"] = ""
+
+            formatted_rows.append(song_data)
+            i += 1
+
+    return pd.DataFrame(formatted_rows)
+
+
+def split_name(name):
+    """The per-name splitter from streamlit-apps/app_muma_writer_name_split.py, before vectorization."""
+    if pd.isna(name) or name.strip() == "":
+        return "", "", ""
+
+    parts = name.split()
+    if len(parts) == 2:
+        return parts[0], "", parts[1]  # First Name, Empty Middle Name, Last Name
+    elif len(parts) > 2:
+        return parts[0], parts[1], " ".join(parts[2:])  # First Name, Middle Name, Last Name
+    else:
+        return name, "", ""  # Only First Name, others empty
+
+
+def split_composer_names(df):
+    """The column splitter from streamlit-apps/app_muma_writer_name_split.py, before vectorization."""
+    updated_df = df.copy()  # Copy original DataFrame
+    column_positions = {}
+
+    # Identify "Composer x Name" columns
+    for idx, col in enumerate(df.columns):
+        if "Composer" in col and "Name" in col:
+            composer_number = col.split()[1]  # Extract composer number (e.g., "1", "2", etc.)
+            column_positions[col] = idx  # Store original position
+
+    # Process each Composer column and insert new columns
+    for col, idx in sorted(column_positions.items(), key=lambda x: x[1], reverse=True):
+        composer_number = col.split()[1]
+        expanded_values = df[col].apply(split_name).apply(pd.Series)
+        expanded_values.columns = [
+            f"Composer {composer_number} First Name",
+            f"Composer {composer_number} Middle Name",
+            f"Composer {composer_number} Surname"
+        ]
+
+        # Insert new columns in the correct position
+        for i, new_col in enumerate(expanded_values.columns):
+            updated_df.insert(idx + i, new_col, expanded_values.iloc[:, i])
+
+        # Drop the original "Composer x Name" column
+        updated_df.drop(columns=[col], inplace=True)
+
+    return updated_df
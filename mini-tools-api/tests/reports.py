@@ -0,0 +1,80 @@
+"""Small synthetic inputs for the tests, independent of the benchmark harness."""
+import csv
+import io
+import random
+from royalty_compressor.schema import SUM_COLUMNS
+from shared.s3_io import write_csv
+
+TEXT_COLUMNS = ["Adjustment Type", "Asset ID", "Asset Title", "Asset Labels", "UPC", "Country", "Channel ID"]
+
+MUMA_SONG_FIELDS = ["Song Title", "Song ISWC", "Song Language"]
+MUMA_SLOT_FIELDS = [
+    "Composer {i} Surname", "Composer {i} First Name", "Composer {i} Middle Name", "Composer {i} Controlled",
+    "Composer {i} Share", "Composer {i} Capacity", "Publisher {i} Name", "Publisher {i} Controlled",
+    "Publisher {i} Share", "Client {i} Name", "Territory {i} Name", "Recording {i} Display Artist",
+    "Recording {i} Label Name", "Recording {i} ISRC", "Recording {i} UPC"
+]
+
+
+def to_csv_bytes(df):
+    """``df`` serialized the way the handlers write reports."""
+    output = io.BytesIO()
+    write_csv(df, output)
+    return output.getvalue()
+
+
+def report_bytes(rows, assets, seed=0, preamble=True):
+    """An Asset Summary with YouTube's spelling quirks, blanks in most columns and leading-zero UPCs."""
+    rng = random.Random(seed)
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    if preamble:
+        output.write("Asset Summary,Report period 2026-09\n")
+    # Headers carry non-breaking spaces and padding like real exports.
+    writer.writerow([col.replace(" ", "\u00A0", 1) + " " * (i % 2) for i, col in enumerate(TEXT_COLUMNS + SUM_COLUMNS)])
+
+    for _ in range(rows):
+        asset = min(int(rng.paretovariate(1.2)) - 1, assets - 1) if rng.random() < 0.5 else rng.randrange(assets)
+        row = [
+            "" if rng.random() < 0.9 else "Adjustment",
+            f"A{asset:06d}",
+            "" if rng.random() < 0.1 else f"Song {asset}, Pt. {asset % 3}",
+            rng.choice(["Label One", "Label Two", ""]),
+            "" if asset % 4 == 0 else f"{asset * 7919:012d}",
+            rng.choice(["US", "GB", "DE", "BR"]),
+            f"UC{rng.randrange(20):022d}"
+        ]
+        for col in SUM_COLUMNS:
+            if rng.random() < 0.15:
+                row.append("")
+            elif "Views" in col:
+                row.append(str(rng.randrange(1000)))
+            else:
+                row.append(f"{rng.expovariate(20):.6f}")
+        writer.writerow(row)
+    return output.getvalue().encode("utf-8")
+
+
+def muma_csv(songs, slots, seed=0):
+    """A MuMa export where each song fills a random number of leading slots."""
+    rng = random.Random(seed)
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(MUMA_SONG_FIELDS + [field.format(i=i) for i in range(1, slots + 1) for field in MUMA_SLOT_FIELDS])
+    for song in range(songs):
+        filled = rng.randint(0, slots)
+        row = [f"Song {song}", f"T-{song:09d}", rng.choice(["EN", "ES", ""])]
+        for i in range(1, slots + 1):
+            if i > filled:
+                row += [""] * len(MUMA_SLOT_FIELDS)
+                continue
+            row += [
+                f"Surname {rng.randrange(500)}", f"First {rng.randrange(50)}", rng.choice(["", "M"]),
+                rng.choice(["Y", "N"]), str(rng.choice([25, 50, 100])), rng.choice(["CA", "C", "A"]),
+                f"Publisher {rng.randrange(30)}", rng.choice(["Y", "N"]), str(rng.choice([50, 100])),
+                f"Client {rng.randrange(5)}", rng.choice(["World", "US", "GB"]), f"Artist {rng.randrange(200)}",
+                f"Label {rng.randrange(10)}", f"US{rng.randrange(10 ** 10):010d}", f"{rng.randrange(10 ** 12):012d}"
+            ]
+        writer.writerow(row)
+    output.seek(0)
+    return output
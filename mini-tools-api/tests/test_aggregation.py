@@ -0,0 +1,24 @@
+"""Compressing a report must not depend on how it was split into chunks."""
+import pytest
+from royalty_compressor.aggregation import compress_buffer
+from tests.reports import report_bytes, to_csv_bytes
+
+
+@pytest.fixture(scope="module")
+def report():
+    return report_bytes(rows=1000, assets=30, seed=3)
+
+
+@pytest.mark.parametrize("chunk_size", [11, 60, 333, 999])
+def test_chunk_size_does_not_change_output(report, chunk_size):
+    assert to_csv_bytes(compress_buffer(report, chunk_size=chunk_size)) == to_csv_bytes(compress_buffer(report))
+
+
+def test_revenue_sums_are_rounded():
+    data = (
+        "Asset ID,Partner Revenue,Owned Views\n"
+        + "".join(f"A1,{value},1\n" for value in ["0.1", "0.2", "0.087207", "0.1"])
+    ).encode("utf-8")
+    expected = b"Asset ID,Owned Views,Partner Revenue\nA1,4,0.487207\n"
+    for chunk_size in (1, 2, 4):
+        assert to_csv_bytes(compress_buffer(data, chunk_size=chunk_size)) == expected
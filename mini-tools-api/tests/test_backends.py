@@ -0,0 +1,100 @@
+"""Every COMPRESS_BACKEND must write byte-for-byte the report the pandas backend writes."""
+import multiprocessing
+import pytest
+from royalty_compressor import backends, batch
+from royalty_compressor.aggregation import compress_buffer
+from shared import aws
+from tests.conftest import BUCKET
+from tests.reports import report_bytes, to_csv_bytes
+
+OTHER_BACKENDS = ["polars", "duckdb"]
+
+HEADER = (
+    "Adjustment Type,Asset ID,Asset Title,Asset Labels,Country,UPC,ISRC,"
+    "Owned Views,Monetized Views,Partner Revenue,Partner Revenue : Auction\n"
+)
+
+# Blanks in text, views and revenue; the same asset under different categoricals; UPCs whose
+# leading zeros must survive; revenue that only sums exactly with compensated summation.
+ROWS = [
+    ",A1,Song One,Label A,US,012345678905,USAB10000001,10,7,0.1,0.05",
+    "Credit,A2,,Label B,GB,000000000017,,3,,0.2,",
+    ",A1,Song One,,DE,012345678905,USAB10000001,,2,0.7,0.3",
+    "Debit,A3,Song Three,Label A,US,,,1,1,0.000001,0.000001",
+    ",A2,Song Two,Label B,FR,000000000017,USAB10000002,5,5,1e-17,0.1",
+    ",A1,,Label A,US,,,4,4,0.3,0.3",
+]
+
+
+def report(rows, preamble=True):
+    text = ("Asset Summary,,,\n" if preamble else "") + HEADER + "\n".join(rows) + "\n"
+    return text.encode("utf-8")
+
+
+def compress_with(backend, data, chunk_size):
+    previous = backends.COMPRESS_BACKEND
+    backends.COMPRESS_BACKEND = backend
+    try:
+        return to_csv_bytes(compress_buffer(data, chunk_size=chunk_size))
+    finally:
+        backends.COMPRESS_BACKEND = previous
+
+
+@pytest.fixture(params=OTHER_BACKENDS)
+def backend(request):
+    pytest.importorskip(request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 4, 250000])
+@pytest.mark.parametrize("rows", [
+    ROWS,
+    # One non-numeric revenue value makes the typed parse fail and the report is re-read leniently.
+    ROWS + [",A3,Song Three,Label A,US,,,2,2,N/A,0.4"],
+], ids=["typed", "lenient"])
+def test_matches_pandas(backend, rows, chunk_size):
+    data = report(rows)
+    expected = compress_with("pandas", data, chunk_size)
+    assert compress_with(backend, data, chunk_size) == expected
+
+
+def test_keeps_leading_zeros_and_fills_blanks(backend):
+    output = compress_with(backend, report(ROWS), chunk_size=2).decode("utf-8")
+    assert "012345678905" in output
+    assert "000000000017" in output
+    assert output.splitlines()[1].split(",")[1] == "None"
+
+
+def test_generated_report_matches_pandas(backend):
+    data = report_bytes(rows=5000, assets=300, seed=7)
+    assert compress_with(backend, data, chunk_size=700) == compress_with("pandas", data, chunk_size=700)
+
+
+def test_forked_process_builds_its_own_backend(backend):
+    parent = backends.get_backend(backend)
+    context = multiprocessing.get_context("fork")
+    receive, send = context.Pipe(duplex=False)
+    process = context.Process(target=lambda: send.send(list(backends._instances)))
+    process.start()
+    inherited = receive.recv()
+    process.join()
+    assert inherited == []
+    assert backends._instances[backend] is parent
+
+
+def test_batch_workers_match_pandas(backend, server_aws):
+    for seed in range(2):
+        aws.client("s3").put_object(Bucket=BUCKET, Key=f"uploads/r{seed}.csv", Body=report_bytes(300, 30, seed=seed))
+    keys = ["uploads/r0.csv", "uploads/r1.csv"]
+
+    def frames(name):
+        previous = backends.COMPRESS_BACKEND
+        backends.COMPRESS_BACKEND = name
+        try:
+            results, frames = batch.compress_in_parallel(keys, name, {"use_cache": False}, merge=True)
+        finally:
+            backends.COMPRESS_BACKEND = previous
+        assert not any("error" in result for result in results)
+        return [to_csv_bytes(frame) for frame in frames]
+
+    assert frames(backend) == frames("pandas")
@@ -0,0 +1,90 @@
+"""Batches compress each report in a worker process; every backend must work there, call after call."""
+import json
+import multiprocessing
+import signal
+from contextlib import contextmanager
+import pytest
+from royalty_compressor import backends, handlers
+from shared import aws
+from tests.conftest import BUCKET
+from tests.reports import report_bytes
+
+BACKENDS = ["pandas", "polars", "duckdb"]
+
+# A worker that deadlocks never answers; fail the test instead of waiting for it.
+BATCH_TIMEOUT_SECONDS = 60
+
+
+@contextmanager
+def deadline(seconds):
+    def expire(signum, frame):
+        # Stuck workers would also keep the test run from exiting.
+        for process in multiprocessing.active_children():
+            process.kill()
+        raise TimeoutError(f"Batch did not finish within {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.alarm(seconds)
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    if request.param != "pandas":
+        pytest.importorskip(request.param)
+    previous = backends.COMPRESS_BACKEND
+    backends.COMPRESS_BACKEND = request.param
+    yield request.param
+    backends.COMPRESS_BACKEND = previous
+
+
+@pytest.fixture
+def uploads(server_aws):
+    keys = []
+    for seed in range(3):
+        key = f"uploads/2026-10-18/report_{seed}.csv"
+        aws.client("s3").put_object(Bucket=BUCKET, Key=key, Body=report_bytes(rows=400, assets=40, seed=seed))
+        keys.append(key)
+    return keys
+
+
+def call(route, body, context):
+    with deadline(BATCH_TIMEOUT_SECONDS):
+        response = route({"body": json.dumps(dict(body, use_cache=False))}, context)
+    assert response["statusCode"] == 200, response["body"]
+    return json.loads(response["body"])
+
+
+def read(key):
+    return aws.client("s3").get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+def test_batches_in_a_row(backend, uploads, context):
+    # The first merged batch runs the rollup in this process, so later workers start after it.
+    outputs = []
+    for _ in range(2):
+        response = call(handlers.compress_batch, {"s3_keys": uploads, "merge": True}, context)
+        assert [result["input_key"] for result in response["results"]] == uploads
+        assert not any("error" in result for result in response["results"])
+        outputs.append(read(response["combined"]["output_key"]))
+    assert outputs[0] == outputs[1]
+
+
+def test_batch_after_single_compression(backend, uploads, context):
+    single = call(handlers.compress_report, {"s3_key": uploads[0]}, context)
+    response = call(handlers.compress_batch, {"s3_keys": uploads[:1]}, context)
+    assert read(response["results"][0]["output_key"]) == read(single["output_key"])
+
+
+def test_batch_answers_queries_that_do_not_fit_with_400(uploads, context):
+    with deadline(BATCH_TIMEOUT_SECONDS):
+        response = handlers.compress_batch({"body": json.dumps({
+            "s3_keys": uploads[:2], "columns": ["Label", "Owned Views"]
+        })}, context)
+    assert response["statusCode"] == 400
+    error = json.loads(response["body"])["error"]
+    assert all(f"{key}: Columns not in report: Label" in error for key in uploads[:2])
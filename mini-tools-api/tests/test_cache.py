@@ -0,0 +1,174 @@
+"""TTLCache, and the session lookups that read through it."""
+import json
+import pytest
+from session_manager import handlers
+from shared.cache import TTLCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("shared.cache.time.time", clock)
+    return clock
+
+
+def test_hits_and_misses(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", "default") == "default"
+    assert cache.stats() == {
+        "hits": 1, "misses": 2, "hit_rate": 0.3333, "evictions": 0, "size": 1, "maxsize": 10, "ttl_seconds": 60
+    }
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+
+    clock.now += 59.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_expires_at_shortens_the_ttl_but_never_extends_it(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("soon", 1, expires_at=clock.now + 5)
+    cache.set("late", 2, expires_at=clock.now + 3600)
+    cache.set("gone", 3, expires_at=clock.now)
+
+    clock.now += 5
+    assert cache.get("soon") is None
+    assert cache.get("late") == 2
+    assert cache.get("gone") is None
+    clock.now += 55
+    assert cache.get("late") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_setting_again_replaces_the_value_and_deadline(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    clock.now += 50
+    cache.set("a", 2)
+    clock.now += 50
+
+    assert cache.get("a") == 2
+
+
+def test_invalidate_and_clear(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert cache.get("b") is None
+    assert cache.stats()["size"] == 0
+
+
+class CountingTable:
+    """The sessions table, counting the reads that reach DynamoDB."""
+
+    def __init__(self, table):
+        self._table = table
+        self.reads = 0
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+    def get_item(self, **kwargs):
+        self.reads += 1
+        return self._table.get_item(**kwargs)
+
+
+@pytest.fixture
+def sessions(mocked_aws, monkeypatch):
+    handlers.session_cache.clear()
+    counting = CountingTable(handlers.table)
+    monkeypatch.setattr(handlers, "table", counting)
+    yield counting
+    handlers.session_cache.clear()
+
+
+def create_session():
+    return json.loads(handlers.create_session({"body": "{}"})["body"])
+
+
+def test_created_session_is_served_from_the_cache(sessions):
+    session = create_session()
+
+    item = handlers.get_session(session["session_id"])
+
+    assert item["metadata"]["expires_at"] == session["expires_at"]
+    assert sessions.reads == 0
+
+
+def test_cache_miss_reads_once_then_hits(sessions):
+    session = create_session()
+    handlers.session_cache.clear()
+
+    first = handlers.get_session(session["session_id"])
+    second = handlers.get_session(session["session_id"])
+
+    assert first == second
+    assert first["metadata"]["expires_at"] == session["expires_at"]
+    assert sessions.reads == 1
+
+
+def test_missing_sessions_are_not_cached(sessions):
+    assert handlers.get_session("no-such-session") is None
+    assert handlers.get_session("no-such-session") is None
+    assert sessions.reads == 2
+
+
+def test_session_is_cached_no_longer_than_it_lives(sessions, monkeypatch):
+    monkeypatch.setattr(handlers.session_cache, "ttl", 365 * 24 * 60 * 60)
+    session = create_session()
+    handlers.session_cache.clear()
+    handlers.get_session(session["session_id"])
+
+    monkeypatch.setattr("shared.cache.time.time", lambda: session["expires_at"] - 1)
+    handlers.get_session(session["session_id"])
+    assert sessions.reads == 1
+
+    monkeypatch.setattr("shared.cache.time.time", lambda: session["expires_at"])
+    handlers.get_session(session["session_id"])
+    assert sessions.reads == 2
+
+
+def test_track_usage_reads_the_session_from_the_cache(sessions, monkeypatch):
+    session = create_session()
+    monkeypatch.setattr(handlers.stats, "transact_put_with_counters", lambda item: None)
+
+    response = handlers.track_usage(session["session_id"], {"body": json.dumps({"tool_name": "name-splitter"})})
+
+    assert response["statusCode"] == 200
+    assert sessions.reads == 0
@@ -0,0 +1,136 @@
+"""Usage events: ULID keys sort by time, and sessions are read a page at a time by cursor."""
+import json
+import pytest
+from session_manager import events, handlers
+
+# 2024-05-01 12:00:00 UTC, a fixed clock so the ULID prefixes are known.
+NOON = 1714564800
+
+
+@pytest.fixture
+def session_id(mocked_aws):
+    return "session-a"
+
+
+def put(session_id, timestamps, tool_name="royalty-compressor"):
+    items = [
+        events.event_item(session_id, {"timestamp": int(timestamp), "tool_name": tool_name},
+                          timestamp_ms=int(timestamp * 1000))
+        for timestamp in timestamps
+    ]
+    assert events.put_events(items) == []
+    return items
+
+
+def pages(session_id, **kwargs):
+    """Every page of a query, following the cursor to the end."""
+    result = []
+    cursor = None
+    while True:
+        items, cursor = events.query_events(session_id, cursor=cursor, **kwargs)
+        result.append(items)
+        if cursor is None:
+            return result
+
+
+def test_ulids_sort_by_time():
+    timestamps_ms = [0, 1, 999, 1000, NOON * 1000, NOON * 1000 + 1, 2 ** 48 - 1]
+    ulids = [events.new_ulid(timestamp_ms) for timestamp_ms in timestamps_ms]
+
+    assert all(len(ulid) == 26 and set(ulid) <= set(events.ULID_ALPHABET) for ulid in ulids)
+    assert sorted(ulids) == ulids
+    # The random part never reorders different milliseconds, and it keeps one millisecond unique.
+    assert len({events.new_ulid(NOON * 1000) for _ in range(1000)}) == 1000
+    assert max(events.new_ulid(NOON * 1000) for _ in range(100)) < events.new_ulid(NOON * 1000 + 1)
+
+
+def test_ulid_range_covers_whole_seconds():
+    low, high = events.ulid_range(NOON, NOON + 1)
+
+    assert low <= events.new_ulid(NOON * 1000) <= high
+    assert low <= events.new_ulid((NOON + 1) * 1000 + 999) <= high
+    assert events.new_ulid(NOON * 1000 - 1) < low
+    assert events.new_ulid((NOON + 2) * 1000) > high
+    assert events.ulid_range() == ("0" * 26, "Z" * 26)
+
+
+def test_events_come_back_in_time_order(session_id):
+    timestamps = [NOON + offset for offset in (30, 0, 90, 60, 10)]
+    put(session_id, timestamps)
+
+    oldest_first, cursor = events.query_events(session_id, newest_first=False)
+    newest_first, _ = events.query_events(session_id)
+
+    assert cursor is None
+    assert [item["timestamp"] for item in oldest_first] == sorted(timestamps)
+    assert [item["timestamp"] for item in newest_first] == sorted(timestamps, reverse=True)
+
+
+@pytest.mark.parametrize("newest_first", [True, False])
+def test_cursor_walks_every_event_once(session_id, newest_first):
+    items = put(session_id, [NOON + offset for offset in range(23)])
+    put("session-b", [NOON + offset for offset in range(5)])
+
+    result = pages(session_id, limit=5, newest_first=newest_first)
+
+    assert [len(page) for page in result[:4]] == [5, 5, 5, 5]
+    walked = [item["eventId"] for page in result for item in page]
+    expected = sorted(item["eventId"] for item in items)
+    assert walked == (expected[::-1] if newest_first else expected)
+
+
+def test_time_range_and_paging_together(session_id):
+    put(session_id, [NOON + offset for offset in range(0, 600, 10)])
+
+    result = pages(session_id, start=NOON + 100, end=NOON + 199, limit=4, newest_first=False)
+
+    walked = [item["timestamp"] for page in result for item in page]
+    assert walked == list(range(NOON + 100, NOON + 200, 10))
+
+
+def test_page_size_is_clamped(session_id):
+    put(session_id, [NOON + offset for offset in range(events.MAX_PAGE_SIZE + 5)])
+
+    first, cursor = events.query_events(session_id, limit=10_000)
+    smallest, _ = events.query_events(session_id, limit=0)
+
+    assert len(first) == events.MAX_PAGE_SIZE and cursor is not None
+    assert len(smallest) == 1
+
+
+def session_events(session_id, **params):
+    response = handlers.get_session_events(session_id, {name: str(value) for name, value in params.items()})
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_handler_pages_by_cursor(session_id):
+    put(session_id, [NOON + offset for offset in range(7)])
+
+    walked = []
+    params = {"limit": 3, "order": "asc"}
+    while True:
+        status, body = session_events(session_id, **params)
+        assert status == 200
+        walked += [event["timestamp"] for event in body["events"]]
+        if body["next_cursor"] is None:
+            break
+        params["cursor"] = body["next_cursor"]
+
+    assert walked == [NOON + offset for offset in range(7)]
+
+
+def test_handler_filters_by_time(session_id):
+    put(session_id, [NOON - 60, NOON, NOON + 60])
+
+    status, body = session_events(session_id, **{"from": NOON, "to": NOON + 59})
+
+    assert status == 200
+    assert [event["timestamp"] for event in body["events"]] == [NOON]
+
+
+@pytest.mark.parametrize("params", [{"from": "yesterday"}, {"to": "1.5"}, {"limit": "ten"}])
+def test_handler_rejects_non_integer_parameters(session_id, params):
+    status, body = session_events(session_id, **params)
+
+    assert status == 400
+    assert "must be integers" in body["error"]
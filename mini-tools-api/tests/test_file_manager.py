@@ -0,0 +1,447 @@
+"""File manager routes: batch presigning and deletes, multipart uploads and direct uploads."""
+import json
+import pytest
+from urllib.parse import unquote, urlparse
+from file_manager import handlers
+from shared import aws, storage
+from tests.conftest import BUCKET
+
+
+def call(path, body, method="POST"):
+    response = handlers.handle_file({"httpMethod": method, "path": path, "body": json.dumps(body)}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def put(key, data=b"x"):
+    aws.client("s3").put_object(Bucket=BUCKET, Key=key, Body=data)
+
+
+def keys():
+    response = aws.client("s3").list_objects_v2(Bucket=BUCKET)
+    return sorted(item["Key"] for item in response.get("Contents", []))
+
+
+class Recording:
+    """The S3 client, recording the calls made to ``method`` and optionally rewriting their responses."""
+
+    def __init__(self, client, method, respond=None):
+        self._client = client
+        self._method = method
+        self._respond = respond
+        self.calls = []
+
+    def __getattr__(self, name):
+        if name != self._method:
+            return getattr(self._client, name)
+
+        def recorded(**kwargs):
+            self.calls.append(kwargs)
+            response = getattr(self._client, name)(**kwargs)
+            return self._respond(kwargs, response) if self._respond else response
+        return recorded
+
+
+def record(monkeypatch, method, respond=None):
+    recording = Recording(aws.client("s3"), method, respond)
+    monkeypatch.setattr(handlers, "s3", recording)
+    return recording
+
+
+# Batch presigning
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"file_names": []},
+    {"file_names": "report.csv"},
+    {"file_names": ["report.csv", ""]},
+    {"file_names": ["report.csv", 7]},
+    ["report.csv"],
+])
+def test_upload_urls_reject_malformed_file_names(mocked_aws, body):
+    status, response = call("/file-manager/generate-upload-urls", body)
+
+    assert status == 400
+    assert "file_names" in response["error"]
+
+
+def test_upload_urls_reject_duplicates_and_oversized_batches(mocked_aws):
+    status, response = call("/file-manager/generate-upload-urls", {"file_names": ["a.csv", "b.csv", "a.csv"]})
+    assert status == 400
+    assert "Duplicate" in response["error"]
+
+    names = [f"{index}.csv" for index in range(handlers.MAX_BATCH_KEYS + 1)]
+    status, response = call("/file-manager/generate-upload-urls", {"file_names": names})
+    assert status == 400
+    assert str(handlers.MAX_BATCH_KEYS) in response["error"]
+
+    status, response = call("/file-manager/generate-upload-urls", {"file_names": names[:-1]})
+    assert status == 200
+    assert len(response["uploads"]) == handlers.MAX_BATCH_KEYS
+
+
+def test_upload_urls_sign_one_put_per_file(mocked_aws):
+    status, response = call("/file-manager/generate-upload-urls", {"file_names": ["a.csv", "b.csv"]})
+
+    assert status == 200
+    assert [upload["file_name"] for upload in response["uploads"]] == ["a.csv", "b.csv"]
+    for upload in response["uploads"]:
+        assert upload["key"].startswith(storage.UPLOADS_PREFIX)
+        assert upload["key"].endswith("_" + upload["file_name"])
+        assert unquote(urlparse(upload["upload_url"]).path).endswith(upload["key"])
+    # Files signed together share a timestamp, and so a partition.
+    assert len({upload["key"].split("_")[0] for upload in response["uploads"]}) == 1
+
+
+def test_signed_upload_urls_accept_a_put(server_aws):
+    import requests
+
+    status, response = call("/file-manager/generate-upload-urls", {"file_names": ["a.csv", "b.csv"]})
+    assert status == 200
+    for upload in response["uploads"]:
+        assert requests.put(upload["upload_url"], data=upload["file_name"].encode()).status_code == 200
+
+    assert keys() == sorted(upload["key"] for upload in response["uploads"])
+
+
+@pytest.mark.parametrize("body", [{}, {"keys": []}, {"keys": ["a", None]}, {"keys": "a"}, ["a"]])
+def test_download_urls_reject_malformed_keys(mocked_aws, body):
+    status, response = call("/file-manager/download-urls", body)
+
+    assert status == 400
+    assert "keys" in response["error"]
+
+
+def test_download_urls_one_per_key(mocked_aws):
+    status, response = call("/file-manager/download-urls", {"keys": ["uploads/a.csv", "uploads/b.csv"]})
+
+    assert status == 200
+    assert [item["key"] for item in response["download_urls"]] == ["uploads/a.csv", "uploads/b.csv"]
+    assert all(unquote(urlparse(item["download_url"]).path).endswith(item["key"]) for item in response["download_urls"])
+
+    status, response = call("/file-manager/download-urls", {"keys": ["k"] * (handlers.MAX_BATCH_KEYS + 1)})
+    assert status == 400
+
+
+# Batch deletes
+
+@pytest.mark.parametrize("body", [{}, {"keys": []}, {"keys": [""]}, {"keys": [1]}, ["a"]])
+def test_delete_batch_rejects_malformed_keys(mocked_aws, body):
+    status, response = call("/file-manager/delete-batch", body)
+
+    assert status == 400
+    assert "keys" in response["error"]
+
+
+def test_delete_batch_rejects_too_many_keys(mocked_aws, monkeypatch):
+    monkeypatch.setattr(handlers, "MAX_DELETE_KEYS", 3)
+    deletes = record(monkeypatch, "delete_objects")
+
+    status, response = call("/file-manager/delete-batch", {"keys": ["a", "b", "c", "d"]})
+
+    assert status == 400
+    assert "At most 3 keys" in response["error"]
+    assert deletes.calls == []
+
+
+def test_delete_batch_reports_every_key(mocked_aws):
+    for key in ("uploads/a.csv", "uploads/b.csv", "uploads/keep.csv"):
+        put(key)
+
+    status, response = call("/file-manager/delete-batch", {"keys": ["uploads/a.csv", "uploads/b.csv", "uploads/a.csv"]})
+
+    assert status == 200
+    # S3 reports a key that does not exist as deleted too; duplicates are sent once.
+    assert sorted(response["deleted"]) == ["uploads/a.csv", "uploads/b.csv"]
+    assert response["errors"] == []
+    assert keys() == ["uploads/keep.csv"]
+
+
+def test_delete_batch_splits_into_delete_objects_calls(mocked_aws, monkeypatch):
+    monkeypatch.setattr(handlers, "DELETE_BATCH_SIZE", 4)
+    names = [f"uploads/{index}.csv" for index in range(10)]
+    for key in names:
+        put(key)
+    deletes = record(monkeypatch, "delete_objects")
+
+    status, response = call("/file-manager/delete-batch", {"keys": names})
+
+    assert status == 200
+    assert [len(call["Delete"]["Objects"]) for call in deletes.calls] == [4, 4, 2]
+    assert sorted(response["deleted"]) == sorted(names)
+    assert keys() == []
+
+
+def test_delete_batch_returns_per_key_errors(mocked_aws, monkeypatch):
+    for key in ("uploads/a.csv", "uploads/locked.csv"):
+        put(key)
+
+    def deny_locked(request, response):
+        # What S3 answers for a key the caller may not delete.
+        denied = [item for item in response["Deleted"] if "locked" in item["Key"]]
+        return {
+            "Deleted": [item for item in response["Deleted"] if item not in denied],
+            "Errors": [{"Key": item["Key"], "Code": "AccessDenied", "Message": "Access Denied"} for item in denied]
+        }
+    record(monkeypatch, "delete_objects", deny_locked)
+
+    status, response = call("/file-manager/delete-batch", {"keys": ["uploads/a.csv", "uploads/locked.csv"]})
+
+    assert status == 200
+    assert response == {
+        "deleted": ["uploads/a.csv"],
+        "errors": [{"key": "uploads/locked.csv", "code": "AccessDenied", "message": "Access Denied"}]
+    }
+
+
+# Multipart uploads
+
+MIB = 1024 * 1024
+
+
+def create_upload(size, file_name="big.csv"):
+    status, response = call("/file-manager/multipart/create", {"file_name": file_name, "size": size})
+    assert status == 200
+    return response
+
+
+def upload_parts(upload, data):
+    """PUT each part of ``data`` to its presigned URL, as the browser does. Returns the completed parts."""
+    import requests
+
+    numbers = list(range(1, upload["part_count"] + 1))
+    status, signed = call("/file-manager/multipart/sign-parts", {**upload, "part_numbers": numbers})
+    assert status == 200
+    parts = []
+    for part in signed["parts"]:
+        start = (part["part_number"] - 1) * upload["part_size"]
+        response = requests.put(part["upload_url"], data=data[start:start + upload["part_size"]])
+        assert response.status_code == 200
+        parts.append({"part_number": part["part_number"], "etag": response.headers["ETag"]})
+    return parts
+
+
+@pytest.mark.parametrize("body", [
+    {"size": 10},
+    {"file_name": "", "size": 10},
+    {"file_name": "a.csv"},
+    {"file_name": "a.csv", "size": 0},
+    {"file_name": "a.csv", "size": 1.5},
+    {"file_name": "a.csv", "size": True},
+    {"file_name": "a.csv", "size": "10"},
+])
+def test_create_rejects_bad_names_and_sizes(mocked_aws, body):
+    status, _ = call("/file-manager/multipart/create", body)
+
+    assert status == 400
+
+
+def test_create_sizes_parts_to_stay_within_the_part_limit(mocked_aws):
+    small = create_upload(3 * MIB)
+    huge = create_upload(handlers.MAX_PARTS * handlers.DEFAULT_PART_SIZE + 1)
+
+    assert (small["part_size"], small["part_count"]) == (handlers.DEFAULT_PART_SIZE, 1)
+    assert huge["part_size"] == handlers.DEFAULT_PART_SIZE + MIB
+    assert huge["part_count"] <= handlers.MAX_PARTS
+    assert huge["key"].startswith(storage.UPLOADS_PREFIX)
+
+
+@pytest.mark.parametrize("part_numbers", [[], [0], [handlers.MAX_PARTS + 1], [1, "2"], [True], [1, False], None])
+def test_sign_parts_rejects_bad_part_numbers(mocked_aws, part_numbers):
+    upload = create_upload(MIB)
+
+    status, response = call("/file-manager/multipart/sign-parts", {**upload, "part_numbers": part_numbers})
+
+    assert status == 400
+    assert "part_numbers" in response["error"]
+
+
+def test_sign_parts_limits_the_batch(mocked_aws):
+    upload = create_upload(MIB)
+    numbers = list(range(1, handlers.MAX_SIGNED_PARTS + 2))
+
+    status, _ = call("/file-manager/multipart/sign-parts", {**upload, "part_numbers": numbers})
+    assert status == 400
+
+    status, response = call("/file-manager/multipart/sign-parts", {**upload, "part_numbers": numbers[:-1]})
+    assert status == 200
+    assert [part["part_number"] for part in response["parts"]] == numbers[:-1]
+
+
+@pytest.mark.parametrize("path", ["sign-parts", "list-parts", "complete", "abort"])
+def test_upload_routes_need_key_and_upload_id(mocked_aws, path):
+    status, response = call(f"/file-manager/multipart/{path}", {"key": "uploads/a.csv", "part_numbers": [1]})
+
+    assert status == 400
+    assert "upload_id" in response["error"]
+
+
+def test_upload_in_parts_resume_and_complete(server_aws, monkeypatch):
+    monkeypatch.setattr(handlers, "DEFAULT_PART_SIZE", handlers.MIN_PART_SIZE)
+    data = bytes(range(256)) * (12 * MIB // 256)
+    upload = create_upload(len(data))
+    assert upload["part_count"] == 3
+
+    parts = upload_parts(upload, data)
+
+    status, listed = call("/file-manager/multipart/list-parts", upload)
+    assert status == 200
+    assert [(part["part_number"], part["etag"]) for part in listed["parts"]] == [
+        (part["part_number"], part["etag"]) for part in parts
+    ]
+    assert [part["size"] for part in listed["parts"]] == [5 * MIB, 5 * MIB, 2 * MIB]
+
+    # Parts may be listed in any order; they are assembled by number.
+    status, response = call("/file-manager/multipart/complete", {**upload, "parts": parts[::-1]})
+    assert status == 200
+    assert response == {"key": upload["key"]}
+    assert aws.client("s3").get_object(Bucket=BUCKET, Key=upload["key"])["Body"].read() == data
+
+
+@pytest.mark.parametrize("parts", [
+    [],
+    [{"part_number": 1}],
+    [{"part_number": "1", "etag": "x"}],
+    [{"part_number": True, "etag": "x"}],
+    "1",
+])
+def test_complete_rejects_malformed_parts(mocked_aws, parts):
+    upload = create_upload(MIB)
+
+    status, response = call("/file-manager/multipart/complete", {**upload, "parts": parts})
+
+    assert status == 400
+    assert "parts" in response["error"]
+
+
+def test_abort_discards_the_upload(server_aws):
+    upload = create_upload(MIB)
+    upload_parts(upload, b"x" * MIB)
+
+    status, response = call("/file-manager/multipart/abort", upload)
+    assert status == 200
+    assert response == {"aborted": upload["key"]}
+    assert aws.client("s3").list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+
+    for path in ("list-parts", "abort"):
+        status, response = call(f"/file-manager/multipart/{path}", upload)
+        assert status == 404
+        assert upload["upload_id"] in response["error"]
+    assert keys() == []
+
+
+# Direct uploads
+
+def upload(body, base64_encoded=False, content_type="application/octet-stream", file_name="report.csv"):
+    response = handlers.handle_file({
+        "httpMethod": "POST",
+        "path": "/file-manager/upload",
+        "headers": {"Content-Type": content_type},
+        "queryStringParameters": {"file_name": file_name} if file_name else None,
+        "isBase64Encoded": base64_encoded,
+        "body": body
+    }, Context())
+    return response["statusCode"], json.loads(response["body"])
+
+
+class Context:
+    aws_request_id = "request-1"
+
+
+def stored(key):
+    return aws.client("s3").get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4, 5, 1000])
+def test_decoded_size_matches_base64(size):
+    import base64
+
+    assert handlers.decoded_size(base64.b64encode(b"x" * size).decode()) == size
+
+
+def test_binary_body_is_decoded_into_the_bucket(mocked_aws, monkeypatch):
+    import base64
+
+    # Small slices, so the decode-as-you-go path runs more than once.
+    monkeypatch.setattr(handlers, "BASE64_SLICE", 16)
+    data = bytes(range(256)) * 4
+
+    status, response = upload(base64.b64encode(data).decode(), base64_encoded=True)
+
+    assert status == 200
+    assert response["size"] == len(data)
+    assert response["key"].startswith(storage.UPLOADS_PREFIX) and response["key"].endswith("/report.csv")
+    assert stored(response["key"]) == data
+
+
+def test_text_body_passed_through_is_stored_as_is(mocked_aws):
+    status, response = upload("Asset ID,Owned Views\nA1,3\n", content_type="text/csv")
+
+    assert status == 200
+    assert stored(response["key"]) == b"Asset ID,Owned Views\nA1,3\n"
+
+
+def test_upload_without_a_name_is_named_after_the_request(mocked_aws):
+    status, response = upload("a,b\n", content_type="text/csv", file_name=None)
+
+    assert status == 200
+    assert response["key"].endswith("/uploaded_request-1.csv")
+
+
+def test_json_body_falls_back_to_file_base64(mocked_aws):
+    import base64
+
+    status, response = upload(
+        json.dumps({"file_name": "legacy.csv", "file_base64": base64.b64encode(b"a,b\n1,2\n").decode()}),
+        content_type="application/json; charset=utf-8"
+    )
+
+    assert status == 200
+    assert response["key"].endswith("/legacy.csv")
+    assert stored(response["key"]) == b"a,b\n1,2\n"
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+def test_files_over_the_limit_get_413_with_a_presigned_url(mocked_aws, monkeypatch, legacy):
+    import base64
+
+    monkeypatch.setattr(handlers, "MAX_DIRECT_UPLOAD_BYTES", 1000)
+    encoded = base64.b64encode(b"x" * 1001).decode()
+    if legacy:
+        status, response = upload(json.dumps({"file_name": "big.csv", "file_base64": encoded}),
+                                  content_type="application/json")
+    else:
+        status, response = upload(encoded, base64_encoded=True, file_name="big.csv")
+
+    assert status == 413
+    assert response["size"] == 1001
+    assert response["key"].startswith(storage.UPLOADS_PREFIX) and response["key"].endswith("_big.csv")
+    assert unquote(urlparse(response["upload_url"]).path).endswith(response["key"])
+    assert keys() == []
+
+
+def test_default_limit_leaves_room_under_the_lambda_payload(mocked_aws):
+    import base64
+
+    at_limit = base64.b64encode(b"x" * handlers.MAX_DIRECT_UPLOAD_BYTES).decode()
+    # API Gateway's base64 must still fit in Lambda's 6 MB request payload.
+    assert len(at_limit) < 6 * 1024 * 1024
+
+    status, _ = upload(at_limit, base64_encoded=True)
+    assert status == 200
+    status, response = upload(base64.b64encode(b"x" * (handlers.MAX_DIRECT_UPLOAD_BYTES + 1)).decode(),
+                              base64_encoded=True)
+    assert status == 413
+    assert response["size"] == handlers.MAX_DIRECT_UPLOAD_BYTES + 1
+
+
+def test_presigned_url_from_a_413_takes_the_file(server_aws, monkeypatch):
+    import base64
+    import requests
+
+    monkeypatch.setattr(handlers, "MAX_DIRECT_UPLOAD_BYTES", 10)
+    data = b"Asset ID,Owned Views\n" * 10
+    status, response = upload(base64.b64encode(data).decode(), base64_encoded=True)
+    assert status == 413
+
+    assert requests.put(response["upload_url"], data=data).status_code == 200
+    assert stored(response["key"]) == data
@@ -0,0 +1,116 @@
+"""The janitor deletes what no live session can use any more, and only that."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from file_manager import janitor
+from royalty_compressor.result_cache import RESULT_CACHE_PREFIX
+from shared import aws, storage
+from tests.conftest import BUCKET, SESSION_TABLE
+
+NOW = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+DAY = timedelta(days=1)
+
+
+def day(offset):
+    return storage.partition(NOW + offset * DAY)
+
+
+def add_session(session_id, created_at, expires_at):
+    aws.table(SESSION_TABLE).put_item(Item={
+        "sessionId": session_id,
+        "metadata": {"created_at": int(created_at.timestamp()), "expires_at": int(expires_at.timestamp())}
+    })
+
+
+def put(key):
+    aws.client("s3").put_object(Bucket=BUCKET, Key=key, Body=b"x")
+
+
+def keys():
+    response = aws.client("s3").list_objects_v2(Bucket=BUCKET)
+    return sorted(item["Key"] for item in response.get("Contents", []))
+
+
+@pytest.fixture
+def bucket(mocked_aws):
+    # The oldest live session started five days ago; one that ended long ago must not count.
+    add_session("live", NOW - 5 * DAY, NOW + 2 * DAY)
+    add_session("expired", NOW - 30 * DAY, NOW - 23 * DAY)
+    aws.table(SESSION_TABLE).put_item(Item={"sessionId": "job#1", "state": "succeeded"})
+
+    for offset in (-9, -8, -4, 0):
+        put(f"uploads/{day(offset)}/report.csv")
+        put(f"processed_reports/{day(offset)}/royalty_report_1.csv")
+        put(f"parquet/uploads/{day(offset)}/report.csv.parquet")
+    put("uploads/not-a-date/report.csv")
+
+
+def test_cutoff_follows_the_oldest_live_session(mocked_aws):
+    assert janitor.cutoff(NOW) == NOW - timedelta(seconds=janitor.GRACE_SECONDS)
+
+    add_session("live", NOW - 5 * DAY, NOW + 2 * DAY)
+    add_session("grace", NOW - 10 * DAY, NOW - timedelta(hours=1))
+    add_session("expired", NOW - 30 * DAY, NOW - 23 * DAY)
+    assert janitor.cutoff(NOW) == NOW - 10 * DAY - timedelta(seconds=janitor.GRACE_SECONDS)
+
+
+def test_deletes_expired_partitions(bucket):
+    report = janitor.run_janitor(now=NOW)
+
+    expired = [day(-9), day(-8)]
+    for prefix in janitor.PARTITIONED_PREFIXES:
+        assert report["prefixes"][prefix]["partitions"] == expired
+        assert report["prefixes"][prefix]["deleted"] == 2
+    assert not any(day(-9) in key or day(-8) in key for key in keys())
+    assert f"uploads/{day(-4)}/report.csv" in keys()
+    assert f"processed_reports/{day(0)}/royalty_report_1.csv" in keys()
+
+
+def test_dry_run_deletes_nothing(bucket):
+    before = keys()
+    report = janitor.run_janitor(dry_run=True, now=NOW)
+    assert keys() == before
+    assert report["dry_run"]
+    assert report["prefixes"]["uploads/"]["objects"] == 2
+    assert report["prefixes"]["uploads/"]["deleted"] == 0
+
+
+def test_legacy_keys_go_by_last_modified(mocked_aws):
+    put("uploads/2024-01-01T00:00:00_old.csv")
+    put("uploads/not-a-date/report.csv")
+
+    # Just written, so nothing is older than the cut-off yet.
+    assert janitor.run_janitor(now=NOW)["prefixes"]["uploads/"]["legacy_objects"] == 0
+
+    later = datetime.now(timezone.utc) + 3 * DAY
+    report = janitor.run_janitor(now=later)
+    assert report["prefixes"]["uploads/"]["legacy_objects"] == 1
+    assert keys() == ["uploads/not-a-date/report.csv"]
+
+
+def test_aborts_abandoned_multipart_uploads(mocked_aws):
+    s3 = aws.client("s3")
+    s3.create_multipart_upload(Bucket=BUCKET, Key=f"uploads/{day(-9)}/big.csv")
+    # Outside every prefix the janitor manages, so never touched.
+    s3.create_multipart_upload(Bucket=BUCKET, Key="exports/big.csv")
+
+    assert janitor.run_janitor(dry_run=True, now=NOW)["prefixes"]["uploads/"]["abandoned_uploads"] == 1
+    assert len(s3.list_multipart_uploads(Bucket=BUCKET)["Uploads"]) == 2
+
+    janitor.run_janitor(now=NOW)
+    remaining = s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", [])
+    assert [upload["Key"] for upload in remaining] == ["exports/big.csv"]
+
+
+def test_deletes_expired_result_cache_manifests(mocked_aws):
+    put(f"{RESULT_CACHE_PREFIX}abc.json")
+
+    report = janitor.run_janitor(now=datetime.now(timezone.utc))
+    assert report["prefixes"][RESULT_CACHE_PREFIX]["objects"] == 0
+
+    later = datetime.now(timezone.utc) + timedelta(seconds=janitor.RESULT_CACHE_TTL_SECONDS + 60)
+    report = janitor.run_janitor(dry_run=True, now=later)
+    assert report["prefixes"][RESULT_CACHE_PREFIX]["objects"] == 1
+    assert keys() == [f"{RESULT_CACHE_PREFIX}abc.json"]
+
+    janitor.run_janitor(now=later)
+    assert keys() == []
@@ -0,0 +1,195 @@
+"""Compression jobs: create, dispatch, poll, and the throttled progress writes in between."""
+import json
+import pytest
+import app
+from royalty_compressor import handlers, jobs
+from shared import aws
+from shared.invocations import JOB_EVENT_KEY
+from tests.conftest import BUCKET, SESSION_TABLE
+from tests.reports import report_bytes
+
+KEY = "uploads/2026-10-18/report.csv"
+
+
+class Context:
+    aws_request_id = "request-1"
+    invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function:MiniToolsHandler"
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def report(mocked_aws):
+    aws.client("s3").put_object(Bucket=BUCKET, Key=KEY, Body=report_bytes(rows=500, assets=40))
+    return KEY
+
+
+@pytest.fixture
+def updates(monkeypatch):
+    """The fields of every job update, in order."""
+    recorded = []
+    update = jobs._update
+
+    def recording(job_id, **fields):
+        recorded.append(fields)
+        update(job_id, **fields)
+    monkeypatch.setattr(jobs, "_update", recording)
+    return recorded
+
+
+def create(body):
+    response = handlers.handle_compression({
+        "httpMethod": "POST", "path": "/royalty-compressor/jobs", "body": json.dumps(body)
+    }, Context())
+    return response["statusCode"], json.loads(response["body"])
+
+
+def poll(job_id):
+    response = app.route_request({
+        "httpMethod": "GET", "path": f"/royalty-compressor/jobs/{job_id}", "pathParameters": {"job_id": job_id}
+    }, Context())
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_new_job_is_queued(mocked_aws):
+    job_id = jobs.create_job({"s3_key": KEY})
+
+    status, job = poll(job_id)
+
+    assert status == 200
+    assert job["job_id"] == job_id
+    assert job["state"] == "queued"
+    assert (job["rows_processed"], job["bytes_read"]) == (0, 0)
+    assert job["expires_at"] - job["created_at"] == jobs.JOB_TTL_SECONDS
+    # The stored request and the table key are internal.
+    assert "request" not in job and "sessionId" not in job
+    item = aws.table(SESSION_TABLE).get_item(Key=jobs.job_key(job_id))["Item"]
+    assert item["sessionId"].startswith(jobs.JOB_KEY_PREFIX)
+    assert json.loads(item["request"]) == {"s3_key": KEY}
+
+
+def test_inline_job_runs_within_the_request(report, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_DISPATCH", "inline")
+
+    status, created = create({"s3_key": report, "chunk_size": 100})
+    assert status == 202
+    assert created["state"] == "succeeded"
+
+    status, job = poll(created["job_id"])
+    assert status == 200
+    assert job["state"] == "succeeded"
+    assert job["rows_processed"] == 500
+    assert job["bytes_read"] > 0
+    assert job["finished_at"] >= job["started_at"] >= job["created_at"]
+    result = job["result"]
+    assert result["input_key"] == report
+    assert result["output_key"].startswith("processed_reports/")
+    # Download URLs are signed at poll time, never stored with the job.
+    assert result["download_url"]
+    stored = aws.table(SESSION_TABLE).get_item(Key=jobs.job_key(created["job_id"]))["Item"]["result"]
+    assert not any(field.endswith("download_url") for field in stored)
+
+
+class FakeLambda:
+    def __init__(self):
+        self.invocations = []
+
+    def invoke(self, **kwargs):
+        self.invocations.append(kwargs)
+        return {"StatusCode": 202}
+
+
+def test_lambda_dispatch_runs_the_job_in_its_own_invocation(report, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_DISPATCH", "lambda")
+    fake = FakeLambda()
+    monkeypatch.setattr(jobs, "lambda_client", fake)
+
+    status, created = create({"s3_key": report})
+    assert (status, created["state"]) == (202, "queued")
+
+    [invocation] = fake.invocations
+    assert invocation["FunctionName"] == Context.invoked_function_arn
+    assert invocation["InvocationType"] == "Event"
+    event = json.loads(invocation["Payload"])
+    assert event == {JOB_EVENT_KEY: {"job_id": created["job_id"]}}
+
+    assert app.route_request(event, Context()) == {"statusCode": 200}
+    status, job = poll(created["job_id"])
+    assert job["state"] == "succeeded"
+    assert job["result"]["download_url"]
+
+
+def test_batch_job_signs_every_result(report, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_DISPATCH", "inline")
+    monkeypatch.setattr(handlers.batch, "compress_in_parallel", lambda s3_keys, request_id, body, merge, progress: (
+        [handlers.run_compression(key, f"{request_id}_{index}", body, progress) for index, key in enumerate(s3_keys)],
+        []
+    ))
+
+    status, created = create({"s3_keys": [report, report]})
+
+    assert status == 202
+    status, job = poll(created["job_id"])
+    assert job["state"] == "succeeded"
+    assert [result["input_key"] for result in job["result"]["results"]] == [report, report]
+    assert all(result["download_url"] for result in job["result"]["results"])
+
+
+def test_failed_jobs_keep_the_status_a_request_would_have_had(report, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_DISPATCH", "inline")
+
+    _, missing = create({"s3_key": "uploads/2026-10-18/missing.csv"})
+    _, job = poll(missing["job_id"])
+    assert (job["state"], job["status_code"]) == ("failed", 500)
+    assert job["error"]
+
+    # Columns are only checked against the report once it is read, so this fails in the job.
+    _, unknown = create({"s3_key": report, "filters": {"No Such Column": "x"}})
+    _, job = poll(unknown["job_id"])
+    assert (job["state"], job["status_code"]) == ("failed", 400)
+    assert "No Such Column" in job["error"]
+
+
+def test_create_rejects_requests_without_input(mocked_aws):
+    status, response = create({})
+
+    assert status == 400
+    assert response["error"] == "Missing s3_key"
+
+
+def test_poll_unknown_and_missing_job(mocked_aws):
+    assert poll("no-such-job")[0] == 404
+    assert jobs.get_compression_job({"pathParameters": None})["statusCode"] == 400
+
+
+def test_progress_writes_are_throttled(mocked_aws, monkeypatch, updates):
+    clock = Clock()
+    monkeypatch.setattr(jobs.time, "time", clock)
+    monkeypatch.setattr(jobs, "PROGRESS_INTERVAL_SECONDS", 5)
+    job_id = jobs.create_job({"s3_key": KEY})
+    report = jobs.progress_reporter(job_id)
+
+    for step in range(12):
+        report(step * 100, step * 1000)
+        clock.now += 1
+
+    # The first call writes, then at most one write per interval.
+    assert [fields["rows_processed"] for fields in updates] == [0, 500, 1000]
+    assert poll(job_id)[1]["rows_processed"] == 1000
+
+
+def test_job_writes_progress_per_interval_not_per_chunk(report, monkeypatch, updates):
+    monkeypatch.setattr(jobs, "JOB_DISPATCH", "inline")
+    monkeypatch.setattr(jobs, "PROGRESS_INTERVAL_SECONDS", 3600)
+
+    create({"s3_key": report, "chunk_size": 50})
+
+    states = [fields.get("state") for fields in updates]
+    assert states == ["running", None, "succeeded"]
+    assert updates[-1]["rows_processed"] == 500
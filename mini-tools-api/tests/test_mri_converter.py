@@ -0,0 +1,61 @@
+"""The vectorized MuMa to MRI converter must produce exactly what the iterrows loop it replaced did."""
+import io
+import pandas as pd
+import pytest
+from mri_converter.conversion import convert, read_muma
+from tests.legacy import iterrows_convert
+from tests.reports import muma_csv
+
+
+def muma(columns, rows):
+    output = io.StringIO()
+    pd.DataFrame(rows, columns=columns).to_csv(output, index=False)
+    output.seek(0)
+    return read_muma(output)
+
+
+# Two recording slots, but only slot 1 has composer columns and only slot 2 has client columns.
+RAGGED_COLUMNS = [
+    "Song Title", "Song ISWC",
+    "Composer 1 Surname", "Composer 1 First Name", "Composer 1 Middle Name", "Composer 1 Controlled",
+    "Composer 1 Share", "Composer 1 Capacity",
+    "Publisher 1 Name", "Publisher 1 Controlled", "Publisher 1 Share",
+    "Recording 1 Display Artist", "Recording 1 Label Name", "Recording 1 ISRC", "Recording 1 UPC",
+    "Publisher 2 Name", "Publisher 2 Controlled", "Publisher 2 Share",
+    "Client 2 Name", "Territory 2 Name",
+    "Recording 2 Display Artist", "Recording 2 Label Name", "Recording 2 ISRC", "Recording 2 UPC",
+]
+
+RAGGED_ROWS = [
+    # Both slots filled.
+    ["Song A", "T-1", "Smith", "Ann", "", "Y", "50", "CA", "Pub 1", "Y", "100",
+     "Artist 1", "Label 1", "US0000000001", "012345678905",
+     "Pub 2", "N", "50", "Client 2", "World", "Artist 2", "Label 2", "US0000000002", "000000000017"],
+    # Only slot 1.
+    ["Song B", "", "Jones", "Bo", "M", "N", "100", "C", "", "", "",
+     "Artist 3", "", "", "", "", "", "", "", "", "", "", "", ""],
+    # No recordings at all: no MRI rows.
+    ["Song C", "T-3", "Lee", "", "", "Y", "25", "A", "Pub 3", "Y", "25",
+     "", "Label 3", "", "", "", "", "", "", "", "", "", "", ""],
+    # Slot 2 filled after a blank slot 1: slots stop at the first blank recording.
+    ["Song D", "T-4", "", "", "", "", "", "", "", "", "",
+     "", "", "", "", "Pub 4", "Y", "75", "Client 4", "US", "Artist 4", "Label 4", "US0000000004", "4"],
+]
+
+
+def assert_same(df):
+    expected = iterrows_convert(df)
+    actual = convert(df)
+    assert list(actual.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_ragged_slots():
+    df = muma(RAGGED_COLUMNS, RAGGED_ROWS)
+    assert_same(df)
+    assert list(convert(df)["SONG TITLE*"]) == ["Song A", "Song A", "Song B"]
+
+
+@pytest.mark.parametrize("slots", [1, 3, 6])
+def test_generated_export(slots):
+    assert_same(read_muma(muma_csv(songs=300, slots=slots, seed=slots)))
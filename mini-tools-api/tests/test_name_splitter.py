@@ -0,0 +1,93 @@
+"""The vectorized name splitter must split every name exactly as the per-name ``split_name`` did."""
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from name_splitter.splitting import split_composer_names, split_names
+from tests import legacy
+
+WORDS = ["Ann", "bo", "O'Neil", "van", "der", "Berg", "José", "Łukasz", "Mary-Jane", "J.", "李", "X" * 40]
+# Everything str.split() treats as a separator, including Unicode spaces, plus characters it does not.
+SPACES = [" ", "  ", "\t", "\n", "\u00a0", "\u2003", "\u3000", " \t "]
+NOT_SPACES = ["\u200b", ",", "-", "_"]
+
+
+def random_name(rng):
+    shape = rng.random()
+    if shape < 0.05:
+        return None
+    if shape < 0.1:
+        return np.nan
+    if shape < 0.15:
+        return "".join(rng.choices(SPACES, k=rng.randrange(3)))
+    words = [
+        rng.choice(WORDS) + (rng.choice(NOT_SPACES) if rng.random() < 0.1 else "")
+        for _ in range(rng.choice([1, 1, 2, 2, 3, 4, 6]))
+    ]
+    name = "".join(word + rng.choice(SPACES) for word in words[:-1]) + words[-1]
+    if rng.random() < 0.3:
+        name = rng.choice(SPACES) + name
+    if rng.random() < 0.3:
+        name = name + rng.choice(SPACES)
+    return name
+
+
+def legacy_split(names):
+    return [list(parts) for parts in zip(*(legacy.split_name(name) for name in names))] or [[], [], []]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_split_names_matches_legacy_on_random_names(seed):
+    rng = random.Random(seed)
+    names = pd.Series([random_name(rng) for _ in range(500)], dtype=object)
+
+    actual = [column.tolist() for column in split_names(names)]
+
+    assert actual == legacy_split(names)
+
+
+@pytest.mark.parametrize("name, parts", [
+    ("Ann", ("Ann", "", "")),
+    ("  Ann\t", ("  Ann\t", "", "")),
+    ("Ann Berg", ("Ann", "", "Berg")),
+    ("Ann  Berg ", ("Ann", "", "Berg")),
+    ("Ann Marie van  der\tBerg", ("Ann", "Marie", "van der Berg")),
+    ("Ann\u00a0Berg", ("Ann", "", "Berg")),
+    ("Ann\u200bBerg", ("Ann\u200bBerg", "", "")),
+    ("", ("", "", "")),
+    (" \t ", ("", "", "")),
+    (None, ("", "", "")),
+    (np.nan, ("", "", "")),
+])
+def test_split_names_rules(name, parts):
+    assert legacy.split_name(name) == parts
+    assert tuple(column.iloc[0] for column in split_names(pd.Series([name], dtype=object))) == parts
+
+
+def test_split_names_keeps_the_index():
+    names = pd.Series(["Ann Berg", None, "Ann Marie Berg"], index=[10, 5, 7], dtype=object)
+
+    for column in split_names(names):
+        assert column.index.tolist() == [10, 5, 7]
+
+
+def test_split_names_of_an_empty_column():
+    assert [column.tolist() for column in split_names(pd.Series([], dtype=object))] == [[], [], []]
+
+
+def test_split_composer_names_matches_legacy():
+    rng = random.Random(7)
+    rows = 300
+    df = pd.DataFrame({
+        "Song Title": [f"Song {i}" for i in range(rows)],
+        "Composer 1 Name": [random_name(rng) for _ in range(rows)],
+        "Composer 1 Share": ["50"] * rows,
+        "Composer 2 Name": [random_name(rng) for _ in range(rows)],
+        "Publisher 1 Name": ["Pub"] * rows,
+    })
+    expected = legacy.split_composer_names(df)
+
+    actual = split_composer_names(df)
+
+    assert list(actual.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(actual, expected.astype(actual.dtypes.to_dict()))
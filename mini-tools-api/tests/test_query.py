@@ -0,0 +1,123 @@
+"""Column projection and row filters, from the request body to the compressed report."""
+import io
+import json
+import pandas as pd
+import pytest
+from royalty_compressor import handlers
+from royalty_compressor.aggregation import compress_stream
+from royalty_compressor.query import QueryError, ReportQuery
+from shared import aws
+from tests.conftest import BUCKET
+
+REPORT = (
+    "Asset Summary,Report period 2026-09\n"
+    "Adjustment Type,Asset ID,Asset Title,Country,Channel ID,Owned Views,Partner Revenue\n"
+    ",A1,One,US,UC1,10,1.5\n"
+    "Credit,A1,One,GB,UC1,5,0.25\n"
+    ",A2,Two,US,UC2,3,2\n"
+    ",A3,Three,DE,UC1,1,0.125\n"
+    ",A2,Two,GB,UC2,4,1\n"
+).encode("utf-8")
+
+
+def compress(body):
+    query = ReportQuery.from_body(body)
+    return compress_stream(io.BytesIO(REPORT), chunk_size=2, typed=True, query=query)
+
+
+def test_projection_keeps_the_group_column_and_reads_only_what_it_needs():
+    query = ReportQuery.from_body({"columns": ["Partner Revenue"], "filters": {"Country": "US"}})
+    assert query.read_columns() == {"Asset ID", "Partner Revenue", "Country"}
+
+    df = compress({"columns": ["Partner Revenue"]})
+    assert list(df.columns) == ["Asset ID", "Partner Revenue"]
+    assert df["Partner Revenue"].tolist() == [1.75, 3.0, 0.125]
+
+
+def test_filters_match_any_listed_value():
+    df = compress({"columns": ["Country", "Owned Views"], "filters": {"Country": ["US", "DE"], "Channel ID": "UC1"}})
+    assert df.to_dict("records") == [
+        {"Asset ID": "A1", "Country": "US", "Owned Views": 10},
+        {"Asset ID": "A3", "Country": "DE", "Owned Views": 1},
+    ]
+
+
+def test_filter_on_the_fill_value_matches_blanks():
+    df = compress({"filters": {"Adjustment Type": "None"}})
+    assert df["Asset ID"].tolist() == ["A1", "A2", "A3"]
+    assert df["Owned Views"].tolist() == [10, 7, 1]
+
+
+def test_no_matching_rows_gives_an_empty_report():
+    df = compress({"columns": ["Owned Views"], "filters": {"Country": "FR"}})
+    assert df.empty
+    assert list(df.columns) == ["Asset ID", "Owned Views"]
+
+
+def test_spec_is_independent_of_value_order():
+    first = ReportQuery.from_body({"filters": {"Country": ["US", "GB"]}})
+    second = ReportQuery.from_body({"filters": {"Country": ["GB", "US"]}})
+    assert first.spec() == second.spec()
+    assert not ReportQuery.from_body({}).active
+
+
+@pytest.mark.parametrize("body, error", [
+    ({"columns": "Country"}, "columns must be a list"),
+    ({"columns": ["Country"]}, "at least one revenue or views column"),
+    ({"filters": ["US"]}, "filters must map"),
+    ({"filters": {"Partner Revenue": 1}}, "summed column"),
+    ({"filters": {"Country": []}}, "non-empty list"),
+    ({"filters": {"Country": [True]}}, "non-empty list"),
+])
+def test_malformed_queries(body, error):
+    with pytest.raises(ValueError, match=error):
+        ReportQuery.from_body(body)
+
+
+def test_columns_missing_from_the_report():
+    with pytest.raises(QueryError, match="Columns not in report: Label"):
+        compress({"columns": ["Label", "Owned Views"]})
+    with pytest.raises(QueryError, match="date_from"):
+        compress({"filters": {"date_from": "2026-09-01"}})
+
+
+@pytest.fixture
+def uploaded(mocked_aws):
+    aws.client("s3").put_object(Bucket=BUCKET, Key="uploads/report.csv", Body=REPORT)
+    return "uploads/report.csv"
+
+
+def call(route, body, context):
+    response = route({"body": json.dumps(body)}, context)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_compress_answers_bad_queries_with_400(uploaded, context):
+    status, body = call(handlers.compress_report, {"s3_key": uploaded, "filters": {"Country": []}}, context)
+    assert status == 400 and "non-empty list" in body["error"]
+
+    status, body = call(handlers.compress_report, {"s3_key": uploaded, "columns": ["Label", "Owned Views"]}, context)
+    assert (status, body) == (400, {"error": "Columns not in report: Label"})
+
+
+def test_compress_writes_the_projected_report(uploaded, context):
+    status, body = call(handlers.compress_report, {
+        "s3_key": uploaded, "columns": ["Country", "Owned Views"], "filters": {"Country": "GB"}
+    }, context)
+    assert status == 200
+    output = aws.client("s3").get_object(Bucket=BUCKET, Key=body["output_key"])["Body"].read()
+    assert pd.read_csv(io.BytesIO(output)).to_dict("records") == [
+        {"Asset ID": "A1", "Country": "GB", "Owned Views": 5},
+        {"Asset ID": "A2", "Country": "GB", "Owned Views": 4},
+    ]
+
+
+def test_compress_logs_the_key_not_the_body(uploaded, context, capsys):
+    status, _ = call(handlers.compress_report, {
+        "s3_key": uploaded, "columns": ["Owned Views"], "filters": {"Channel ID": "UC-private-channel"}
+    }, context)
+
+    assert status == 200
+    logged = capsys.readouterr().out
+    assert uploaded in logged
+    assert "UC-private-channel" not in logged
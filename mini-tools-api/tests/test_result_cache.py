@@ -0,0 +1,130 @@
+"""The result cache answers an identical upload with the earlier output, while that output exists."""
+import itertools
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from file_manager import janitor
+from royalty_compressor import handlers, result_cache
+from shared import aws
+from tests.conftest import BUCKET
+from tests.reports import report_bytes
+
+KEY = "uploads/2026-10-18/report.csv"
+REQUEST_IDS = (f"request-{n}" for n in itertools.count())
+OPTIONS = {"gzip": False, "parquet_output": False, "report_format": "asset_summary"}
+
+
+class Context:
+    def __init__(self, request_id):
+        self.aws_request_id = request_id
+
+
+@pytest.fixture
+def s3(mocked_aws):
+    return aws.client("s3")
+
+
+def upload(s3, key=KEY, seed=0):
+    s3.put_object(Bucket=BUCKET, Key=key, Body=report_bytes(rows=200, assets=20, seed=seed))
+
+
+def compress(body):
+    # A request id of its own, so every compression that misses writes a distinct output.
+    response = handlers.compress_report({"body": json.dumps(body)}, Context(next(REQUEST_IDS)))
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])
+
+
+def manifests(s3):
+    response = s3.list_objects_v2(Bucket=BUCKET, Prefix=result_cache.RESULT_CACHE_PREFIX)
+    return [item["Key"] for item in response.get("Contents", [])]
+
+
+def test_digest_follows_content_and_options():
+    digest = result_cache.cache_digest('"abc"', OPTIONS)
+
+    assert digest == result_cache.cache_digest("abc", dict(reversed(OPTIONS.items())))
+    assert digest != result_cache.cache_digest('"abd"', OPTIONS)
+    assert digest != result_cache.cache_digest('"abc"', {**OPTIONS, "gzip": True})
+    assert digest != result_cache.cache_digest('"abc"', {**OPTIONS, "query": {"columns": ["Owned Views"]}})
+
+
+def test_stored_result_is_a_hit_without_its_urls(s3):
+    s3.put_object(Bucket=BUCKET, Key="processed_reports/2026-10-18/out.csv", Body=b"x")
+    result = {"output_key": "processed_reports/2026-10-18/out.csv", "download_url": "https://signed", "rows": 3}
+
+    result_cache.store(s3, BUCKET, "digest", result)
+
+    assert result_cache.lookup(s3, BUCKET, "digest") == {"output_key": "processed_reports/2026-10-18/out.csv", "rows": 3}
+    assert result_cache.lookup(s3, BUCKET, "other") is None
+
+
+def test_expired_manifest_is_a_miss(s3, monkeypatch):
+    s3.put_object(Bucket=BUCKET, Key="processed_reports/2026-10-18/out.csv", Body=b"x")
+    clock = [1_000_000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: clock[0])
+    result_cache.store(s3, BUCKET, "digest", {"output_key": "processed_reports/2026-10-18/out.csv"})
+
+    clock[0] += result_cache.RESULT_CACHE_TTL_SECONDS - 1
+    assert result_cache.lookup(s3, BUCKET, "digest") is not None
+    clock[0] += 1
+    assert result_cache.lookup(s3, BUCKET, "digest") is None
+
+
+@pytest.mark.parametrize("missing", ["output_key", "parquet_output_key"])
+def test_result_with_a_deleted_output_is_a_miss(s3, missing):
+    result = {"output_key": "processed_reports/d/out.csv", "parquet_output_key": "processed_reports/d/out.parquet"}
+    for field, key in result.items():
+        if field != missing:
+            s3.put_object(Bucket=BUCKET, Key=key, Body=b"x")
+
+    result_cache.store(s3, BUCKET, "digest", result)
+
+    assert result_cache.lookup(s3, BUCKET, "digest") is None
+
+
+def test_identical_upload_is_answered_from_the_cache(s3):
+    upload(s3)
+    first = compress({"s3_key": KEY})
+    # The same bytes under another name have the same ETag.
+    upload(s3, key="uploads/2026-10-18/copy.csv")
+    second = compress({"s3_key": "uploads/2026-10-18/copy.csv"})
+
+    assert "cached" not in first
+    assert second["cached"] is True
+    assert second["output_key"] == first["output_key"]
+    assert second["input_key"] == "uploads/2026-10-18/copy.csv"
+    assert second["download_url"]
+    assert len(manifests(s3)) == 1
+
+
+def test_different_content_or_options_miss(s3):
+    upload(s3)
+    first = compress({"s3_key": KEY})
+
+    assert "cached" not in compress({"s3_key": KEY, "gzip": True})
+    assert "cached" not in compress({"s3_key": KEY, "use_cache": False})
+    upload(s3, seed=1)
+    assert "cached" not in compress({"s3_key": KEY})
+    assert compress({"s3_key": KEY})["output_key"] != first["output_key"]
+
+
+def test_outputs_deleted_by_the_janitor_are_a_miss(s3, monkeypatch):
+    # A manifest that outlives the reports it points at, as a long cache TTL would allow.
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_TTL_SECONDS", 30 * 24 * 60 * 60)
+    monkeypatch.setattr(janitor, "RESULT_CACHE_TTL_SECONDS", 30 * 24 * 60 * 60)
+    upload(s3)
+    first = compress({"s3_key": KEY})
+
+    janitor.run_janitor(now=datetime.now(timezone.utc) + timedelta(days=5))
+    assert s3.list_objects_v2(Bucket=BUCKET, Prefix="processed_reports/").get("KeyCount") == 0
+    assert len(manifests(s3)) == 1
+
+    upload(s3)
+    second = compress({"s3_key": KEY})
+
+    assert "cached" not in second
+    assert second["output_key"] != first["output_key"]
+    s3.head_object(Bucket=BUCKET, Key=second["output_key"])
+    # The fresh result replaced the stale manifest, so the next request hits again.
+    assert compress({"s3_key": KEY})["cached"] is True
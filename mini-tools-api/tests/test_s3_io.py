@@ -0,0 +1,224 @@
+"""Streaming S3 reads and writes."""
+import gzip
+import io
+import json
+import time
+import pytest
+from shared import aws, metrics
+from shared.s3_io import MIN_PART_SIZE, S3MultipartWriter, StreamingBodyReader
+from tests.conftest import BUCKET
+
+
+class SlowBody:
+    """A StreamingBody that takes ``delay`` seconds per read."""
+
+    def __init__(self, data, delay):
+        self._data = io.BytesIO(data)
+        self._delay = delay
+
+    def read(self, size):
+        time.sleep(self._delay)
+        return self._data.read(size)
+
+
+@pytest.fixture
+def emitted(monkeypatch, capsys):
+    """The EMF records printed by invocations in the test."""
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+
+    def records():
+        return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    return records
+
+
+def test_fetch_time_is_recorded_once_per_stream(emitted, monkeypatch):
+    samples = []
+    monkeypatch.setattr(metrics, "_reset_peak_rss", lambda: samples.append(1))
+    data = bytes(range(256)) * 64
+
+    with metrics.invocation("test"):
+        reader = StreamingBodyReader(SlowBody(data, delay=0.01))
+        with metrics.stage("parse"):
+            chunks = iter(lambda: reader.read(1024), b"")
+            assert b"".join(chunks) == data
+        reader.close()
+
+    [record] = emitted()
+    assert reader.bytes_read == len(data)
+    assert record["s3_fetch.Count"] == 1
+    # 17 reads of 10 ms each, the last one at end of stream, taken out of the parse stage.
+    assert record["s3_fetch.Duration"] >= 170
+    assert record["parse.Duration"] < record["s3_fetch.Duration"]
+    # Only the handler and parse stages sample memory, not every read.
+    assert len(samples) == 2
+
+
+def test_fetch_time_of_an_unfinished_stream_is_recorded_on_close(emitted):
+    with metrics.invocation("test"):
+        reader = StreamingBodyReader(SlowBody(b"x" * 4096, delay=0.01))
+        reader.read(1024)
+        reader.close()
+        reader.close()
+
+    [record] = emitted()
+    assert record["s3_fetch.Count"] == 1
+    assert record["s3_fetch.Duration"] >= 10
+
+
+def test_reads_outside_an_invocation_record_nothing():
+    reader = StreamingBodyReader(SlowBody(b"abc", delay=0))
+    assert reader.read() == b"abc"
+    reader.close()
+    assert reader.bytes_read == 3
+
+
+class CountingS3:
+    """The S3 client, counting calls per operation and failing ``fail`` when asked to."""
+
+    def __init__(self, client, fail=None):
+        self._client = client
+        self._fail = fail
+        self.calls = {}
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if not callable(method) or name.startswith("_"):
+            return method
+
+        def counted(**kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if name == self._fail:
+                raise RuntimeError(f"{name} failed")
+            return method(**kwargs)
+        return counted
+
+
+@pytest.fixture
+def s3(mocked_aws):
+    return CountingS3(aws.client("s3"))
+
+
+def stored(key):
+    return aws.client("s3").get_object(Bucket=BUCKET, Key=key)
+
+
+def in_progress():
+    return aws.client("s3").list_multipart_uploads(Bucket=BUCKET).get("Uploads", [])
+
+
+def test_small_object_is_one_put(s3):
+    with S3MultipartWriter(s3, BUCKET, "out.csv", content_type="text/csv", metadata={"rows": "2"}) as writer:
+        writer.write(b"a,b\n")
+        writer.write(b"1,2\n")
+        assert writer.tell() == 8
+
+    assert s3.calls == {"put_object": 1}
+    response = stored("out.csv")
+    assert response["Body"].read() == b"a,b\n1,2\n"
+    assert response["ContentType"] == "text/csv"
+    assert response["Metadata"] == {"rows": "2"}
+
+
+def test_empty_object_is_still_written(s3):
+    S3MultipartWriter(s3, BUCKET, "empty.csv").close()
+
+    assert stored("empty.csv")["Body"].read() == b""
+
+
+@pytest.mark.parametrize("size, parts", [
+    (MIN_PART_SIZE - 1, 0),
+    (MIN_PART_SIZE, 1),
+    (MIN_PART_SIZE + 1, 2),
+    (2 * MIN_PART_SIZE, 2),
+    (2 * MIN_PART_SIZE + 3, 3),
+])
+def test_parts_are_cut_at_the_part_size(s3, size, parts):
+    data = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+    # Written in pieces that do not line up with the parts.
+    with S3MultipartWriter(s3, BUCKET, "big.bin", part_size=MIN_PART_SIZE, max_workers=2) as writer:
+        for start in range(0, size, 777_777):
+            writer.write(data[start:start + 777_777])
+
+    assert s3.calls.get("upload_part", 0) == parts
+    assert s3.calls.get("put_object", 0) == (0 if parts else 1)
+    assert stored("big.bin")["Body"].read() == data
+    assert in_progress() == []
+
+
+def test_part_size_is_never_below_the_s3_minimum(s3):
+    writer = S3MultipartWriter(s3, BUCKET, "out.csv", part_size=1024)
+    assert writer.part_size == MIN_PART_SIZE
+    writer.abort()
+
+
+def test_gzip_parts_hold_the_compressed_bytes(s3):
+    # Random bytes do not compress, so this still spans several parts.
+    import os
+
+    data = os.urandom(2 * MIN_PART_SIZE)
+    with S3MultipartWriter(s3, BUCKET, "big.csv.gz", compress="gzip", part_size=MIN_PART_SIZE) as writer:
+        writer.write(data)
+
+    assert writer.bytes_written == len(data)
+    assert s3.calls["upload_part"] >= 2
+    assert gzip.decompress(stored("big.csv.gz")["Body"].read()) == data
+
+
+def test_exception_in_the_block_aborts_the_upload(s3):
+    with pytest.raises(ValueError):
+        with S3MultipartWriter(s3, BUCKET, "big.bin", part_size=MIN_PART_SIZE, max_workers=1) as writer:
+            writer.write(b"x" * (2 * MIN_PART_SIZE))
+            assert len(in_progress()) == 1
+            raise ValueError("serializer failed")
+
+    assert s3.calls["abort_multipart_upload"] == 1
+    assert "complete_multipart_upload" not in s3.calls
+    assert in_progress() == []
+    assert aws.client("s3").list_objects_v2(Bucket=BUCKET).get("KeyCount") == 0
+
+
+def test_exception_before_the_first_part_writes_nothing(s3):
+    with pytest.raises(ValueError):
+        with S3MultipartWriter(s3, BUCKET, "out.csv") as writer:
+            writer.write(b"a,b\n")
+            raise ValueError("serializer failed")
+
+    assert s3.calls == {}
+    with pytest.raises(ValueError):
+        writer.write(b"more")
+
+
+def test_failed_complete_aborts_the_upload(mocked_aws):
+    s3 = CountingS3(aws.client("s3"), fail="complete_multipart_upload")
+
+    writer = S3MultipartWriter(s3, BUCKET, "big.bin", part_size=MIN_PART_SIZE)
+    writer.write(b"x" * (MIN_PART_SIZE + 1))
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+    assert s3.calls["abort_multipart_upload"] == 1
+    assert in_progress() == []
+    assert writer.closed
+
+
+def test_failed_part_aborts_the_upload(mocked_aws):
+    s3 = CountingS3(aws.client("s3"), fail="upload_part")
+
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter(s3, BUCKET, "big.bin", part_size=MIN_PART_SIZE, max_workers=1) as writer:
+            writer.write(b"x" * (3 * MIN_PART_SIZE))
+
+    assert s3.calls["abort_multipart_upload"] == 1
+    assert in_progress() == []
+
+
+def test_unclosed_writer_is_aborted_when_collected(s3):
+    writer = S3MultipartWriter(s3, BUCKET, "big.bin", part_size=MIN_PART_SIZE)
+    writer.write(b"x" * MIN_PART_SIZE)
+    assert len(in_progress()) == 1
+
+    # Dropped while its part may still be uploading.
+    del writer
+
+    assert in_progress() == []
+    assert aws.client("s3").list_objects_v2(Bucket=BUCKET).get("KeyCount") == 0
@@ -0,0 +1,135 @@
+"""Usage counters: sharded writes, reads summed over the shards, and rebuilds of closed days."""
+import json
+import time
+import pytest
+from session_manager import events, handlers, stats
+
+
+@pytest.fixture
+def session_id(mocked_aws):
+    handlers.session_cache.clear()
+    response = handlers.create_session({"body": "{}"})
+    yield json.loads(response["body"])["session_id"]
+    handlers.session_cache.clear()
+
+
+def track(session_id, tool_name, size):
+    response = handlers.track_usage(session_id, {"body": json.dumps({
+        "tool_name": tool_name,
+        "action": "compress",
+        "details": {"bytes_processed": size, "duration_ms": 12.5}
+    })})
+    assert response["statusCode"] == 200
+
+
+def event_store():
+    """Every usage event, read back from the table rather than from the counters."""
+    items = []
+    scan = {}
+    while True:
+        response = events.events_table.scan(**scan)
+        items += [item for item in response["Items"] if not item["sessionId"].startswith(stats.STATS_KEY_PREFIX)]
+        if "LastEvaluatedKey" not in response:
+            return items
+        scan["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def counters(start_day, end_day):
+    return {
+        (day["date"], tool_name): {counter: value for counter, value in tool_counters.items() if value}
+        for day in stats.query_stats(start_day, end_day)
+        for tool_name, tool_counters in day["tools"].items()
+    }
+
+
+def counter_partitions():
+    return {item["sessionId"] for item in events.events_table.scan()["Items"]
+            if item["sessionId"].startswith(stats.STATS_KEY_PREFIX)}
+
+
+def test_counters_match_the_event_store(session_id):
+    now = time.time()
+    for size in (100, 250, 0):
+        track(session_id, "royalty-compressor", size)
+    track(session_id, "name-splitter", 40)
+    response = handlers.track_usage_batch({"body": json.dumps({"events": [
+        {"session_id": session_id, "tool_name": "name-splitter", "action": "split",
+         "details": {"bytes_processed": 7}, "timestamp": now - offset}
+        for offset in (0, 60, 3 * 60 * 60, 20 * 60 * 60)
+    ]})})
+    assert json.loads(response["body"])["accepted"] == 4
+
+    stored = event_store()
+    assert len(stored) == 8
+    start_day, end_day = stats.day_of(now - stats.MAX_EVENT_AGE_SECONDS), stats.day_of(now)
+    assert counters(start_day, end_day) == stats.tally(stored)
+
+
+def test_writes_spread_over_the_shards(session_id, monkeypatch):
+    monkeypatch.setattr(stats, "STATS_SHARDS", 4)
+    for _ in range(40):
+        track(session_id, "royalty-compressor", 10)
+
+    today = stats.day_of(time.time())
+    assert len(counter_partitions()) > 1
+    assert counter_partitions() <= {stats.shard_partition(today, shard) for shard in range(4)}
+    assert counters(today, today) == {
+        (today, "royalty-compressor"): {"calls": 40, "bytes_processed": 400, "duration_ms": 500}
+    }
+
+
+def test_tool_filter_sums_its_shards(session_id, monkeypatch):
+    monkeypatch.setattr(stats, "STATS_SHARDS", 3)
+    for _ in range(12):
+        track(session_id, "royalty-compressor", 1)
+    track(session_id, "name-splitter", 1)
+
+    today = stats.day_of(time.time())
+    [day] = stats.query_stats(today, today, "royalty-compressor")
+    assert list(day["tools"]) == ["royalty-compressor"]
+    assert day["tools"]["royalty-compressor"]["calls"] == 12
+
+
+def test_rebuild_reproduces_the_counters_of_closed_days(session_id, monkeypatch):
+    monkeypatch.setattr(stats, "STATS_SHARDS", 4)
+    for _ in range(10):
+        track(session_id, "royalty-compressor", 30)
+    track(session_id, "name-splitter", 5)
+    today = stats.day_of(time.time())
+    before = counters(today, today)
+
+    # Drift a shard and leave a counter with no events behind, as a lost update or a bug would.
+    events.events_table.put_item(Item={**stats.stats_key(today, "royalty-compressor", 3), "calls": 99})
+    events.events_table.put_item(Item={**stats.stats_key(today, "retired-tool"), "calls": 3})
+    assert counters(today, today) != before
+
+    later = time.time() + 3 * 24 * 60 * 60
+    report = stats.rebuild(today, today, now=later)
+
+    assert report == {"events_scanned": 11, "counters_written": 2}
+    assert counters(today, today) == before == stats.tally(event_store())
+    assert counter_partitions() == {stats.shard_partition(today)}
+
+
+def test_rebuild_refuses_days_that_still_receive_events(mocked_aws):
+    now = time.time()
+    today = stats.day_of(now)
+    assert stats.last_closed_day(now) < stats.day_of(now - stats.MAX_EVENT_AGE_SECONDS)
+
+    with pytest.raises(ValueError, match="can still receive events"):
+        stats.rebuild(today, today, now=now)
+    with pytest.raises(ValueError):
+        stats.rebuild(stats.last_closed_day(now), stats.day_of(now - stats.MAX_EVENT_AGE_SECONDS), now=now)
+    assert stats.rebuild(stats.last_closed_day(now), stats.last_closed_day(now), now=now) == {
+        "events_scanned": 0, "counters_written": 0
+    }
+
+
+def test_rebuild_is_not_a_public_route(mocked_aws, context):
+    response = handlers.handle_session({
+        "httpMethod": "POST",
+        "path": "/session-manager/stats/rebuild",
+        "body": json.dumps({"from": "2024-01-01", "to": "2024-01-01"})
+    }, context)
+    assert response["statusCode"] == 400
+    assert "Invalid route" in json.loads(response["body"])["error"]
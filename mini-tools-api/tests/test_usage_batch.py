@@ -0,0 +1,146 @@
+"""Bulk usage ingest: per-entry validation, retries of unprocessed writes and partial failures."""
+import json
+import pytest
+from session_manager import events, handlers, stats
+from shared import aws
+
+
+@pytest.fixture
+def session_id(mocked_aws):
+    handlers.session_cache.clear()
+    response = handlers.create_session({"body": "{}"})
+    yield json.loads(response["body"])["session_id"]
+    handlers.session_cache.clear()
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    slept = []
+    monkeypatch.setattr("session_manager.events.time.sleep", slept.append)
+    return slept
+
+
+class Throttled:
+    """The DynamoDB resource, except that BatchWriteItem leaves items unprocessed.
+
+    ``unprocessed(call, requests)`` picks, for each call, which of the requests DynamoDB "throttles".
+    """
+
+    def __init__(self, unprocessed):
+        self._resource = aws.resource("dynamodb")
+        self._unprocessed = unprocessed
+        self.calls = []
+
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
+
+    def batch_write_item(self, RequestItems):
+        requests = RequestItems[events.USAGE_TABLE_NAME]
+        self.calls.append(len(requests))
+        held = self._unprocessed(len(self.calls), requests)
+        written = [request for request in requests if request not in held]
+        if written:
+            self._resource.batch_write_item(RequestItems={events.USAGE_TABLE_NAME: written})
+        return {"UnprocessedItems": {events.USAGE_TABLE_NAME: held} if held else {}}
+
+
+def throttle(monkeypatch, unprocessed):
+    fake = Throttled(unprocessed)
+    monkeypatch.setattr("session_manager.events.aws.resource", lambda service: fake)
+    return fake
+
+
+def track(entries):
+    response = handlers.track_usage_batch({"body": json.dumps({"events": entries})})
+    return response["statusCode"], json.loads(response["body"])
+
+
+def stored(session_id):
+    return events.query_events(session_id, newest_first=False)[0]
+
+
+def test_records_valid_entries_and_rejects_the_rest(session_id):
+    status, body = track([
+        {"session_id": session_id, "tool_name": "compressor", "action": "run", "details": {"bytes_processed": 10}},
+        "not an object",
+        {"session_id": ["a", "list"]},
+        {"tool_name": "compressor"},
+        {"session_id": session_id, "tool_name": {"not": "a string"}},
+        {"session_id": "no-such-session", "tool_name": "compressor"},
+        {"session_id": session_id, "action": "view"},
+    ])
+    assert status == 200
+    assert body["accepted"] == 2 and body["failed"] == 0
+    assert body["rejected"] == [
+        {"index": 1, "error": "Event must be an object"},
+        {"index": 2, "error": "Missing session_id"},
+        {"index": 3, "error": "Missing session_id"},
+        {"index": 4, "error": "tool_name and action must be strings"},
+        {"index": 5, "error": "Session not found"},
+    ]
+    assert sorted((item["tool_name"], item["action"]) for item in stored(session_id)) == [
+        ("compressor", "run"), ("unknown", "view")
+    ]
+
+
+@pytest.mark.parametrize("body, error", [
+    ({}, "Missing events"),
+    ({"events": []}, "Missing events"),
+    ({"events": {"session_id": "x"}}, "Missing events"),
+    ({"events": [{}] * (handlers.MAX_BATCH_EVENTS + 1)}, f"At most {handlers.MAX_BATCH_EVENTS} events"),
+])
+def test_rejects_malformed_requests(session_id, body, error):
+    response = handlers.track_usage_batch({"body": json.dumps(body)})
+    assert response["statusCode"] == 400
+    assert error in json.loads(response["body"])["error"]
+
+
+def test_client_timestamps_are_kept_within_a_day(session_id):
+    now = int(handlers.time.time())
+    track([
+        {"session_id": session_id, "action": "old", "timestamp": now - 3600},
+        {"session_id": session_id, "action": "ancient", "timestamp": now - 10 * 24 * 3600},
+        {"session_id": session_id, "action": "future", "timestamp": now + 3600},
+        {"session_id": session_id, "action": "garbage", "timestamp": "soon"},
+    ])
+    timestamps = {item["action"]: int(item["timestamp"]) for item in stored(session_id)}
+    assert timestamps["old"] == now - 3600
+    assert now - events.MAX_EVENT_AGE_SECONDS - 1 <= timestamps["ancient"] <= now - events.MAX_EVENT_AGE_SECONDS + 1
+    assert now <= timestamps["future"] <= now + 1
+    assert now <= timestamps["garbage"] <= now + 1
+
+
+def test_unprocessed_items_are_retried_with_backoff(session_id, monkeypatch, delays):
+    # The first two calls leave every other item unprocessed.
+    fake = throttle(monkeypatch, lambda call, requests: requests[::2] if call <= 2 else [])
+    status, body = track([{"session_id": session_id, "action": str(i)} for i in range(30)])
+
+    assert status == 200
+    assert body == {"accepted": 30, "rejected": [], "failed": 0}
+    assert len(stored(session_id)) == 30
+    # 30 events are two batches of 25 and 5; the first is retried twice, with growing delay caps.
+    assert fake.calls == [25, 13, 7, 5]
+    assert len(delays) == 2
+    assert all(0 <= delay <= events.BATCH_WRITE_BASE_DELAY * 2 ** attempt for attempt, delay in enumerate(delays, 1))
+
+
+def test_items_still_unprocessed_are_reported_as_failed(session_id, monkeypatch, delays):
+    def unprocessed(call, requests):
+        return [request for request in requests if request["PutRequest"]["Item"]["action"] == "stuck"]
+
+    fake = throttle(monkeypatch, unprocessed)
+    status, body = track([
+        {"session_id": session_id, "tool_name": "compressor", "action": "stuck"},
+        {"session_id": session_id, "tool_name": "compressor", "action": "ok"},
+    ])
+
+    assert status == 200
+    assert body == {"accepted": 1, "rejected": [], "failed": 1}
+    assert len(fake.calls) == events.BATCH_WRITE_ATTEMPTS
+    assert len(delays) == events.BATCH_WRITE_ATTEMPTS - 1
+    assert [item["action"] for item in stored(session_id)] == ["ok"]
+    # Counters only count what was written.
+    today = stats.day_of(handlers.time.time())
+    assert stats.query_stats(today, today)[0]["tools"] == {
+        "compressor": {"calls": 1, "bytes_processed": 0, "duration_ms": 0}
+    }
@@ -4,10 +4,10 @@ import { useDropzone } from "react-dropzone";
 import toast, { Toaster } from "react-hot-toast";
 import { v4 as uuidv4 } from "uuid"; // for anonymous session ID
 
-import { createSession, trackUsage, getSessionData } from "./api/sessionManager";
+import { createSession, trackUsage, getAllSessionEvents } from "./api/sessionManager";
 import { uploadFile } from "./api/fileManager";
-import { compressRoyaltyReport } from "./api/royaltyCompressor";
-import { countTodayCompressions } from "./utils/sessionUtils";
+import { runCompressionJob } from "./api/royaltyCompressor";
+import { countTodayCompressions, startOfToday } from "./utils/sessionUtils";
 
 const DAILY_LIMIT = 5;
 
@@ -20,9 +20,9 @@ export default function RoyaltyCompressor() {
 
   async function fetchCompressionCount(sessionId) {
     try {
-      const res = await getSessionData(sessionId);
-      const logs = res.data.usage_logs || [];
-      const count = countTodayCompressions(logs);
+      // Only today's events are fetched, so this stays cheap however long the session is.
+      const events = await getAllSessionEvents(sessionId, { from: startOfToday() });
+      const count = countTodayCompressions(events);
       setCompressionsToday(count);
     } catch (err) {
       console.warn("Could not fetch compression count", err);
@@ -51,7 +51,7 @@ export default function RoyaltyCompressor() {
     };
   }, [downloadUrl]);
 
-  const MAX_FILE_SIZE = 524288000; // 500MB in bytes
+  const MAX_FILE_SIZE = 5 * 1024 ** 3; // 5GB; large files upload in resumable parts
 
   const onDrop = useCallback((acceptedFiles) => {
     const selectedFile = acceptedFiles[0];
@@ -63,7 +63,7 @@ export default function RoyaltyCompressor() {
     }
 
     if (selectedFile.size > MAX_FILE_SIZE) {
-      toast.error("File is too large. 500MB max.");
+      toast.error("File is too large. 5GB max.");
       return;
     }
 
@@ -87,15 +87,28 @@ export default function RoyaltyCompressor() {
     }
   
     setLoading(true);
-    toast.loading("Uploading...");
+    toast.loading("Uploading...", { id: "upload" });
   
     try {
       // 1. Upload file to S3
-      const uploadRes = await uploadFile(file);
+      const uploadRes = await uploadFile(file, "uploads", {
+        onProgress: (fraction) => {
+          toast.loading(`Uploading... ${Math.floor(fraction * 100)}%`, { id: "upload" });
+        },
+      });
+      toast.dismiss("upload");
       const s3Key = uploadRes.data.key;
   
-      // 2. Compress the file
-      const compressRes = await compressRoyaltyReport(s3Key);
+      // 2. Compress the file (runs as a background job so large reports don't hit the API timeout)
+      const compressStarted = performance.now();
+      const compressRes = await runCompressionJob(s3Key, {
+        onProgress: (job) => {
+          if (job.state === "running") {
+            toast.loading(`Compressing... ${job.rows_processed.toLocaleString()} rows`, { id: "compress" });
+          }
+        },
+      });
+      toast.dismiss("compress");
       const { download_url, output_key, input_key } = compressRes.data;
   
       // 3. Track usage
@@ -106,7 +119,12 @@ export default function RoyaltyCompressor() {
       await trackUsage(sessionId, {
         tool_name: "Royalty Compressor",
         action: "compress",
-        details: { input_key, output_key },
+        details: {
+          input_key,
+          output_key,
+          bytes_processed: file.size,
+          duration_ms: Math.round(performance.now() - compressStarted),
+        },
       });
   
       // 4. Prepare download
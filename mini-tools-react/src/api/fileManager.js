@@ -1,7 +1,136 @@
 import api from './axios';
 import axios from "axios";
 
-export const uploadFile = async (file, folder = "uploads") => {
+// Files above this go up as a multipart upload: parts are PUT in parallel and survive a dropped connection.
+export const MULTIPART_THRESHOLD = 100 * 1024 * 1024;
+const PART_CONCURRENCY = 6;
+const PART_ATTEMPTS = 4;
+// Parts each worker signs at a time: enough to save a round trip, few enough that no URL waits long.
+const SIGN_AHEAD = 2;
+
+const resumeKey = (file) => `multipart:${file.name}:${file.size}:${file.lastModified}`;
+
+const signParts = async (key, upload_id, part_numbers) => {
+  const res = await api.post("/file-manager/multipart/sign-parts", {
+    key,
+    upload_id,
+    part_numbers,
+  });
+  return res.data.parts;
+};
+
+// S3 answers 403 to an expired URL, so `resign` fetches a fresh one before the retry.
+const uploadPart = async (url, blob, onUploadProgress, resign) => {
+  let lastError;
+  for (let attempt = 0; attempt < PART_ATTEMPTS; attempt++) {
+    if (attempt) {
+      await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** attempt));
+      if (lastError.response?.status === 403) {
+        url = await resign();
+      }
+    }
+    try {
+      const res = await axios.put(url, blob, {
+        headers: { 'Content-Type': '' },
+        onUploadProgress,
+      });
+      return res.headers.etag;
+    } catch (err) {
+      lastError = err;
+    }
+  }
+  throw lastError;
+};
+
+const startOrResumeUpload = async (file) => {
+  const saved = JSON.parse(localStorage.getItem(resumeKey(file)) || "null");
+  if (saved) {
+    try {
+      const res = await api.post("/file-manager/multipart/list-parts", {
+        key: saved.key,
+        upload_id: saved.upload_id,
+      });
+      return { ...saved, done: res.data.parts.filter((part) => part.size > 0) };
+    } catch (err) {
+      // The upload was completed, aborted or expired; start over.
+      localStorage.removeItem(resumeKey(file));
+    }
+  }
+
+  const res = await api.post("/file-manager/multipart/create", {
+    file_name: file.name,
+    size: file.size,
+  });
+  const upload = res.data;
+  localStorage.setItem(resumeKey(file), JSON.stringify(upload));
+  return { ...upload, done: [] };
+};
+
+export const uploadLargeFile = async (file, { onProgress, concurrency = PART_CONCURRENCY } = {}) => {
+  const { key, upload_id, part_size, part_count, done } = await startOrResumeUpload(file);
+
+  const etags = {};
+  const loaded = {};
+  done.forEach((part) => {
+    etags[part.part_number] = part.etag;
+    loaded[part.part_number] = part.size;
+  });
+  const report = () => {
+    if (onProgress) {
+      onProgress(Object.values(loaded).reduce((sum, bytes) => sum + bytes, 0) / file.size);
+    }
+  };
+  report();
+
+  const pending = [];
+  for (let number = 1; number <= part_count; number++) {
+    if (!etags[number]) pending.push(number);
+  }
+
+  // Workers pull part numbers off the queue and sign only the next few, so no URL sits long enough to expire.
+  const worker = async () => {
+    while (pending.length) {
+      const parts = await signParts(key, upload_id, pending.splice(0, SIGN_AHEAD));
+      for (const { part_number, upload_url } of parts) {
+        const start = (part_number - 1) * part_size;
+        const blob = file.slice(start, Math.min(start + part_size, file.size));
+        const resign = async () => (await signParts(key, upload_id, [part_number]))[0].upload_url;
+        etags[part_number] = await uploadPart(upload_url, blob, (event) => {
+          loaded[part_number] = event.loaded;
+          report();
+        }, resign);
+        loaded[part_number] = blob.size;
+        report();
+      }
+    }
+  };
+  await Promise.all(Array.from({ length: Math.min(concurrency, pending.length) }, worker));
+
+  await api.post("/file-manager/multipart/complete", {
+    key,
+    upload_id,
+    parts: Object.entries(etags).map(([number, etag]) => ({ part_number: Number(number), etag })),
+  });
+  localStorage.removeItem(resumeKey(file));
+
+  return { data: { key } };
+};
+
+export const abortLargeUpload = async (file) => {
+  const saved = JSON.parse(localStorage.getItem(resumeKey(file)) || "null");
+  if (!saved) return;
+  localStorage.removeItem(resumeKey(file));
+  await api.post("/file-manager/multipart/abort", {
+    key: saved.key,
+    upload_id: saved.upload_id,
+  });
+};
+
+export const uploadFile = async (file, folder = "uploads", options = {}) => {
+  if (file.size > MULTIPART_THRESHOLD) {
+    return uploadLargeFile(file, options);
+  }
+
   // Step 1: Request presigned URL from File Manager
   const res = await api.post("/file-manager/generate-upload-url", {
     file_name: file.name,
@@ -27,3 +156,29 @@ export const getDownloadUrl = (key) => {
 export const deleteFile = (key) => {
   return api.delete(`/file-manager/delete/${encodeURIComponent(key)}`);
 };
+
+export const uploadFiles = async (files) => {
+  // One request signs every upload URL, then the PUTs go straight to S3 in parallel.
+  const res = await api.post("/file-manager/generate-upload-urls", {
+    file_names: files.map((file) => file.name),
+  });
+
+  const { uploads } = res.data;
+  await Promise.all(uploads.map((upload, index) =>
+    axios.put(upload.upload_url, files[index], {
+      headers: {
+        'Content-Type': ''
+      }
+    })
+  ));
+
+  return { data: { keys: uploads.map((upload) => upload.key) } };
+};
+
+export const getDownloadUrls = (keys) => {
+  return api.post("/file-manager/download-urls", { keys });
+};
+
+export const deleteFiles = (keys) => {
+  return api.post("/file-manager/delete-batch", { keys });
+};
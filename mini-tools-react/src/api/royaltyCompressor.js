@@ -1,7 +1,43 @@
 import api from './axios';
 
-export const compressRoyaltyReport = (s3Key) => {
+// `query` can narrow the output: { columns: [...], filters: { Country: ["US"], "Channel ID": "UC..." } }.
+export const compressRoyaltyReport = (s3Key, query = {}) => {
   return api.post('/royalty-compressor/compress', {
     s3_key: s3Key,
+    ...query,
+  });
+};
+
+export const startCompressionJob = (s3Key, query = {}) => {
+  return api.post('/royalty-compressor/jobs', {
+    s3_key: s3Key,
+    ...query,
+  });
+};
+
+export const getCompressionJob = (jobId) => {
+  return api.get(`/royalty-compressor/jobs/${encodeURIComponent(jobId)}`);
+};
+
+// Starts a compression job and polls it until it finishes, resolving with the job's result.
+export const runCompressionJob = async (s3Key, { interval = 2000, onProgress, columns, filters } = {}) => {
+  const res = await startCompressionJob(s3Key, { columns, filters });
+  const { job_id } = res.data;
+
+  for (;;) {
+    const { data: job } = await getCompressionJob(job_id);
+    if (onProgress) onProgress(job);
+
+    if (job.state === 'succeeded') return { data: job.result };
+    if (job.state === 'failed') throw new Error(job.error || 'Compression failed');
+
+    await new Promise((resolve) => setTimeout(resolve, interval));
+  }
+};
+
+export const compressRoyaltyReports = (s3Keys, { merge = false } = {}) => {
+  return api.post('/royalty-compressor/compress-batch', {
+    s3_keys: s3Keys,
+    merge,
   });
 };
@@ -4,10 +4,104 @@ export const createSession = (data = {}) => {
   return api.post('/session-manager/create-session', data);
 };
 
+// Usage events are buffered and sent in bulk: on a timer, when the buffer fills up, and when the
+// page is hidden or unloaded (with fetch keepalive, which outlives the page).
+const FLUSH_INTERVAL_MS = 10000;
+const MAX_BUFFERED_EVENTS = 50;
+// Browsers cap the bodies of in-flight keepalive requests at 64 KB in total.
+const KEEPALIVE_BODY_LIMIT = 60000;
+
+let usageBuffer = [];
+let flushTimer = null;
+
+const batchUrl = () => {
+  const base = api.defaults.baseURL || '/';
+  return new URL('session-manager/track-usage-batch', new URL(base.endsWith('/') ? base : `${base}/`, window.location.href)).toString();
+};
+
+export const flushUsage = async () => {
+  clearTimeout(flushTimer);
+  flushTimer = null;
+  if (!usageBuffer.length) return;
+
+  const events = usageBuffer;
+  usageBuffer = [];
+  try {
+    await api.post('/session-manager/track-usage-batch', { events });
+  } catch (err) {
+    // Keep them for the next flush rather than dropping usage on a transient failure.
+    usageBuffer = events.concat(usageBuffer);
+    console.warn('Could not send usage events', err);
+  }
+};
+
+const flushWithKeepalive = () => {
+  clearTimeout(flushTimer);
+  flushTimer = null;
+  let batch = [];
+  let size = 0;
+  const send = () => {
+    if (!batch.length) return;
+    fetch(batchUrl(), {
+      method: 'POST',
+      keepalive: true,
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ events: batch }),
+    }).catch(() => {});
+    batch = [];
+    size = 0;
+  };
+
+  for (const event of usageBuffer) {
+    const eventSize = JSON.stringify(event).length + 1;
+    if (size + eventSize > KEEPALIVE_BODY_LIMIT) send();
+    batch.push(event);
+    size += eventSize;
+  }
+  send();
+  usageBuffer = [];
+};
+
+if (typeof window !== 'undefined') {
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushWithKeepalive();
+  });
+  window.addEventListener('pagehide', flushWithKeepalive);
+}
+
 export const trackUsage = (sessionId, usageData) => {
-  return api.post(`/session-manager/track-usage/${encodeURIComponent(sessionId)}`, usageData);
+  usageBuffer.push({
+    session_id: sessionId,
+    timestamp: Math.floor(Date.now() / 1000),
+    ...usageData,
+  });
+
+  if (usageBuffer.length >= MAX_BUFFERED_EVENTS) {
+    return flushUsage();
+  }
+  if (!flushTimer) {
+    flushTimer = setTimeout(flushUsage, FLUSH_INTERVAL_MS);
+  }
+  return Promise.resolve();
 };
 
 export const getSessionData = (sessionId) => {
   return api.get(`/session-manager/session-data/${encodeURIComponent(sessionId)}`);
 };
+
+// One page of usage events, newest first. params: { from, to, limit, cursor, order }
+// (from/to are epoch seconds). Pass the returned next_cursor back to get the next page.
+export const getSessionEvents = (sessionId, params = {}) => {
+  return api.get(`/session-manager/session-events/${encodeURIComponent(sessionId)}`, { params });
+};
+
+export const getAllSessionEvents = async (sessionId, params = {}) => {
+  const events = [];
+  let cursor;
+  do {
+    const res = await getSessionEvents(sessionId, { ...params, cursor, limit: 200 });
+    events.push(...res.data.events);
+    cursor = res.data.next_cursor;
+  } while (cursor);
+  return events;
+};
@@ -1,9 +1,14 @@
-export const countTodayCompressions = (usageLogs) => {
+export const startOfToday = () => {
+  const now = new Date();
+  return Math.floor(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate()) / 1000);
+};
+
+export const countTodayCompressions = (usageEvents) => {
   const today = new Date().toISOString().slice(0, 10); // YYYY-MM-DD
 
-  return usageLogs.filter((log) => {
-    if (log.action !== "compress") return false;
-    const timestamp = new Date(log.timestamp * 1000).toISOString().slice(0, 10);
+  return usageEvents.filter((event) => {
+    if (event.action !== "compress") return false;
+    const timestamp = new Date(event.timestamp * 1000).toISOString().slice(0, 10);
     return timestamp === today;
   }).length;
-};
\ No newline at end of file
+};
@@ -8,6 +8,7 @@ echo "📦 Setting up local resources in LocalStack..."
 REGION="us-east-1"
 BUCKET_NAME="mini-tools"
 TABLE_NAME="Sessions"
+USAGE_TABLE_NAME="UsageEvents"
 LOCALSTACK_ENDPOINT="http://localhost:4566"
 
 # Create S3 bucket
@@ -47,4 +48,15 @@ aws dynamodb create-table \
   --endpoint-url "$LOCALSTACK_ENDPOINT" \
   || echo "✅ Table already exists"
 
+# Usage events: one item per event, sorted by ULID (time-ordered) within a session
+echo "🗂️  Creating DynamoDB table: $USAGE_TABLE_NAME"
+aws dynamodb create-table \
+  --table-name "$USAGE_TABLE_NAME" \
+  --attribute-definitions AttributeName=sessionId,AttributeType=S AttributeName=eventId,AttributeType=S \
+  --key-schema AttributeName=sessionId,KeyType=HASH AttributeName=eventId,KeyType=RANGE \
+  --provisioned-throughput ReadCapacityUnits=5,WriteCapacityUnits=5 \
+  --region "$REGION" \
+  --endpoint-url "$LOCALSTACK_ENDPOINT" \
+  || echo "✅ Table already exists"
+
 echo "✅ Local resources created!"
@@ -1,7 +1,23 @@
+import os
+import sys
 import streamlit as st
-import pandas as pd
 from io import BytesIO
 
+# The conversion is shared with the API, which owns the code.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mini-tools-api"))
+from mri_converter.conversion import convert, read_muma
+from upload_cache import cache_upload_step, upload_digest
+
+@cache_upload_step
+def convert_upload(digest, _data):
+    # Every value is read as text, so IDs and shares keep their exact formatting
+    df = read_muma(BytesIO(_data))
+
+    # One MRI row per recording slot, built column by column
+    output = BytesIO()
+    convert(df).to_csv(output, index=False)
+    return output.getvalue()
+
 # Set page config
 st.set_page_config(page_title="MuMa to MRI Converter", page_icon="📂", layout="wide")
 
@@ -44,89 +60,8 @@ uploaded_file = st.file_uploader("", type=["csv"])
 st.markdown("</div>", unsafe_allow_html=True)
 
 if uploaded_file:
-    # Read CSV with "Adjustment Type" as string
-    df = pd.read_csv(uploaded_file, dtype=str).fillna("")
-
-    # Storage for formatted rows
-    formatted_rows = []
-
-    # Process each row
-    for _, row in df.iterrows():
-        # Writers & Uncontrolled Writers (strip whitespace)
-        i = 1
-        while f"Recording {i} Display Artist" in row and row[f"Recording {i} Display Artist"] != "":
-            song_data = {"SONG TITLE*": row["Song Title"],
-                    "AKA TITLE": "",
-                    "MRI SONG ID": "",
-                    "PUBLISHER'S SONG ID": "",
-                    "ISWC": ""}
-            
-            if f"Composer {i} Surname" in row:
-                song_data["COMPOSER LAST NAME*"] = row[f"Composer {i} Surname"]
-                song_data["COMPOSER FIRST NAME*"] = row[f"Composer {i} First Name"]
-                song_data["COMPOSER MIDDLE NAME"] = row[f"Composer {i} Middle Name"]
-                song_data["COMPOSER PRO"] = ""
-                song_data["COMPOSER IPI NUMBER"] = ""
-                song_data["CONTROLLED COMPOSER (Y/N)*"] = row[f"Composer {i} Controlled"]
-                song_data["COMPOSER SHARE %*"] = row[f"Composer {i} Share"]
-                song_data["COMPOSER ROLE CODE"] = row[f"Composer {i} Capacity"]
-            else:
-                song_data["COMPOSER LAST NAME*"] = ""
-                song_data["COMPOSER FIRST NAME*"] = ""
-                song_data["COMPOSER MIDDLE NAME"] = ""
-                song_data["COMPOSER PRO"] = ""
-                song_data["COMPOSER IPI NUMBER"] = ""
-                song_data["CONTROLLED COMPOSER (Y/N)*"] = ""
-                song_data["COMPOSER SHARE %*"] = ""
-                song_data["COMPOSER ROLE CODE"] = ""
-
-            if f"Publisher {i} Name" in row:
-                song_data["PUBLISHER NAME *"] = row[f"Publisher {i} Name"]
-                song_data["PUBLISHER PRO*"] = ""
-                song_data["PUBLISHER IPI NUMBER *"] = ""
-                song_data["CONTROLLED PUBLISHER (Y/N)*"] = row[f"Publisher {i} Controlled"]
-            else:
-                song_data["PUBLISHER NAME *"] = ""
-                song_data["PUBLISHER PRO*"] = ""
-                song_data["PUBLISHER IPI NUMBER *"] = ""
-                song_data["CONTROLLED PUBLISHER (Y/N)*"] = ""
-                
-            if f"Client {i} Name" in row:
-                song_data["ADMINISTRATOR NAME"] = row[f"Client {i} Name"]
-                song_data["SHARE %*"] = row[f"Publisher {i} Share"]
-                song_data["TERRITORY CONTROLLED*"] = row[f"Territory {i} Name"]
-                song_data["TERRITORY EXCLUSIONS (OPTIONAL)"] = ""
-                song_data["PUBLISHER MAILING ADDRESS*"] = ""
-                song_data["PUBLISHER CONTACT*"] = ""
-            else:
-                song_data["ADMINISTRATOR NAME"] = ""
-                song_data["SHARE %*"] = ""
-                song_data["TERRITORY CONTROLLED*"] = ""
-                song_data["TERRITORY EXCLUSIONS (OPTIONAL)"] = ""
-                song_data["PUBLISHER MAILING ADDRESS*"] = ""
-                song_data["PUBLISHER CONTACT*"] = ""
-
-            if f"Recording {i} Display Artist" in row:
-                song_data["RECORDING ARTIST NAME"] = row[f"Recording {i} Display Artist"]
-                song_data["RECORDING LABEL"] = row[f"Recording {i} Label Name"]
-                song_data["RECORDING ISRC"] = row[f"Recording {i} ISRC"]
-                song_data["UPC/EAN"] = row[f"Recording {i} UPC"]
-            else:
-                song_data["RECORDING ARTIST NAME"] = ""
-                song_data["RECORDING LABEL"] = ""
-                song_data["RECORDING ISRC"] = ""
-                song_data["UPC/EAN"] = ""
-
-            formatted_rows.append(song_data)
-            i += 1
-
-    # Convert list of dictionaries to DataFrame
-    formatted_df = pd.DataFrame(formatted_rows)
-
-    # Convert to CSV
-    output = BytesIO()
-    formatted_df.to_csv(output, index=False)
-    output.seek(0)
+    # Converted once per distinct file; reruns and repeat uploads reuse the cached CSV
+    mri_csv = convert_upload(upload_digest(uploaded_file), uploaded_file.getvalue())
 
     # Extract original file name without extension
     original_filename = uploaded_file.name.rsplit(".", 1)[0]
@@ -134,5 +69,5 @@ if uploaded_file:
 
     # Centered Download Button
     st.markdown('<div class="download-container">', unsafe_allow_html=True)
-    st.download_button("Download MRI Report", output, file_name=compressed_filename, mime="text/csv")
+    st.download_button("Download MRI Report", mri_csv, file_name=compressed_filename, mime="text/csv")
     st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
@@ -1,47 +1,31 @@
+import os
+import sys
 import streamlit as st
 import pandas as pd
 import io
 
-def split_composer_names(df):
-    updated_df = df.copy()  # Copy original DataFrame
-    column_positions = {}
+# The splitting is shared with the API, which owns the code.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mini-tools-api"))
+from name_splitter.splitting import split_composer_names
+from shared.s3_io import write_xlsx
+from upload_cache import cache_upload_step, upload_digest
 
-    # Identify "Composer x Name" columns
-    for idx, col in enumerate(df.columns):
-        if "Composer" in col and "Name" in col:
-            composer_number = col.split()[1]  # Extract composer number (e.g., "1", "2", etc.)
-            column_positions[col] = idx  # Store original position
-
-    # Process each Composer column and insert new columns
-    for col, idx in sorted(column_positions.items(), key=lambda x: x[1], reverse=True):
-        composer_number = col.split()[1]
-        expanded_values = df[col].apply(split_name).apply(pd.Series)
-        expanded_values.columns = [
-            f"Composer {composer_number} First Name",
-            f"Composer {composer_number} Middle Name",
-            f"Composer {composer_number} Surname"
-        ]
-
-        # Insert new columns in the correct position
-        for i, new_col in enumerate(expanded_values.columns):
-            updated_df.insert(idx + i, new_col, expanded_values.iloc[:, i])
-
-        # Drop the original "Composer x Name" column
-        updated_df.drop(columns=[col], inplace=True)
+@cache_upload_step
+def split_upload(digest, file_name, _data):
+    """Previews of the upload and its split, and the split as Excel bytes."""
+    # Read the file
+    if file_name.endswith(".xlsx"):
+        df = pd.read_excel(io.BytesIO(_data), engine="openpyxl")
+    elif file_name.endswith(".csv"):
+        df = pd.read_csv(io.BytesIO(_data))
 
-    return updated_df
+    # Process the file
+    processed_df = split_composer_names(df)
 
-def split_name(name):
-    if pd.isna(name) or name.strip() == "":
-        return "", "", ""
-    
-    parts = name.split()
-    if len(parts) == 2:
-        return parts[0], "", parts[1]  # First Name, Empty Middle Name, Last Name
-    elif len(parts) > 2:
-        return parts[0], parts[1], " ".join(parts[2:])  # First Name, Middle Name, Last Name
-    else:
-        return name, "", ""  # Only First Name, others empty
+    # Convert to Excel for download, streaming rows into a write-only workbook
+    output = io.BytesIO()
+    write_xlsx(processed_df, output)
+    return df.head(), processed_df.head(), output.getvalue()
 
 # Streamlit UI
 st.title("🎵 Composer Name Splitter")
@@ -51,28 +35,16 @@ st.write("Upload an Excel or CSV file, and we'll split `Composer x Name` into `F
 uploaded_file = st.file_uploader("Upload a file", type=["xlsx", "csv"])
 
 if uploaded_file:
-    file_name = uploaded_file.name
-
-    # Read the file
-    if file_name.endswith(".xlsx"):
-        df = pd.read_excel(uploaded_file, engine="openpyxl")
-    elif file_name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
+    # Split once per distinct file; reruns and repeat uploads reuse the cached workbook
+    preview, processed_preview, output = split_upload(
+        upload_digest(uploaded_file), uploaded_file.name, uploaded_file.getvalue()
+    )
 
     st.write("### Preview of Uploaded File")
-    st.dataframe(df.head())
-
-    # Process the file
-    processed_df = split_composer_names(df)
-
-    # Convert to Excel for download
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        processed_df.to_excel(writer, index=False)
-    output.seek(0)
+    st.dataframe(preview)
 
     st.write("### Preview of Processed File")
-    st.dataframe(processed_df.head())
+    st.dataframe(processed_preview)
 
     # Download button
     st.download_button(
@@ -80,4 +52,4 @@ if uploaded_file:
         data=output,
         file_name="processed_composers.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
\ No newline at end of file
+    )
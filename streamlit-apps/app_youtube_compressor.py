@@ -1,6 +1,25 @@
+import os
+import sys
 import streamlit as st
-import pandas as pd
 from io import BytesIO
+from upload_cache import cache_upload_step, upload_digest
+
+# The compression core is shared with the API, which owns the code.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mini-tools-api"))
+from royalty_compressor.aggregation import compress_buffer
+from royalty_compressor.schema import ASSET_SUMMARY
+from shared.s3_io import write_csv
+
+@cache_upload_step
+def compress_upload(digest, _data):
+    # Same core and report format as the API: preamble skipped, headers normalized,
+    # one row per Asset ID with every revenue and view column summed
+    df = compress_buffer(_data, ASSET_SUMMARY)
+
+    # Convert to CSV
+    output = BytesIO()
+    write_csv(df, output)
+    return output.getvalue()
 
 # Set page config
 st.set_page_config(page_title="Royalty Report Compressor", page_icon="📂", layout="wide")
@@ -44,42 +63,8 @@ uploaded_file = st.file_uploader("", type=["csv"])
 st.markdown("</div>", unsafe_allow_html=True)
 
 if uploaded_file:
-    # Read CSV with "Adjustment Type" as string
-    df = pd.read_csv(uploaded_file)
-
-    if "Adjustment Type" in df.columns:
-        df["Adjustment Type"] = df["Adjustment Type"].fillna("None").astype(str)
-
-    # Store original column order
-    original_columns = df.columns.tolist()
-
-    # Columns to sum
-    sum_columns = [
-        "Owned Views", "YouTube Revenue Split : Auction", "YouTube Revenue Split : Reserved",
-        "YouTube Revenue Split : Partner Sold YouTube Served", "YouTube Revenue Split : Partner Sold Partner Served",
-        "YouTube Revenue Split", "Partner Revenue : Auction", "Partner Revenue : Reserved",
-        "Partner Revenue : Partner Sold YouTube Served", "Partner Revenue : Partner Sold Partner Served",
-        "Partner Revenue"
-    ]
-
-    # Identify non-numeric columns (excluding Asset ID, since we're grouping by it)
-    non_numeric_columns = [col for col in original_columns if col not in sum_columns and col != "Asset ID"]
-
-    # Convert numeric columns to float and handle missing values
-    df[sum_columns] = df[sum_columns].apply(pd.to_numeric, errors="coerce").fillna(0)
-
-    # Group by Asset ID, sum numeric columns, and retain first value of non-numeric columns
-    df = df.groupby("Asset ID", as_index=False).agg(
-        {**{col: "sum" for col in sum_columns}, **{col: "first" for col in non_numeric_columns}}
-    )
-
-    # Ensure original column order is preserved
-    df = df[original_columns]
-
-    # Convert to CSV
-    output = BytesIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
+    # Compressed once per distinct file; reruns and repeat uploads reuse the cached CSV
+    output = compress_upload(upload_digest(uploaded_file), uploaded_file.getvalue())
 
     # Extract original file name without extension
     original_filename = uploaded_file.name.rsplit(".", 1)[0]
@@ -0,0 +1,26 @@
+"""Keys and limits for caching the work done on uploaded files.
+
+Streamlit reruns the whole script on every interaction, including clicking a download button.
+The apps put their parse and transform steps behind ``st.cache_data`` keyed by a SHA-256 of the
+upload, so a rerun reuses the previous result, and so does anyone else uploading the same file.
+The bytes themselves are passed as an underscore argument, which Streamlit does not hash.
+"""
+import hashlib
+import os
+import streamlit as st
+
+CACHE_TTL_SECONDS = int(os.getenv("UPLOAD_CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("UPLOAD_CACHE_MAX_ENTRIES", "16"))
+
+
+def upload_digest(uploaded_file):
+    """SHA-256 of an upload, computed once per upload rather than once per rerun."""
+    digests = st.session_state.setdefault("upload_digests", {})
+    if uploaded_file.file_id not in digests:
+        digests[uploaded_file.file_id] = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    return digests[uploaded_file.file_id]
+
+
+def cache_upload_step(func):
+    """``st.cache_data`` with the limits shared by every upload-processing step."""
+    return st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)(func)